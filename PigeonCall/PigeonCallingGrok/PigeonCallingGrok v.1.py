@@ -1,7 +1,12 @@
-import tweepy
+import logging
 import random
 import os
-from openai import OpenAI
+import sys
+import time
+
+# Prompt templating is shared with the main bot (PigeonCall/prompts.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import prompts  # noqa: E402
 
 # Twitter API credentials (for posting only)
 consumer_key = os.getenv("TWITTER_CONSUMER_KEY")
@@ -9,14 +14,38 @@ consumer_secret = os.getenv("TWITTER_CONSUMER_SECRET")
 access_token = os.getenv("TWITTER_ACCESS_TOKEN")
 access_token_secret = os.getenv("TWITTER_ACCESS_TOKEN_SECRET")
 
-auth = tweepy.OAuthHandler(consumer_key, consumer_secret)
-auth.set_access_token(access_token, access_token_secret)
-api = tweepy.API(auth)
+# Clients are built on first use so importing the script doesn't load tweepy/openai
+_api = None
+_grok_client = None
+
+def get_twitter_api():
+    """Returns the tweepy API client, creating it on first use."""
+    global _api
+    if _api is None:
+        import tweepy
+        auth = tweepy.OAuthHandler(consumer_key, consumer_secret)
+        auth.set_access_token(access_token, access_token_secret)
+        _api = tweepy.API(auth)
+    return _api
+
+def get_grok_client():
+    """Returns the Grok API client, creating it on first use."""
+    global _grok_client
+    if _grok_client is None:
+        from openai import OpenAI
+        _grok_client = OpenAI(
+            api_key=os.getenv("GROK_API_KEY"),
+            base_url="https://api.x.ai/v1"
+        )
+    return _grok_client
 
-# Grok API client
-grok_client = OpenAI(
-    api_key=os.getenv("GROK_API_KEY"),
-    base_url="https://api.x.ai/v1"
+# Prompt templates live in prompts/<name>.txt ($variable placeholders) and are
+# re-read only when the file changes, so they can be tuned without touching code
+prompts.configure(
+    directory=os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompts"),
+    persona=os.getenv("GROK_PERSONA", "@cryptoshroomog—a DeFi newbie, crypto geek and PhD student vibing with decentralization"),
+    tone=os.getenv("GROK_TONE", "chill, nerdy and human—no robot vibes"),
+    default_budget=int(os.getenv("GROK_PROMPT_TOKEN_BUDGET", "200")),
 )
 
 # High-engagement handles
@@ -25,8 +54,8 @@ high_engagement_handles = ["VitalikButerin", "elonmusk", "brian_armstrong"]
 def fetch_latest_tweet_via_grok():
     """Fetch a real, fresh tweet using Grok API."""
     handle = random.choice(high_engagement_handles)
-    prompt = f"Get me the latest tweet from @{handle} posted today, February 27, 2025, with its text and real tweet ID."
-    response = grok_client.chat.completions.create(
+    prompt = prompts.render("fetch_tweet", handle=handle, date=time.strftime("%B %d, %Y"))
+    response = get_grok_client().chat.completions.create(
         model="grok-beta",
         messages=[{"role": "user", "content": prompt}],
         max_tokens=100
@@ -43,14 +72,8 @@ def fetch_latest_tweet_via_grok():
 
 def generate_reply_via_grok(tweet_text):
     """Generate a reply (max 400 chars) using Grok API."""
-    prompt = f"""
-    Yo, I’m @cryptoshroomog—a DeFi newbie and PhD student vibing with decentralization. Reply to this tweet: '{tweet_text}'. 
-    - Toss in shroom metaphors and crypto slang like ‘degens’ or ‘HODL’.
-    - Hit ‘em with a witty, brainy question about freedom or power.
-    - Keep it chill, nerdy, and human—no robot vibes.
-    - Max 400 chars, make folks wanna yap back.
-    """
-    response = grok_client.chat.completions.create(
+    prompt = prompts.render("reply", tweet=tweet_text, max_chars=400)
+    response = get_grok_client().chat.completions.create(
         model="grok-beta",
         messages=[{"role": "user", "content": prompt}],
         max_tokens=100
@@ -64,15 +87,8 @@ def generate_essay_via_grok():
     """Generate an essay (max 4000 chars) using Grok API."""
     topics = ["DeFi ethics", "AI in crypto", "Decentralization’s societal impact"]
     topic = random.choice(topics)
-    prompt = f"""
-    Hey, I’m @cryptoshroomog—a crypto geek and PhD student. Write an essay on {topic}:
-    - Kick off with a shroomy metaphor—like mycelium spreading.
-    - Dig into what it means for society, with a playful, nerdy spin.
-    - Sprinkle in slang like ‘apes’ or ‘moon’.
-    - Wrap it with a big question to get folks talking.
-    - Max 4000 chars, keep it real and chatty.
-    """
-    response = grok_client.chat.completions.create(
+    prompt = prompts.render("essay", topic=topic, max_chars=4000)
+    response = get_grok_client().chat.completions.create(
         model="grok-beta",
         messages=[{"role": "user", "content": prompt}],
         max_tokens=1000
@@ -86,16 +102,17 @@ def main():
     """80% reply, 20% essay, using Twitter API only for posting."""
     if random.random() < 0.2:  # 20% essay
         essay = generate_essay_via_grok()
-        api.update_status(status=essay)
+        get_twitter_api().update_status(status=essay)
         print("Posted essay:", essay[:100] + "..." if len(essay) > 100 else essay)
     else:  # 80% reply
         tweet = fetch_latest_tweet_via_grok()
         if tweet:
             reply = generate_reply_via_grok(tweet["text"])
-            api.update_status(status=reply, in_reply_to_status_id=tweet["id"])
+            get_twitter_api().update_status(status=reply, in_reply_to_status_id=tweet["id"])
             print(f"Replied to tweet ID {tweet['id']}:", reply)
         else:
             print("Couldn’t fetch a tweet—something’s off with Grok’s response.")
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")  # Shows each prompt's token count
     main()
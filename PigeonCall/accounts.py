@@ -0,0 +1,140 @@
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import logging_setup
+
+# ============================ #
+# 👥 MULTIPLE ACCOUNTS         #
+# ============================ #
+
+# Every `[Twitter:<name>]` section in config.ini is one account (persona). All
+# accounts run from one process: they share the AI / Nitter connection pools,
+# while each keeps its own rate ledger (state/rate_ledger_<name>.json) and log
+# file (logs/bot_log_<name>.jsonl). Without such sections the plain [Twitter]
+# section is the single "default" account.
+
+ACCOUNT_PREFIX = "Twitter:"
+DEFAULT_WORKERS = 4  # Accounts running a cycle at the same time
+CREDENTIAL_KEYS = ("API_KEY", "API_KEY_SECRET", "ACCESS_TOKEN", "ACCESS_TOKEN_SECRET")
+VOICE_KEYS = ("PERSONA", "TONE")
+
+_NAME_RE = re.compile(r"^[A-Za-z0-9_.-]+$")  # Names end up in file names
+
+
+def _from_section(config, section: str, name: str):
+    missing = [key for key in CREDENTIAL_KEYS if not config.get(section, key, fallback="").strip()]
+    if missing:
+        logging.error(f"❌ [{section}] is missing {', '.join(missing)}; skipping account.")
+        return None
+    account = {key.lower(): config.get(section, key).strip() for key in CREDENTIAL_KEYS}
+    account["name"] = name
+    # Optional voice for this persona; unset falls back to [Prompts]
+    for key in VOICE_KEYS:
+        account[key.lower()] = config.get(section, key, fallback="").strip() or None
+    return account
+
+
+def default_account(config) -> dict:
+    """The account from the plain [Twitter] section."""
+    return _from_section(config, "Twitter", "default")
+
+
+def credentials(account: dict) -> tuple:
+    """(api_key, api_key_secret, access_token, access_token_secret) as `post_tweet` expects them."""
+    return tuple(account[key.lower()] for key in CREDENTIAL_KEYS)
+
+
+def load_accounts(config, names: list = None) -> list:
+    """Returns the enabled `[Twitter:<name>]` accounts, or the default account if there are none.
+
+    `names` restricts the result to those accounts.
+    """
+    accounts = []
+    for section in config.sections():
+        if not section.startswith(ACCOUNT_PREFIX):
+            continue
+        name = section[len(ACCOUNT_PREFIX):].strip()
+        if not _NAME_RE.match(name) or name == "default":
+            logging.error(f"❌ Invalid account name in [{section}] (letters, digits, _ . - only; not 'default').")
+            continue
+        if not config.getboolean(section, "ENABLED", fallback=True):
+            continue
+        account = _from_section(config, section, name)
+        if account:
+            accounts.append(account)
+
+    if not accounts:
+        account = default_account(config)
+        accounts = [account] if account else []
+
+    if names:
+        unknown = set(names) - {account["name"] for account in accounts}
+        if unknown:
+            logging.error(f"❌ Unknown account(s): {', '.join(sorted(unknown))}")
+        accounts = [account for account in accounts if account["name"] in names]
+    return accounts
+
+
+# ============================ #
+# 🏃 CONCURRENT RUNNER         #
+# ============================ #
+
+def run_as(account: dict, job):
+    """Runs `job(account)` with this thread's log records tagged with the account."""
+    logging_setup.set_account(account["name"])
+    try:
+        return job(account)
+    finally:
+        logging_setup.set_account(None)
+
+
+def run_all(accounts: list, job, workers: int = DEFAULT_WORKERS) -> dict:
+    """Runs `job(account)` for every account on a bounded thread pool.
+
+    A slow account only occupies its own worker, and a crash in one account is
+    logged without affecting the others.
+
+    Returns:
+        dict: account name -> job result (None if it crashed).
+    """
+    results = {}
+    if not accounts:
+        return results
+    with ThreadPoolExecutor(max_workers=max(min(workers, len(accounts)), 1), thread_name_prefix="account") as executor:
+        futures = {executor.submit(run_as, account, job): account["name"] for account in accounts}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception:
+                logging.exception(f"❌ Account {name} crashed.")
+                results[name] = None
+    return results
+
+
+def run_scheduled(accounts: list, cycle, schedule, workers: int, stop_event: threading.Event) -> None:
+    """Daemon mode: every account gets its own schedule, at most `workers` cycles run at once.
+
+    `schedule(cycle)` is called in one thread per account with a zero-argument
+    cycle function and must return once `stop_event` is set.
+    """
+    slots = threading.BoundedSemaphore(max(workers, 1))
+
+    def account_loop(account):
+        def gated_cycle():
+            with slots:
+                if not stop_event.is_set():
+                    cycle(account)
+        run_as(account, lambda _: schedule(gated_cycle))
+
+    threads = [
+        threading.Thread(target=account_loop, args=(account,), name=f"account-{account['name']}", daemon=True)
+        for account in accounts
+    ]
+    for thread in threads:
+        thread.start()
+    # Join with a timeout so signal handlers keep running in the main thread
+    while any(thread.is_alive() for thread in threads):
+        for thread in threads:
+            thread.join(timeout=1)
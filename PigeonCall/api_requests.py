@@ -0,0 +1,478 @@
+# ============================ #
+# 🤖 AI API REQUESTS           #
+# ============================ #
+
+import json
+import random
+import logging
+import sys
+import time
+import re
+import html
+from concurrent.futures import ThreadPoolExecutor
+import config
+import gemini_api
+from utils import extract_tweet_and_id, extract_tweet, extract_tweets, has_tweet
+import http_client
+import llm_router
+import metrics
+import prompts
+import response_cache
+import seen_index
+from fetcher import fetch_nitter_results
+
+# ============================ #
+# 🤖 Grok API REQUESTS         #
+# ============================ #
+
+GROK_URL = "https://api.x.ai/v1/chat/completions"
+GROK_MODEL = "grok-2-latest"
+GROK_TIMEOUT = None     # Seconds per request (None = [HTTP] TIMEOUT)
+GROK_TEMPERATURE = 0.7
+GROK_CACHE_TTL = 3600   # Topic discovery answers are reused for this long (0 disables)
+TOPICS_PER_REQUEST = 5  # Topics asked per discovery call; cached runs rotate through them
+TOPIC_SOURCE = "grok"   # "grok", or "gemini" for Google Search grounded discovery (Grok as fallback)
+
+_gemini_api_key = None
+
+def configure_topics(source: str = None, gemini_api_key: str = None) -> None:
+    """Chooses where topic discovery asks for topics; "gemini" needs `gemini_api_key`."""
+    global TOPIC_SOURCE, _gemini_api_key
+    if source is not None:
+        if source not in ("grok", "gemini"):
+            raise ValueError(f"Unknown topic source: {source}")
+        TOPIC_SOURCE = source
+    if gemini_api_key is not None:
+        _gemini_api_key = gemini_api_key or None
+
+def grok_cache_key(prompt: str) -> str:
+    return response_cache.cache_key("grok", GROK_MODEL, prompt, GROK_TEMPERATURE)
+
+@metrics.traced("grok_request", outcome=lambda content: "ok" if content else "empty")
+def grok_request(grok_api_key: str, prompt: str, timeout: int = None, cache_ttl: float = None, force_refresh: bool = False) -> str:
+    """Calls GrokAI for finding tweets to reply to or trending topics.
+
+    With `cache_ttl`, a response for the same model, prompt and temperature is
+    served from the persistent response cache while younger than `cache_ttl` seconds.
+    """
+    import requests
+
+    timeout = (GROK_TIMEOUT or http_client.default_timeout()) if timeout is None else timeout
+    key = grok_cache_key(prompt)
+    if cache_ttl and not force_refresh:
+        cached = response_cache.get(key, cache_ttl)
+        if cached is not None:
+            logging.info("♻️ Using cached GrokAI response.")
+            metrics.annotate(outcome="cached")
+            return cached
+
+    url = GROK_URL
+    headers = {"Authorization": f"Bearer {grok_api_key}", "Content-Type": "application/json"}
+    payload = {
+        "model": GROK_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": GROK_TEMPERATURE
+    }
+    try:
+        response = http_client.post(url, json=payload, headers=headers, timeout=timeout)
+        response.raise_for_status()
+        response_json = response.json()
+        content = response_json.get("choices", [{}])[0].get("message", {}).get("content", "")
+        if cache_ttl and content:
+            response_cache.put(key, content)
+        return content
+    except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
+        logging.error("GrokAI request error: %s", e)
+        return ""
+
+def _gemini_topics() -> bool:
+    return TOPIC_SOURCE == "gemini" and bool(_gemini_api_key)
+
+def topic_cache_key(prompt: str) -> str:
+    """Response cache key of the topic discovery answer for `prompt`."""
+    return gemini_api.gemini_cache_key(prompt, gemini_api.GEMINI_GROUNDED) if _gemini_topics() else grok_cache_key(prompt)
+
+def topic_request(grok_api_key: str, prompt: str, force_refresh: bool = False) -> str:
+    """Topic discovery answer for `prompt` from TOPIC_SOURCE, cached either way.
+
+    Gemini answers are cached for [Gemini] CACHE_TTL; if Gemini has no answer, Grok is asked.
+    """
+    if _gemini_topics():
+        content = gemini_api.gemini_request(_gemini_api_key, prompt, force_refresh=force_refresh)
+        if content:
+            return content
+        logging.warning("⚠️ Gemini found no topics; asking GrokAI instead.")
+    return grok_request(grok_api_key, prompt, cache_ttl=GROK_CACHE_TTL, force_refresh=force_refresh)
+
+def split_topics(response: str) -> list:
+    """Splits a multi-topic Grok answer into one block per `Topic:` line."""
+    blocks = re.split(r"(?im)^\s*(?:\d+[.)]\s*)?(?=\**Topic:)", response)
+    blocks = [block.strip().replace("**", "") for block in blocks if block.strip().lstrip("*").startswith("Topic:")]
+    return blocks or ([response.strip()] if response.strip() else [])
+
+def draw_cached_topic(prompt: str, response: str) -> str:
+    """Picks the next topic block, rotating with every cache hit on this answer.
+
+    Topics covered within `seen_index.TOPIC_COOLDOWN` are skipped while others remain.
+    """
+    topics = split_topics(response)
+    if not topics:
+        return ""
+    offset = response_cache.hits(topic_cache_key(prompt))
+    rotated = [topics[(offset + i) % len(topics)] for i in range(len(topics))]
+    for topic in rotated:
+        if not seen_index.topic_recently_used(topic):
+            return topic
+    logging.info("👀 Every cached topic was covered recently; reusing one.")
+    return rotated[0]
+
+def reply_topics_prompt(count: int) -> str:
+    """Prompt asking Grok for `count` debated topics as Topic:/Context: blocks."""
+    return prompts.render("reply_topics", count=count)
+
+def resolve_topic(trending_topic: str, max_age: float = None) -> tuple:
+    """Looks up a Nitter tweet for a Topic:/Context: block, falling back to the topic itself.
+
+    Only tweets posted within `max_age` seconds are replied to, if given.
+
+    Returns the same 6-tuple as `find_tweet_or_topic`.
+    """
+    # ✅ Extract clean topic title
+    logging.info("🔍 Extracting topic...")
+    lines = trending_topic.split("\n")
+    clean_topic = lines[0].replace("Topic:", "").strip()
+
+    logging.info(f"🔍 Cleaned trending topic for Nitter: {clean_topic}")
+
+    # ✅ Search for relevant tweets on Nitter
+    logging.info("🔍 Attempting to search Nitter for relevant tweets...")
+    tweet_text, tweet_id, username, posted_at = fetch_nitter_results(clean_topic, context=trending_topic, max_age=max_age)
+    if tweet_text and tweet_id and username:
+        logging.info(f"✅ Using Nitter tweet: {tweet_text} is_reply={bool(tweet_id)}  (Tweet ID: {tweet_id}, Username: {username})")
+        return tweet_text, tweet_id, username, trending_topic, True, posted_at  # Reply case
+
+    # ✅ Fallback: Post about the topic directly
+    logging.warning("⚠️ Nitter search failed, falling back to original topic.")
+    return trending_topic, None, None, trending_topic, False, None
+
+# ============================ #
+# 🔍 FIND TWEET OR TOPIC       #
+# ============================ #
+
+@metrics.traced("find_tweet_or_topic", outcome=lambda target: "reply" if target[4] else ("topic" if target[0] else "empty"))
+def find_tweet_or_topic(grok_api_key: str, force_refresh: bool = False, max_age: float = None) -> tuple:
+    """Finds a tweet to reply to or a trending topic.
+
+    Grok is asked for several topics at once and the answer is cached for
+    GROK_CACHE_TTL seconds, so consecutive runs draw different topics from it.
+    With `max_age`, only tweets posted within that many seconds are replied to.
+
+    Returns:
+        - tweet_text (str): The tweet to reply to OR the trending topic.
+        - tweet_id (str | None): The ID of the tweet if it's a reply, else None.
+        - username (str | None): The Twitter handle of the user if it's a reply, else None.
+        - context (str | None): Additional context for the tweet, if provided by AI.
+        - is_reply (bool): Whether this is a reply.
+        - posted_at (float | None): When the tweet replied to was posted (epoch), if known.
+    """
+    if random.random() < 0.8:  # 80% chance of finding a reply-worthy tweet
+        prompt = reply_topics_prompt(TOPICS_PER_REQUEST)
+        response = topic_request(grok_api_key, prompt, force_refresh=force_refresh)
+        trending_topic = draw_cached_topic(prompt, response)
+
+        if not trending_topic:
+            logging.error("❌ GrokAI failed to find a topic.")
+            return None, None, None, None, False, None
+
+        logging.info(f"🔍 Found trending topic: {trending_topic}")
+        return resolve_topic(trending_topic, max_age)
+
+    # 🌍 If no reply-worthy tweets, generate an **original** tweet
+    prompt = prompts.render("original_topics", count=TOPICS_PER_REQUEST)
+    topic_response = draw_cached_topic(prompt, topic_request(grok_api_key, prompt, force_refresh=force_refresh))
+
+    # ✅ Extract **topic and context** for TogetherAI
+    topic_parts = topic_response.split("\n", 1)
+    topic_text = topic_parts[0].replace("Topic:", "").strip()
+    context = topic_parts[1].strip() if len(topic_parts) > 1 else None
+
+    return topic_text, None, None, context, False, None  # New topic case
+
+
+def find_tweet_targets(grok_api_key: str, count: int, force_refresh: bool = False, max_age: float = None) -> list:
+    """Batch version of `find_tweet_or_topic`: one Grok call for `count` topics.
+
+    Nitter lookups for all topics run concurrently.
+
+    Returns:
+        list[tuple]: Up to `count` targets, each shaped like `find_tweet_or_topic`'s result.
+    """
+    prompt = reply_topics_prompt(count)
+    response = topic_request(grok_api_key, prompt, force_refresh=force_refresh)
+    topics = split_topics(response)
+    topics = ([topic for topic in topics if not seen_index.topic_recently_used(topic)] or topics)[:count]
+    if not topics:
+        logging.error("❌ GrokAI failed to find topics.")
+        return []
+
+    logging.info(f"🔍 Found {len(topics)} trending topics for batch run.")
+    with ThreadPoolExecutor(max_workers=len(topics), thread_name_prefix="topic") as executor:
+        targets = list(executor.map(lambda topic: resolve_topic(topic, max_age), topics))
+    # Two related topics can surface the same tweet; replying to it twice would look like a bot farm
+    replied, unique = set(), []
+    for target in targets:
+        if target[1] and str(target[1]) in replied:
+            logging.info(f"🔁 Dropping second target for tweet {target[1]}.")
+            continue
+        if target[1]:
+            replied.add(str(target[1]))
+        unique.append(target)
+    return unique
+
+
+# ============================ #
+# ✨ AI Tweet Generation       #
+# ============================ #
+
+TOGETHER_URL = "https://api.together.xyz/v1/chat/completions"
+TOGETHER_MODEL = "deepseek-ai/DeepSeek-R1-Distill-Llama-70B-free"
+TOGETHER_TIMEOUT = None  # Seconds per single-tweet request, a batch gets 4x (None = [HTTP] TIMEOUT)
+TOGETHER_STREAM = False  # Stream tokens and hang up as soon as the tweet is complete
+# Models that think out loud before answering; R1 distills often leave out the opening <think>
+REASONING_MODEL_HINTS = ("deepseek-r1", "-r1-", "qwq", "reasoning", "thinking")
+
+
+def is_reasoning_model(model: str) -> bool:
+    model = (model or "").lower()
+    return any(hint in model for hint in REASONING_MODEL_HINTS)
+
+
+def stream_chat_completion(url: str, payload: dict, headers: dict, timeout: int,
+                           start_marker: str = "{{TWEET_START}}", end_marker: str = "{{TWEET_END}}",
+                           reasoning: bool = False) -> tuple:
+    """Reads an OpenAI-style SSE completion stream, closing it once `end_marker` follows `start_marker`.
+
+    Markers inside a <think> block are ignored until the block closes, so reasoning
+    drafts do not end the stream early. With `reasoning` the stream is never closed
+    before a </think> has arrived, since those models may skip the opening tag.
+
+    Returns:
+        - text (str): Content received so far.
+        - timings (dict): `first_token` and `tweet` (seconds, None if not reached),
+          `total` seconds and whether the stream was `stopped_early`.
+    """
+    started = time.perf_counter()
+    timings = {"first_token": None, "tweet": None, "total": None, "stopped_early": False}
+    text = ""
+    start_idx = -1
+
+    with http_client.post(url, json=dict(payload, stream=True), headers=headers, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        # chunk_size=None hands over each network chunk as it arrives instead of buffering 512 bytes
+        for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            try:
+                chunk = json.loads(data)
+            except json.JSONDecodeError:
+                continue
+            delta = (chunk.get("choices") or [{}])[0].get("delta", {}).get("content") or ""
+            if not delta:
+                continue
+            if timings["first_token"] is None:
+                timings["first_token"] = time.perf_counter() - started
+            scanned = len(text)
+            text += delta
+
+            if "</think>" not in text and (reasoning or "<think>" in text):
+                continue
+            if start_idx == -1:
+                answer_start = text.rfind("</think>") + len("</think>") if "</think>" in text else 0
+                start_idx = text.find(start_marker, max(answer_start, scanned - len(start_marker)))
+                if start_idx == -1:
+                    continue
+                scanned = start_idx + len(start_marker)
+            if text.find(end_marker, max(start_idx + len(start_marker), scanned - len(end_marker))) != -1:
+                timings["tweet"] = time.perf_counter() - started
+                timings["stopped_early"] = True
+                break  # Leaving the `with` block drops the connection mid-stream
+        metrics.annotate(bytes=response.raw.tell())
+
+    timings["total"] = time.perf_counter() - started
+    return text, timings
+
+
+# ============================ #
+# 🔀 GENERATION PROVIDERS      #
+# ============================ #
+
+def chat_complete(url: str, model: str, api_key: str, prompt: str, timeout: float, max_tokens: int = 1224,
+                  stream: bool = False, label: str = "LLM") -> str:
+    """Raw answer of an OpenAI-style chat completion endpoint. Raises on request errors."""
+    payload = {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0.7,
+        "max_tokens": max_tokens,
+        'stream': False,
+    }
+    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+    if logging.getLogger().isEnabledFor(logging.DEBUG):  # Don't serialize the payload unless it is logged
+        logging.debug(f"🔍 {label} request payload", extra={"payload": json.dumps(payload)})
+    if stream:
+        raw, timings = stream_chat_completion(url, payload, headers, timeout, reasoning=is_reasoning_model(model))
+        logging.info(
+            "⏱ %s stream: first token %s, tweet %s, total %.2fs%s", label,
+            f"{timings['first_token']:.2f}s" if timings["first_token"] is not None else "n/a",
+            f"{timings['tweet']:.2f}s" if timings["tweet"] is not None else "n/a",
+            timings["total"], " (stopped early)" if timings["stopped_early"] else "",
+        )
+    else:
+        response = http_client.post(url, json=payload, headers=headers, timeout=timeout, verify=True)
+        response.raise_for_status()
+        raw = response.json().get("choices", [{}])[0].get("message", {}).get("content", "")
+    logging.debug(f"🔍 RAW {label} response", extra={"raw_response": raw})
+    return raw
+
+
+def together_complete(together_api_key: str, prompt: str, timeout: float, max_tokens: int = 1224, stream: bool = False) -> str:
+    """TogetherAI provider for `llm_router`."""
+    return chat_complete(TOGETHER_URL, TOGETHER_MODEL, together_api_key, prompt, timeout, max_tokens, stream, "TogetherAI")
+
+
+def grok_complete(grok_api_key: str, prompt: str, timeout: float, max_tokens: int = 1224, stream: bool = False) -> str:
+    """GrokAI provider for `llm_router` (uncached, unlike topic discovery in `grok_request`)."""
+    return chat_complete(GROK_URL, GROK_MODEL, grok_api_key, prompt, timeout, max_tokens, stream, "GrokAI")
+
+
+def _complete(together_api_key: str, prompt: str, timeout: float, max_tokens: int, stream: bool, accept) -> str:
+    """Routes `prompt` through `llm_router`, or straight to TogetherAI if no provider is registered."""
+    import requests
+
+    if llm_router.providers():
+        return llm_router.generate(prompt, timeout, max_tokens, stream, accept)
+    try:
+        return together_complete(together_api_key, prompt, timeout, max_tokens, stream)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logging.error(f"TogetherAI request error: {e}")
+        return ""
+
+
+def _voice(persona: str = None, tone: str = None) -> dict:
+    """Template variables for a per-account voice; unset ones fall back to the configured default."""
+    voice = {}
+    if persona:
+        voice["persona"] = persona
+    if tone:
+        voice["tone"] = tone
+    return voice
+
+
+@metrics.traced("together_ai_generate", outcome=lambda tweet: "ok" if tweet else "empty")
+def together_ai_generate(together_api_key: str, context: str, is_reply: bool, tweet_context: str, username: str = None, timeout: int = None, stream: bool = None,
+                         persona: str = None, tone: str = None) -> str:
+    """Generates tweet text while ensuring it actually engages with the tweet if it's a reply.
+
+    The prompt goes through `llm_router` when providers are registered (TogetherAI
+    alone otherwise). With `stream` (default: TOGETHER_STREAM) tokens are parsed as they arrive and the
+    request is closed as soon as the tweet markers are complete. `persona` / `tone`
+    override the configured voice (see `prompts`).
+    """
+    stream = TOGETHER_STREAM if stream is None else stream
+    timeout = (TOGETHER_TIMEOUT or http_client.default_timeout()) if timeout is None else timeout
+    
+    allow_long_tweet = random.randint(1, 4) == 3  # Every 3rd or 4th tweet can be longer
+    tweet_length = 500 if allow_long_tweet else 280
+
+    context = re.sub(r'[^\x00-\x7F]+', ' ', context)
+    if not context or context.strip() == "":
+        logging.critical("🚨 Empty context detected! Skipping generation to prevent API waste.")
+        return ""
+
+    if is_reply:
+        if not username:
+            logging.error("❌ Missing username for reply. Aborting tweet generation.")
+        else:
+            if username.startswith("@"):
+                username = username[1:]  # Remove leading '@' if present
+            logging.info(f"✅ TogetherAIAPIRequestsUsing username: @{username}")
+
+        context = html.unescape(context)  # Convert entities like `it&#39;s` back to `it’s`
+        context = context.replace("'", "’")  # Ensure apostrophes are correctly formatted
+
+        prompt = prompts.render(
+            "reply", tweet=context, username=username or "unknown", tweet_length=tweet_length,
+            # Only add context if it's meaningful
+            context_block=f"Context: {tweet_context}\n" if tweet_context and isinstance(tweet_context, str) else "",
+            **_voice(persona, tone),
+        )
+
+    else:
+        prompt = prompts.render("original", topic=context, tweet_length=tweet_length, **_voice(persona, tone))
+
+    raw_tweet = _complete(together_api_key, prompt, timeout, 1224, stream, accept=has_tweet)
+    if not raw_tweet:
+        return ""
+    with metrics.span("together_response"):
+        extracted_tweet = extract_tweet(raw_tweet)
+
+        # ✅ Emergency truncation
+        if len(extracted_tweet) > tweet_length:
+            logging.warning(f"⚠️ Tweet too long ({len(extracted_tweet)} chars). Truncating...")
+            extracted_tweet = extracted_tweet[:tweet_length].rstrip()
+
+    return extracted_tweet
+
+
+@metrics.traced("together_ai_generate_batch", outcome=lambda tweets: "ok" if any(tweets) else "empty")
+def together_ai_generate_batch(together_api_key: str, targets: list, timeout: int = None, persona: str = None, tone: str = None) -> list:
+    """Generates one tweet per target in a single TogetherAI request.
+
+    Args:
+        - together_api_key (str): TogetherAI API key.
+        - targets (list): Tuples shaped like `find_tweet_or_topic`'s result.
+        - timeout (int): Request timeout; a batch takes longer than a single tweet.
+        - persona, tone (str): Override the configured voice.
+
+    Returns:
+        - list[str]: Tweets aligned with `targets`; "" where generation failed.
+    """
+    if not targets:
+        return []
+    timeout = (TOGETHER_TIMEOUT or http_client.default_timeout()) * 4 if timeout is None else timeout
+
+    tweet_lengths = [500 if random.randint(1, 4) == 3 else 280 for _ in targets]  # Every 3rd or 4th tweet can be longer
+    sections = []
+    for index, (target, tweet_length) in enumerate(zip(targets, tweet_lengths), start=1):
+        context, _, username, tweet_context, is_reply, _ = target
+        context = html.unescape(re.sub(r'[^\x00-\x7F]+', ' ', context or "")).replace("'", "’")
+        if is_reply:
+            sections.append(prompts.render(
+                "batch_reply_item", index=index, username=(username or '').lstrip('@'), tweet=context, tweet_length=tweet_length,
+                context_block=f"Context: {tweet_context}\n" if tweet_context and isinstance(tweet_context, str) else "",
+            ))
+        else:
+            sections.append(prompts.render(
+                "batch_original_item", index=index, topic=context, tweet_length=tweet_length,
+            ))
+
+    prompt = prompts.render("batch", count=len(targets), sections="\n\n".join(sections), **_voice(persona, tone))
+    logging.info(f"🔍 Batch generation request for {len(targets)} tweets.")
+    raw_tweets = _complete(
+        together_api_key, prompt, timeout, 1224 + 300 * len(targets), False,
+        accept=lambda raw: has_tweet(raw, len(targets)),
+    )
+    if not raw_tweets:
+        return [""] * len(targets)
+
+    with metrics.span("together_response"):
+        tweets = extract_tweets(raw_tweets, len(targets))
+        for index, tweet_length in enumerate(tweet_lengths):
+            # ✅ Emergency truncation
+            if len(tweets[index]) > tweet_length:
+                logging.warning(f"⚠️ Tweet {index + 1} too long ({len(tweets[index])} chars). Truncating...")
+                tweets[index] = tweets[index][:tweet_length].rstrip()
+    return tweets
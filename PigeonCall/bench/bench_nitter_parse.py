@@ -0,0 +1,102 @@
+"""Micro-benchmark for the Nitter timeline parser backends.
+
+Usage:
+    python bench/bench_nitter_parse.py [saved_page.html ...] [--repeat N] [--limit N]
+
+Saved search pages (e.g. `curl "https://nitter.net/search?f=tweets&q=bitcoin" > bench/pages/bitcoin.html`)
+are picked up from bench/pages/ when no paths are given. Without any saved pages a
+synthetic Nitter-like page is used so the script always runs.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import nitter_parser  # noqa: E402
+
+
+def synthetic_page(items: int = 60, first_id: int = 1800000000000000000, user_prefix: str = "user") -> str:
+    """Roughly mirrors Nitter's search markup: page chrome, then `items` timeline items."""
+    head = "<html><head><title>Search</title>" + "<link rel='stylesheet' href='/css/style.css'>" * 20 + "</head><body>"
+    nav = "<nav><div class='inner-nav'>" + "<a href='/'>nitter</a>" * 50 + "</div></nav>"
+    item = (
+        '<div class="timeline-item " data-username="{user}">'
+        '<a class="tweet-link" href="/{user}/status/{id}#m"></a>'
+        '<div class="tweet-body"><div><div class="tweet-header"><div class="tweet-name-row">'
+        '<div class="fullname-and-username"><a class="fullname" href="/{user}">User {i}</a>'
+        '<a class="username" href="/{user}">@{user}</a></div>'
+        '<span class="tweet-date"><a href="/{user}/status/{id}#m" title="{date}">1h</a></span>'
+        '</div></div></div>'
+        '<div class="tweet-content media-body" dir="auto">Tweet {i} about #bitcoin and the <a href="/search">ETF</a> debate '
+        + "with a fairly long body of text " * 6 + '</div>'
+        '<div class="tweet-stats"><span class="tweet-stat"><div class="icon-container"><span class="icon-comment"></span> 12</div></span>'
+        '<span class="tweet-stat"><div class="icon-container"><span class="icon-retweet"></span> 34</div></span>'
+        '<span class="tweet-stat"><div class="icon-container"><span class="icon-heart"></span> 1,204</div></span></div>'
+        '</div></div>'
+    )
+    # Nitter's tweet-date title, e.g. "Oct 17, 2026 · 1:00 PM UTC"; fresh so pooled candidates stay usable
+    date = time.strftime("%b %d, %Y · %I:%M %p UTC", time.gmtime())
+    timeline = "".join(item.format(i=i, id=first_id + i, user=f"{user_prefix}{i}", date=date) for i in range(items))
+    return head + nav + '<div class="timeline">' + timeline + '</div><script>' + "var x = 1;" * 500 + "</script></body></html>"
+
+
+def load_pages(paths: list) -> dict:
+    paths = paths or sorted(glob.glob(os.path.join(BENCH_DIR, "pages", "*.html")))
+    if not paths:
+        return {"synthetic": synthetic_page()}
+    pages = {}
+    for path in paths:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            pages[os.path.basename(path)] = f.read()
+    return pages
+
+
+def available_backends() -> list:
+    backends = list(nitter_parser.BACKENDS)
+    try:
+        import lxml.html  # noqa: F401
+    except ImportError:
+        print("skipping lxml: not installed")
+        backends.remove("lxml")
+    return backends
+
+
+def bench(page: str, backend: str, limit: int, repeat: int) -> tuple:
+    """Returns (median seconds per parse, peak traced bytes, items found)."""
+    items = nitter_parser.parse_timeline(page, limit, backend)  # Warm-up (imports, regex compile)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        nitter_parser.parse_timeline(page, limit, backend)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+
+    tracemalloc.start()
+    nitter_parser.parse_timeline(page, limit, backend)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return timings[len(timings) // 2], peak, len(items)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pages", nargs="*", help="Saved Nitter search pages")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=4)
+    args = parser.parse_args()
+
+    backends = available_backends()
+    print(f"{'page':<24} {'backend':<10} {'median ms':>10} {'peak KiB':>10} {'items':>6}")
+    for name, page in load_pages(args.pages).items():
+        for backend in backends:
+            seconds, peak, found = bench(page, backend, args.limit, args.repeat)
+            print(f"{name[:24]:<24} {backend:<10} {seconds * 1000:>10.2f} {peak / 1024:>10.1f} {found:>6}")
+
+
+if __name__ == "__main__":
+    main()
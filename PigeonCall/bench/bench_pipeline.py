@@ -0,0 +1,438 @@
+"""Offline end-to-end benchmark for the bot pipeline.
+
+Usage:
+    python bench/bench_pipeline.py [--runs N] [--latency S] [--error-rate P] [--rate-limit-rate P]
+                                   [--payload-bytes N] [--stub SERVICE.KEY=VALUE ...]
+                                   [--nitter-instances N] [--stream] [--seed N] [--metrics] [--log-level LEVEL]
+                                   [--tolerance 0.25] [--update-baseline]
+
+Starts local stand-ins for every external service:
+- grok / together: OpenAI-style POST /v1/chat/completions (JSON or SSE when `stream` is set)
+- nitter:          GET /search returning a Nitter-like timeline with fresh tweet IDs
+- twitter:         Twitter v2 POST /2/tweets and GET /2/users/me
+
+writes a config that points botty at them ([Endpoints], [Nitter] INSTANCES) and runs
+the real `botty.main` N times against throwaway state/log directories. Each stub
+sleeps `latency` seconds per request, answers 500 with probability `error_rate`,
+429 with probability `rate_limit_rate` and pads its answer with `payload_bytes`.
+`--stub nitter.latency=0.4` overrides one setting for one service.
+
+Reports p50/p95/p99 per stage (grok, nitter, together, post, run) and runs per
+second. Like bench_startup.py, results are compared against a machine-specific
+baseline (bench/pipeline_baseline.json, not committed) recorded with the same
+stub settings; a run p95 or throughput more than `--tolerance` worse fails.
+"""
+import argparse
+import configparser
+import gzip
+import itertools
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from bench_nitter_parse import synthetic_page  # noqa: E402
+
+BASELINE_FILE = os.path.join(BENCH_DIR, "pipeline_baseline.json")
+SERVICES = ("grok", "together", "nitter", "twitter")
+STAGES = ("grok", "nitter", "together", "post", "run")
+_WORDS = (
+    "bitcoin etf regulators wallets miners fees layer two rollups privacy voters senate lobby "
+    "exchange custody audits hacks bridges stablecoins yields treasury inflation memes devs "
+    "forks governance tokens airdrops validators staking slashing oracles liquidity whales"
+).split()
+
+
+# ============================ #
+# 🧪 STUB SERVERS              #
+# ============================ #
+
+class _StubHandler(BaseHTTPRequestHandler):
+    """Dispatches to `server.routes[(method, path)]` after injecting latency and faults."""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real APIs
+
+    def log_message(self, format, *args):
+        pass
+
+    def _handle(self, method: str):
+        path = self.path.split("?", 1)[0]
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        route = self.server.routes.get((method, path))
+        if route is None:
+            return self._send(404, {"error": "not found"})
+
+        profile = self.server.profile
+        time.sleep(profile["latency"])
+        roll = random.random()
+        if roll < profile["rate_limit_rate"]:
+            reset = str(int(time.time()) + 900)
+            return self._send(429, {"title": "Too Many Requests"},
+                              {"x-rate-limit-remaining": "0", "x-rate-limit-reset": reset})
+        if roll < profile["rate_limit_rate"] + profile["error_rate"]:
+            return self._send(500, {"error": "injected failure"})
+        route(self, body)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def _send(self, status: int, payload, headers: dict = None, content_type: str = "application/json"):
+        data = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except ConnectionError:  # The client stopped reading early (capped Nitter downloads)
+            self.close_connection = True
+
+    def _stream(self, pieces: list):
+        """Sends SSE `data:` events with chunked encoding; stops quietly if the client hangs up."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for piece in pieces + ["[DONE]"]:
+                event = piece if piece == "[DONE]" else json.dumps({"choices": [{"delta": {"content": piece}}]})
+                data = f"data: {event}\n\n".encode("utf-8")
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Raced Nitter requests and early-stopped streams hang up on purpose
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+
+class StubServer:
+    """One stand-in service on 127.0.0.1 with its own fault profile."""
+
+    def __init__(self, name: str, routes: dict, profile: dict):
+        self.name = name
+        self.httpd = _QuietServer(("127.0.0.1", 0), _StubHandler)
+        self.httpd.routes = routes
+        self.httpd.profile = profile
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name=f"stub-{name}", daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def start(self) -> "StubServer":
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def _chat_completions(service: str, profile: dict):
+    counter = itertools.count(1)
+
+    def route(handler: _StubHandler, body: bytes):
+        request = json.loads(body or b"{}")
+        n = next(counter)
+        padding = "x" * profile["payload_bytes"]
+        if service == "grok":
+            content = "\n".join(
+                f"Topic: Bench topic {n}-{i}\nContext: {' '.join(random.sample(_WORDS, 8))} {padding}"
+                for i in range(5)
+            )
+        else:
+            prompt = (request.get("messages") or [{}])[-1].get("content", "")
+            batch = re.search(r"Write (\d+) separate tweets", prompt)
+            if batch:  # Batch prompt: indexed markers
+                content = f"<think>{padding}</think>\n" + "\n".join(
+                    f"{{{{TWEET_START {i}}}}} Take {n}.{i}: {' '.join(random.sample(_WORDS, 14))} {{{{TWEET_END {i}}}}}"
+                    for i in range(1, int(batch.group(1)) + 1)
+                )
+            else:
+                tweet = f"Take {n}: " + " ".join(random.sample(_WORDS, 14))
+                content = f"<think>{padding}</think>\n{{{{TWEET_START}}}} {tweet} {{{{TWEET_END}}}}"
+        if request.get("stream"):
+            handler._stream([content[i:i + 24] for i in range(0, len(content), 24)])
+        else:
+            handler._send(200, {"choices": [{"message": {"role": "assistant", "content": content}}]})
+
+    return {("POST", "/v1/chat/completions"): route}
+
+
+def _nitter(profile: dict):
+    counter = itertools.count(1)
+
+    def route(handler: _StubHandler, body: bytes):
+        n = next(counter)
+        # Fresh IDs and usernames every time so the seen index never filters them out
+        page = synthetic_page(items=20, first_id=1900000000000000000 + n * 1000, user_prefix=f"bench{n}_")
+        page = page.replace("</body>", f"<!-- {'x' * profile['payload_bytes']} --></body>").encode("utf-8")
+        headers = {}
+        if "gzip" in handler.headers.get("Accept-Encoding", ""):  # Like a real mirror behind nginx
+            page, headers = gzip.compress(page, compresslevel=5), {"Content-Encoding": "gzip"}
+        handler._send(200, page, headers, content_type="text/html; charset=utf-8")
+
+    return {("GET", "/search"): route}
+
+
+def _twitter(profile: dict):
+    counter = itertools.count(1)
+    limit_headers = {"x-rate-limit-limit": "100000", "x-rate-limit-remaining": "99999",
+                     "x-rate-limit-reset": str(int(time.time()) + 86400)}
+
+    def create_tweet(handler: _StubHandler, body: bytes):
+        request = json.loads(body or b"{}")
+        data = {"id": str(2000000000000000000 + next(counter)), "text": request.get("text", ""),
+                "padding": "x" * profile["payload_bytes"]}
+        handler._send(201, {"data": data}, limit_headers)
+
+    def users_me(handler: _StubHandler, body: bytes):
+        handler._send(200, {"data": {"id": "1", "name": "Bench", "username": "bench"}}, limit_headers)
+
+    return {("POST", "/2/tweets"): create_tweet, ("GET", "/2/users/me"): users_me}
+
+
+def start_stubs(profiles: dict, nitter_instances: int) -> dict:
+    servers = {
+        "grok": StubServer("grok", _chat_completions("grok", profiles["grok"]), profiles["grok"]).start(),
+        "together": StubServer("together", _chat_completions("together", profiles["together"]), profiles["together"]).start(),
+        "twitter": StubServer("twitter", _twitter(profiles["twitter"]), profiles["twitter"]).start(),
+    }
+    for i in range(nitter_instances):
+        servers[f"nitter{i}"] = StubServer(f"nitter{i}", _nitter(profiles["nitter"]), profiles["nitter"]).start()
+    return servers
+
+
+# ============================ #
+# ⏱ STAGE TIMING               #
+# ============================ #
+
+class StageTimer:
+    """Wraps pipeline functions in place and records (seconds, ok) per call."""
+
+    def __init__(self):
+        self.samples = {stage: [] for stage in STAGES}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self.samples[stage].append((seconds, ok))
+
+    def wrap(self, module, name: str, stage: str, ok=bool) -> None:
+        func = getattr(module, name)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            result = None
+            try:
+                result = func(*args, **kwargs)
+                return result
+            finally:
+                self.record(stage, time.perf_counter() - start, ok(result))
+
+        setattr(module, name, timed)
+
+
+def percentile(values: list, q: float) -> float:
+    """Linear-interpolated percentile (q in 0..100) of a non-empty list."""
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low, high = int(rank), min(int(rank) + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(timer: StageTimer, elapsed: float, runs: int) -> dict:
+    summary = {"runs": runs, "runs_per_second": runs / elapsed if elapsed else 0.0, "stages": {}}
+    for stage, samples in timer.samples.items():
+        if not samples:
+            continue
+        seconds = [sample[0] for sample in samples]
+        summary["stages"][stage] = {
+            "count": len(samples),
+            "errors": sum(1 for sample in samples if not sample[1]),
+            "p50": percentile(seconds, 50),
+            "p95": percentile(seconds, 95),
+            "p99": percentile(seconds, 99),
+        }
+    return summary
+
+
+# ============================ #
+# 🚀 PIPELINE RUNS             #
+# ============================ #
+
+def write_config(path: str, servers: dict, work_dir: str, stream: bool, log_level: str, metrics: bool) -> None:
+    config = configparser.ConfigParser(interpolation=None)
+    config.optionxform = str  # Keep the upper-case keys config.ini uses
+    config["Twitter"] = {key: "bench" for key in ("API_KEY", "API_KEY_SECRET", "ACCESS_TOKEN", "ACCESS_TOKEN_SECRET", "BEARER_TOKEN")}
+    config["GrokAI"] = {"API_KEY": "bench"}
+    config["TogetherAI"] = {"API_KEY": "bench", "STREAM": str(stream).lower()}
+    config["Endpoints"] = {
+        "GROK_URL": f"{servers['grok'].url}/v1/chat/completions",
+        "TOGETHER_URL": f"{servers['together'].url}/v1/chat/completions",
+        "TWITTER_API_BASE": servers["twitter"].url,
+    }
+    config["Nitter"] = {
+        "INSTANCES": ",".join(server.url for name, server in servers.items() if name.startswith("nitter")),
+        "MODE": "concurrent",
+        "DEADLINE": "10",
+    }
+    config["Cache"] = {"GROK_TTL": "0"}  # Every run asks the Grok stub
+    config["RateLimit"] = {"PER_15MIN": "1000000", "DAILY": "1000000", "MONTHLY": "1000000"}
+    config["Metrics"] = {"ENABLED": str(metrics).lower(), "PATH": os.path.join(work_dir, "metrics.prom")}
+    config["Logging"] = {"LEVEL": log_level, "DIR": os.path.join(work_dir, "logs"), "COMPRESS": "false"}
+    with open(path, "w", encoding="utf-8") as f:
+        config.write(f)
+
+
+def run_pipeline(runs: int, config_path: str, state_dir: str, timer: StageTimer) -> float:
+    import utils
+    utils.STATE_DIR = state_dir  # Keep the real state/ (ledger, caches, seen index) untouched
+
+    import api_requests
+    import botty
+    import rate_ledger
+
+    timer.wrap(api_requests, "grok_request", "grok")
+    timer.wrap(api_requests, "fetch_nitter_results", "nitter", ok=lambda result: bool(result and result[0]))
+    timer.wrap(botty, "together_ai_generate", "together")
+    timer.wrap(botty, "send_tweet", "post", ok=lambda result: result == "sent")
+
+    started = time.perf_counter()
+    for _ in range(runs):
+        # A 429 blocks the ledger for 15 minutes; start every run with a clean one
+        ledger_path = os.path.join(state_dir, rate_ledger.LEDGER_FILE.format(suffix=""))
+        if os.path.exists(ledger_path):
+            os.remove(ledger_path)
+        run_start = time.perf_counter()
+        posts_before = len(timer.samples["post"])
+        botty.main(config_path=config_path)
+        posted = any(ok for _, ok in timer.samples["post"][posts_before:])
+        timer.record("run", time.perf_counter() - run_start, posted)
+    elapsed = time.perf_counter() - started
+
+    import logging_setup
+    logging_setup.stop_logging()  # Release the log file before the work dir is removed
+    return elapsed
+
+
+# ============================ #
+# 📊 REPORTING                 #
+# ============================ #
+
+def parse_profiles(args) -> dict:
+    profiles = {
+        service: {
+            "latency": args.latency,
+            "error_rate": args.error_rate,
+            "rate_limit_rate": args.rate_limit_rate,
+            "payload_bytes": args.payload_bytes,
+        }
+        for service in SERVICES
+    }
+    for override in args.stub:
+        target, _, value = override.partition("=")
+        service, _, key = target.partition(".")
+        if service not in profiles or key not in profiles[service] or not value:
+            raise SystemExit(f"Invalid --stub override: {override!r} (expected SERVICE.KEY=VALUE)")
+        profiles[service][key] = int(value) if key == "payload_bytes" else float(value)
+    return profiles
+
+
+def print_report(summary: dict) -> None:
+    print(f"{'stage':<10}{'calls':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage in STAGES:
+        stats = summary["stages"].get(stage)
+        if stats:
+            print(f"{stage:<10}{stats['count']:>7}{stats['errors']:>8}"
+                  f"{stats['p50'] * 1000:>10.1f}{stats['p95'] * 1000:>10.1f}{stats['p99'] * 1000:>10.1f}")
+    print(f"runs/sec: {summary['runs_per_second']:.2f}")
+
+
+def check_baseline(summary: dict, settings: dict, tolerance: float, update: bool) -> bool:
+    """Returns False when the run p95 or throughput regressed past `tolerance`."""
+    baseline = None
+    if os.path.exists(BASELINE_FILE) and not update:
+        with open(BASELINE_FILE, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    if baseline is None or baseline.get("settings") != settings:
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump({"settings": settings, "summary": summary}, f, indent=2)
+        print(f"baseline written to {BASELINE_FILE}")
+        return True
+
+    ok = True
+    old, new = baseline["summary"], summary
+    old_p95, new_p95 = old["stages"]["run"]["p95"], new["stages"]["run"]["p95"]
+    print(f"baseline run p95: {old_p95 * 1000:.1f} ms, runs/sec: {old['runs_per_second']:.2f}")
+    if new_p95 > old_p95 * (1 + tolerance):
+        print("FAIL: run p95 latency regressed")
+        ok = False
+    if new["runs_per_second"] < old["runs_per_second"] / (1 + tolerance):
+        print("FAIL: throughput regressed")
+        ok = False
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds each stub waits before answering")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of requests answered with 429")
+    parser.add_argument("--payload-bytes", type=int, default=2048, help="Padding added to every answer")
+    parser.add_argument("--stub", action="append", default=[], metavar="SERVICE.KEY=VALUE",
+                        help=f"Per-service override; services: {', '.join(SERVICES)}")
+    parser.add_argument("--nitter-instances", type=int, default=2)
+    parser.add_argument("--stream", action="store_true", help="Stream TogetherAI completions")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--metrics", action="store_true", help="Enable metrics spans (to measure their overhead)")
+    parser.add_argument("--log-level", default="CRITICAL", help="Bot log level during the runs (injected faults log errors)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown over baseline (0.25 = 25%%)")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    profiles = parse_profiles(args)
+    servers = start_stubs(profiles, args.nitter_instances)
+    timer = StageTimer()
+    try:
+        with tempfile.TemporaryDirectory(prefix="pigeoncall-bench-") as work_dir:
+            config_path = os.path.join(work_dir, "config.ini")
+            write_config(config_path, servers, work_dir, args.stream, args.log_level, args.metrics)
+            elapsed = run_pipeline(args.runs, config_path, os.path.join(work_dir, "state"), timer)
+    finally:
+        for server in servers.values():
+            server.stop()
+
+    summary = summarize(timer, elapsed, args.runs)
+    print_report(summary)
+    settings = {"runs": args.runs, "profiles": profiles, "nitter_instances": args.nitter_instances,
+                "stream": args.stream, "metrics": args.metrics, "seed": args.seed}
+    return 0 if check_baseline(summary, settings, args.tolerance, args.update_baseline) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""Micro-benchmark for reply target scoring (candidate_scoring).
+
+Usage:
+    python bench/bench_scoring.py [--candidates N] [--topics N] [--repeat N]
+
+Scores synthetic timeline items for several topics three ways: a pure-Python
+loop over candidates (dict TF-IDF, for reference), one `score` call per topic
+(what a single search does) and one batched call for all topics at once.
+"""
+import argparse
+import collections
+import math
+import os
+import random
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import candidate_scoring  # noqa: E402
+
+WORDS = (
+    "bitcoin etf approval market crash rally inflation rates fed election policy climate energy nuclear "
+    "solar tariffs trade china europe ai regulation openai chips nvidia layoffs housing rent mortgage "
+    "strike union wages football transfer league final doping olympics vaccine outbreak privacy ban"
+).split()
+
+
+def synthetic(candidates: int, topics: int, seed: int = 1) -> tuple:
+    """Returns (items, contexts, context_index) with `candidates` items per topic."""
+    rng = random.Random(seed)
+    now = time.time()
+    contexts, items, context_index = [], [], []
+    for topic in range(topics):
+        focus = rng.sample(WORDS, 6)
+        contexts.append(f"Topic: {' '.join(focus[:3])}\nContext: people argue about {' '.join(focus)} " * 2)
+        for i in range(candidates):
+            text = " ".join(rng.choice(focus) if rng.random() < 0.4 else rng.choice(WORDS) for _ in range(30))
+            items.append({
+                "tweet_text": text, "tweet_id": f"{topic}-{i}", "username": f"user{i}",
+                "timestamp": now - rng.uniform(0, 12 * 3600) if rng.random() < 0.9 else None,
+                "stats": {"replies": rng.randint(0, 500), "retweets": rng.randint(0, 2000),
+                          "quotes": rng.randint(0, 100), "likes": rng.randint(0, 20000)},
+            })
+            context_index.append(topic)
+    return items, contexts, context_index
+
+
+def python_scores(items: list, contexts: list, context_index: list) -> list:
+    """The same score computed one candidate at a time with dicts."""
+    words = lambda text: [  # noqa: E731
+        word for word in candidate_scoring._WORD_RE.findall(candidate_scoring._URL_RE.sub(" ", (text or "").lower()))
+        if len(word) > 2 and word not in candidate_scoring._STOPWORDS
+    ]
+    counts = [collections.Counter(words(item["tweet_text"])) for item in items]
+    counts += [collections.Counter(words(context)) for context in contexts]
+    document_frequency = collections.Counter(term for count in counts for term in count)
+    vectors = []
+    for count in counts:
+        vector = {term: (1 + math.log(n)) * (math.log((1 + len(counts)) / (1 + document_frequency[term])) + 1)
+                  for term, n in count.items()}
+        vectors.append((vector, math.sqrt(sum(weight * weight for weight in vector.values()))))
+    now, weights, scores = time.time(), candidate_scoring.WEIGHTS, []
+    for item, (vector, norm), index in zip(items, vectors, context_index):
+        context, context_norm = vectors[len(items) + index]
+        dot = sum(weight * context.get(term, 0.0) for term, weight in vector.items())
+        relevance = dot / (norm * context_norm) if norm and context_norm else 0.0
+        interactions = sum(item["stats"].get(key, 0) * weight
+                           for key, weight in candidate_scoring.ENGAGEMENT_WEIGHTS.items())
+        engagement = min(math.log1p(interactions) / math.log1p(candidate_scoring.ENGAGEMENT_SCALE), 1.0)
+        freshness = (2 ** (-max(now - item["timestamp"], 0) / candidate_scoring.FRESHNESS_HALF_LIFE)
+                     if item["timestamp"] else 0.5)
+        scores.append(weights["relevance"] * relevance + weights["engagement"] * engagement
+                      + weights["freshness"] * freshness)
+    return scores
+
+
+def median_seconds(func, repeat: int) -> float:
+    func()  # Warm-up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[len(timings) // 2]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=25, help="Candidates per topic")
+    parser.add_argument("--topics", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if candidate_scoring._numpy() is None:
+        print("numpy is not installed: candidate_scoring falls back to a random pick")
+        return
+
+    items, contexts, context_index = synthetic(args.candidates, args.topics)
+    per_topic = [
+        [item for item, index in zip(items, context_index) if index == topic] for topic in range(args.topics)
+    ]
+
+    def one_call_per_topic():
+        for topic, topic_items in enumerate(per_topic):
+            candidate_scoring.score(topic_items, [contexts[topic]])
+
+    def batched():
+        candidate_scoring.score(items, contexts, context_index)
+
+    python = median_seconds(lambda: python_scores(items, contexts, context_index), args.repeat)
+    looped = median_seconds(one_call_per_topic, args.repeat)
+    together = median_seconds(batched, args.repeat)
+    print(f"{len(items)} candidates across {args.topics} topics")
+    print(f"  pure Python loop:   {python * 1000:8.2f} ms")
+    print(f"  one call per topic: {looped * 1000:8.2f} ms")
+    print(f"  one batched call:   {together * 1000:8.2f} ms ({python / together:.1f}x faster than the loop)")
+
+
+if __name__ == "__main__":
+    main()
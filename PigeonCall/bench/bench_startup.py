@@ -0,0 +1,88 @@
+"""Cold-start benchmark for botty.
+
+Usage:
+    python bench/bench_startup.py [--runs N] [--tolerance 0.25] [--update-baseline]
+
+Runs `python -X importtime -c "import botty"` in fresh interpreters and reports the
+median wall time and botty's cumulative import time. Exits non-zero when:
+- a heavy dependency (requests, urllib3, tweepy, bs4, lxml) is imported at startup, or
+- the median import time regresses more than `--tolerance` over the saved baseline.
+
+The baseline is machine specific, so it lives in bench/startup_baseline.json (not
+committed); the first run, or --update-baseline, writes it.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BOT_DIR = os.path.dirname(BENCH_DIR)
+BASELINE_FILE = os.path.join(BENCH_DIR, "startup_baseline.json")
+
+# Must only be loaded once a run actually needs the network or HTML parsing
+HEAVY_MODULES = ("requests", "urllib3", "tweepy", "bs4", "lxml")
+
+
+def run_once() -> tuple:
+    """Returns (wall seconds, botty cumulative import microseconds)."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import botty"],
+        cwd=BOT_DIR, capture_output=True, text=True, check=True,
+    )
+    wall = time.perf_counter() - start
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == "botty":
+            return wall, int(parts[1])
+    raise RuntimeError("botty not found in -X importtime output")
+
+
+def heavy_imports() -> list:
+    code = f"import sys, botty; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=BOT_DIR, capture_output=True, text=True, check=True)
+    return [module for module in result.stdout.strip().split(",") if module]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown over baseline (0.25 = 25%%)")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    samples = [run_once() for _ in range(args.runs)]
+    wall = statistics.median(sample[0] for sample in samples)
+    import_us = statistics.median(sample[1] for sample in samples)
+    print(f"median wall time:   {wall * 1000:8.1f} ms")
+    print(f"median botty import: {import_us / 1000:7.1f} ms")
+
+    failed = False
+    loaded = heavy_imports()
+    if loaded:
+        print(f"FAIL: heavy modules imported at startup: {', '.join(loaded)}")
+        failed = True
+
+    if args.update_baseline or not os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump({"wall_seconds": wall, "import_us": import_us}, f, indent=2)
+        print(f"baseline written to {BASELINE_FILE}")
+    else:
+        with open(BASELINE_FILE, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        limit = baseline["import_us"] * (1 + args.tolerance)
+        print(f"baseline import:     {baseline['import_us'] / 1000:7.1f} ms (limit {limit / 1000:.1f} ms)")
+        if import_us > limit:
+            print("FAIL: startup import time regressed")
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
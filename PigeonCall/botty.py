@@ -1,44 +1,630 @@
+import argparse
+import functools
 import logging
-import logging_setup
-from logging_setup import log_tweet_decision
-from config import load_config
-from api_requests import find_tweet_or_topic, together_ai_generate
-from twitter_api import post_tweet
+import signal
+import threading
+import time
+from logging_setup import setup_logging, log_tweet_decision
+from config import load_settings, parse_settings, is_placeholder, ConfigError
+import accounts
+import candidate_pool
+import candidate_scoring
+import api_requests
+import draft_queue
+from api_requests import find_tweet_or_topic, together_ai_generate, find_tweet_targets, together_ai_generate_batch
+import twitter_api
+from twitter_api import send_tweet
+import http_client
+import fetcher
+import gemini_api
+import instance_lock
+import llm_router
+import metrics
+import outbox
+import nitter_health
+import nitter_parser
+import profiler
+import prompts
+import rate_ledger
+import response_cache
+import scheduler
+import seen_index
 
 
 # ============================ #
-# 🚀 MAIN EXECUTION            #
+# ⚙️ RUNTIME CONFIGURATION     #
 # ============================ #
 
-def main():
-   #Main function to run the bot.
-    logging.info("🚀 Starting Twitter bot...")
+def configure_runtime(config, refresh_cache: bool = False, settings=None) -> None:
+    """Applies config.ini tunables to the shared clients and caches.
+
+    `settings` is the validated snapshot of `config` (parsed from it if omitted).
+    """
+    settings = settings or parse_settings(config)
+    # Shared keep-alive pools for every AI / Nitter request; concurrent accounts
+    # hit the same hosts at once, so keep at least one socket per worker
+    http_client.configure(
+        pool_connections=settings.http.pool_connections,
+        pool_maxsize=max(settings.http.pool_maxsize, config.getint("Accounts", "WORKERS", fallback=accounts.DEFAULT_WORKERS)),
+        retries=settings.http.retries,
+        backoff_factor=settings.http.backoff_factor,
+        timeout=settings.http.timeout,
+    )
+    api_requests.GROK_MODEL = settings.grok.model or api_requests.GROK_MODEL
+    api_requests.GROK_TIMEOUT = settings.grok.timeout  # None falls through to [HTTP] TIMEOUT
+    api_requests.TOGETHER_MODEL = settings.together.model or api_requests.TOGETHER_MODEL
+    api_requests.TOGETHER_TIMEOUT = settings.together.timeout
+    gemini_api.configure(
+        model=settings.gemini.model,
+        timeout=settings.gemini.timeout,
+        retries=settings.gemini.retries,
+        cache_ttl=settings.gemini.cache_ttl,
+        grounded=settings.gemini.grounded,
+    )
+    api_requests.configure_topics(
+        source="gemini" if settings.gemini.topics else "grok",
+        gemini_api_key="" if is_placeholder(settings.gemini.api_key) else settings.gemini.api_key,
+    )
+    # Tweet generation providers, in preference order until latency stats take over
+    completers = {
+        "together": (settings.together.api_key, api_requests.together_complete),
+        "grok": (settings.grok.api_key, api_requests.grok_complete),
+        "gemini": (settings.gemini.api_key, gemini_api.gemini_complete),
+    }
+    llm_router.clear()
+    for name in config.get("Router", "PROVIDERS", fallback="together").split(","):
+        name = name.strip().lower()
+        if name not in completers:
+            logging.warning(f"⚠️ Unknown LLM provider in [Router] PROVIDERS: {name}")
+        elif not is_placeholder(completers[name][0]):
+            llm_router.register(name, functools.partial(completers[name][1], completers[name][0]))
+    llm_router.configure(
+        mode=config.get("Router", "MODE", fallback=llm_router.MODE),
+        hedge_percentile=config.getfloat("Router", "HEDGE_PERCENTILE", fallback=llm_router.HEDGE_PERCENTILE),
+        default_hedge_delay=config.getfloat("Router", "DEFAULT_HEDGE_DELAY", fallback=llm_router.DEFAULT_HEDGE_DELAY),
+    )
+    # Base URLs can point at local stand-ins (see bench/bench_pipeline.py)
+    api_requests.GROK_URL = config.get("Endpoints", "GROK_URL", fallback=api_requests.GROK_URL)
+    api_requests.TOGETHER_URL = config.get("Endpoints", "TOGETHER_URL", fallback=api_requests.TOGETHER_URL)
+    twitter_api.configure(api_base=config.get("Endpoints", "TWITTER_API_BASE", fallback=twitter_api.TWITTER_API_BASE))
+    instances = config.get("Nitter", "INSTANCES", fallback="")
+    if instances.strip():
+        fetcher.NITTER_INSTANCES = [instance.strip().rstrip("/") for instance in instances.split(",") if instance.strip()]
+    fetcher.configure(
+        mode=config.get("Nitter", "MODE", fallback=fetcher.NITTER_MODE),
+        deadline=config.getfloat("Nitter", "DEADLINE", fallback=fetcher.NITTER_DEADLINE),
+        race_width=config.getint("Nitter", "RACE_WIDTH", fallback=fetcher.RACE_WIDTH),
+    )
+    response_cache.configure(
+        max_entries=config.getint("Cache", "MAX_ENTRIES", fallback=response_cache.MAX_ENTRIES),
+        force_refresh=refresh_cache or config.getboolean("Cache", "FORCE_REFRESH", fallback=False),
+    )
+    api_requests.GROK_CACHE_TTL = config.getfloat("Cache", "GROK_TTL", fallback=api_requests.GROK_CACHE_TTL)
+    api_requests.TOGETHER_STREAM = config.getboolean("TogetherAI", "STREAM", fallback=api_requests.TOGETHER_STREAM)
+    nitter_parser.configure(backend=config.get("Nitter", "PARSER", fallback=nitter_parser.PARSER_BACKEND))
+    fetcher.CANDIDATE_SCAN = config.getint("Nitter", "SCAN", fallback=fetcher.CANDIDATE_SCAN)
+    fetcher.PAGE_CACHE_TTL = config.getfloat("Nitter", "PAGE_CACHE_TTL", fallback=fetcher.PAGE_CACHE_TTL)
+    candidate_pool.configure(
+        max_age=config.getfloat("Nitter", "POOL_MAX_AGE", fallback=candidate_pool.MAX_AGE),
+        max_entries=config.getint("Nitter", "POOL_SIZE", fallback=candidate_pool.MAX_ENTRIES),
+        min_overlap=config.getfloat("Nitter", "POOL_MIN_OVERLAP", fallback=candidate_pool.MIN_OVERLAP),
+    )
+    candidate_scoring.configure(
+        relevance=config.getfloat("Nitter", "SCORE_RELEVANCE", fallback=candidate_scoring.WEIGHTS["relevance"]),
+        engagement=config.getfloat("Nitter", "SCORE_ENGAGEMENT", fallback=candidate_scoring.WEIGHTS["engagement"]),
+        freshness=config.getfloat("Nitter", "SCORE_FRESHNESS", fallback=candidate_scoring.WEIGHTS["freshness"]),
+        half_life=config.getfloat("Nitter", "FRESHNESS_HALF_LIFE", fallback=candidate_scoring.FRESHNESS_HALF_LIFE),
+    )
+    rate_ledger.configure(
+        per_15min=config.getint("RateLimit", "PER_15MIN", fallback=rate_ledger.LIMITS["15min"]),
+        daily=config.getint("RateLimit", "DAILY", fallback=rate_ledger.LIMITS["daily"]),
+        monthly=config.getint("RateLimit", "MONTHLY", fallback=rate_ledger.LIMITS["monthly"]),
+    )
+    nitter_health.configure(
+        failure_threshold=config.getint("Nitter", "FAILURE_THRESHOLD", fallback=nitter_health.FAILURE_THRESHOLD),
+        cooldown=config.getfloat("Nitter", "COOLDOWN", fallback=nitter_health.COOLDOWN),
+    )
+    metrics.configure(
+        enabled=config.getboolean("Metrics", "ENABLED", fallback=False),
+        export_format=config.get("Metrics", "FORMAT", fallback=metrics.EXPORT_FORMAT),
+        export_path=config.get("Metrics", "PATH", fallback=""),
+    )
+    profiler.configure(
+        directory=config.get("Profile", "DIR", fallback=""),
+        sample_hz=config.getfloat("Profile", "SAMPLE_HZ", fallback=profiler.SAMPLE_HZ),
+        daemon_sample_hz=config.getfloat("Profile", "DAEMON_SAMPLE_HZ", fallback=profiler.DAEMON_SAMPLE_HZ),
+        daemon_deterministic=config.getboolean("Profile", "DAEMON_DETERMINISTIC", fallback=profiler.DAEMON_DETERMINISTIC),
+        top_allocations=config.getint("Profile", "TOP_ALLOCATIONS", fallback=profiler.TOP_ALLOCATIONS),
+    )
+    seen_index.configure(
+        user_cooldown=config.getfloat("Dedup", "USER_COOLDOWN", fallback=seen_index.USER_COOLDOWN),
+        topic_cooldown=config.getfloat("Dedup", "TOPIC_COOLDOWN", fallback=seen_index.TOPIC_COOLDOWN),
+        near_duplicate_distance=config.getint("Dedup", "NEAR_DUPLICATE_DISTANCE", fallback=seen_index.NEAR_DUPLICATE_DISTANCE),
+    )
+    outbox.configure(
+        max_attempts=config.getint("Outbox", "MAX_ATTEMPTS", fallback=outbox.MAX_ATTEMPTS),
+        retry_backoff=config.getfloat("Outbox", "RETRY_BACKOFF", fallback=outbox.RETRY_BACKOFF),
+        max_age=config.getfloat("Outbox", "MAX_AGE", fallback=outbox.MAX_AGE),
+    )
+    draft_queue.configure(
+        reply_ttl=config.getfloat("Queue", "REPLY_TTL", fallback=draft_queue.REPLY_TTL),
+        original_ttl=config.getfloat("Queue", "ORIGINAL_TTL", fallback=draft_queue.ORIGINAL_TTL),
+        target_depth=config.getint("Queue", "DEPTH", fallback=draft_queue.TARGET_DEPTH),
+    )
+    prompts.configure(
+        persona=config.get("Prompts", "PERSONA", fallback=""),
+        tone=config.get("Prompts", "TONE", fallback=""),
+        directory=config.get("Prompts", "DIR", fallback=""),
+        default_budget=config.getint("Prompts", "TOKEN_BUDGET", fallback=prompts.DEFAULT_BUDGET),
+        budgets={
+            key[len("budget_"):]: config.getint("Prompts", key)
+            for key in (config.options("Prompts") if config.has_section("Prompts") else [])
+            if key.startswith("budget_")
+        },
+    )
+
+
+def target_topic(context, additional_context, is_reply):
+    """The topic a target was found for: replies carry the Grok topic block as extra context."""
+    return additional_context if is_reply else context
+
+
+# ============================ #
+# 📮 OUTBOX                    #
+# ============================ #
 
-    # Load configuration
-    config = load_config()
-    api_key, api_key_secret = config.get("Twitter", "API_KEY"), config.get("Twitter", "API_KEY_SECRET")
-    access_token, access_token_secret = config.get("Twitter", "ACCESS_TOKEN"), config.get("Twitter", "ACCESS_TOKEN_SECRET")
+def deliver(account: dict, entry: dict) -> bool:
+    """Sends a claimed outbox tweet. On failure it stays in the outbox, due at the next
+    rate-limit slot (429) or after a backoff, or is dead-lettered. Returns True if posted."""
+    result = send_tweet(*accounts.credentials(account), entry["text"], entry["username"], entry["tweet_id"], account=account["name"])
+    if result == twitter_api.SENT:
+        outbox.mark_sent(entry["id"])
+        seen_index.record_post(
+            entry["text"], entry["tweet_id"], entry["username"],
+            target_topic(entry["context"], entry["additional_context"], entry["is_reply"]),
+        )
+        return True
+    if result == twitter_api.RATE_LIMITED:
+        outbox.mark_failed(entry, "rate limited", retry_at=rate_ledger.next_slot(account["name"]), count_attempt=False)
+    else:
+        outbox.mark_failed(entry, result, permanent=result == twitter_api.REJECTED)
+    return False
+
+
+def send_new(account: dict, tweet_text: str, context, tweet_id, username, additional_context, is_reply) -> bool:
+    """Writes a freshly generated tweet to the outbox first, then sends it. Returns True if posted."""
+    entry_id = outbox.enqueue(account["name"], tweet_text, context, is_reply, tweet_id, username, additional_context)
+    entry = outbox.claim(account["name"], entry_id) if entry_id is not None else None
+    if entry is None:
+        # Outbox unavailable: still post rather than drop the tweet
+        if send_tweet(*accounts.credentials(account), tweet_text, username, tweet_id, account=account["name"]) != twitter_api.SENT:
+            return False
+        seen_index.record_post(tweet_text, tweet_id, username, target_topic(context, additional_context, is_reply))
+        return True
+    return deliver(account, entry)
+
+
+def drain_outbox(account: dict, limit: int = 1, spacing: float = 0) -> int:
+    """Sends up to `limit` due outbox tweets of `account`, oldest first, before anything
+    new is generated. Stops at the first failed send. Returns the number posted."""
+    outbox.expire(account["name"])
+    posted = 0
+    while posted < limit and rate_ledger.can_post(account["name"]):
+        entry = outbox.claim(account["name"])
+        if entry is None:
+            break
+        # Checked again at sending time: the tweet or its target may have been posted meanwhile
+        if seen_index.is_duplicate(entry["text"]) or (
+            entry["is_reply"] and not seen_index.filter_candidates([{"tweet_id": entry["tweet_id"], "username": entry["username"]}])
+        ):
+            outbox.mark_failed(entry, "duplicate or target already replied to", permanent=True)
+            continue
+        if posted:
+            time.sleep(spacing)
+        log_tweet_decision(entry["context"], entry["is_reply"], "Outbox", entry["text"], entry["tweet_id"], entry["username"])
+        if not deliver(account, entry):
+            break
+        posted += 1
+    if posted:
+        logging.info(f"📮 Sent {posted} tweet(s) from the outbox.")
+    return posted
+
+
+# ============================ #
+# 🔁 SINGLE BOT CYCLE          #
+# ============================ #
+
+def run_cycle(config, account: dict = None) -> bool:
+    """Runs one find → generate → post cycle for `account` (default: [Twitter]).
+    Returns True if a tweet was posted."""
+    account = account or accounts.default_account(config)
     grok_api_key, together_api_key = config.get("GrokAI", "API_KEY"), config.get("TogetherAI", "API_KEY")
 
+    # Don't pay for Grok / TogetherAI calls if the tweet could not be posted anyway
+    if not rate_ledger.can_post(account["name"]):
+        logging.info(f"⏳ Rate limited; next slot at {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(rate_ledger.next_slot(account['name'])))}.")
+        return False
+
+    # Tweets generated earlier and not sent yet go out before paying for a new one
+    posted = drain_outbox(account)
+    if posted or not rate_ledger.can_post(account["name"]):
+        return bool(posted)
 
     # Determine tweet context (reply or new post)
-    context, tweet_id, username, is_reply, additional_context = find_tweet_or_topic(grok_api_key) 
+    context, tweet_id, username, additional_context, is_reply, _ = find_tweet_or_topic(grok_api_key)
     if not context:
         logging.error("❌ No context found; aborting.")
-        return
-    
-    tweet_text = together_ai_generate(together_api_key, context, is_reply, additional_context, username=username)
+        return False
+
+    tweet_text = together_ai_generate(
+        together_api_key, context, is_reply, additional_context, username=username,
+        persona=account.get("persona"), tone=account.get("tone"),
+    )
     if not tweet_text:
         logging.error("❌ No tweet generated; aborting.")
-        return
+        return False
+
+    # Don't post (and burn rate limit on) something we already said
+    if seen_index.is_duplicate(tweet_text):
+        logging.error("❌ Generated tweet is a duplicate; aborting.")
+        return False
 
     # Log decision (for transparency and debugging)
     log_tweet_decision(context, is_reply, "TogetherAI", tweet_text, tweet_id, username)
 
-    # Post the tweet (reply if tweet_id exists)
-    success = post_tweet(api_key, api_key_secret, access_token, access_token_secret, tweet_text, username, tweet_id)
+    # Post the tweet (reply if tweet_id exists); a failed send stays in the outbox
+    success = send_new(account, tweet_text, context, tweet_id, username, additional_context, is_reply)
     if not success:
         logging.error("❌ Failed to post tweet.")
+    return success
+
+
+# ============================ #
+# 📦 BATCHED BOT CYCLE         #
+# ============================ #
+
+DEFAULT_BATCH_SPACING = 60  # Seconds between posts of one batch
+
+def run_batch(config, count: int, account: dict = None) -> int:
+    """Finds `count` targets with one Grok call, writes all tweets with one TogetherAI call
+    and posts them spaced out for `account` (default: [Twitter]). Returns the number of tweets posted."""
+    account = account or accounts.default_account(config)
+    grok_api_key, together_api_key = config.get("GrokAI", "API_KEY"), config.get("TogetherAI", "API_KEY")
+    spacing = config.getfloat("Batch", "SPACING", fallback=DEFAULT_BATCH_SPACING)
+
+    # Only find and write as many tweets as the rate limits let us post
+    count = min(count, rate_ledger.available(account["name"]))
+    if count <= 0:
+        logging.info(f"⏳ Rate limited; next slot at {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(rate_ledger.next_slot(account['name'])))}.")
+        return 0
+
+    # Tweets generated earlier and not sent yet take their share of the batch first
+    posted = drain_outbox(account, count, spacing)
+    count = min(count - posted, rate_ledger.available(account["name"]))
+    if count <= 0:
+        return posted
+
+    # A tweet another account already has a queued reply for is left to that one
+    taken = draft_queue.queued_targets()
+    targets = [target for target in find_tweet_targets(grok_api_key, count) if not target[1] or str(target[1]) not in taken]
+    if not targets:
+        logging.error("❌ No targets found; aborting batch.")
+        return posted
+
+    tweets = together_ai_generate_batch(together_api_key, targets, persona=account.get("persona"), tone=account.get("tone"))
+    # Everything is in the outbox before the first send, so a 429 midway loses nothing
+    entry_ids = []
+    for (context, tweet_id, username, additional_context, is_reply, _), tweet_text in zip(targets, tweets):
+        if not tweet_text or seen_index.is_duplicate(tweet_text):
+            continue
+        log_tweet_decision(context, is_reply, "TogetherAI (batch)", tweet_text, tweet_id, username)
+        entry_id = outbox.enqueue(account["name"], tweet_text, context, is_reply, tweet_id, username, additional_context)
+        if entry_id is not None:
+            entry_ids.append(entry_id)
+
+    for entry_id in entry_ids:
+        if not rate_ledger.can_post(account["name"]):
+            break  # The rest stays due in the outbox
+        entry = outbox.claim(account["name"], entry_id)
+        if entry is None:
+            continue
+        if posted:
+            time.sleep(spacing)
+        if deliver(account, entry):
+            posted += 1
+        else:
+            logging.error("❌ Failed to post tweet.")
+
+    logging.info(f"📦 Batch finished: {posted}/{len(targets)} tweets posted.")
+    return posted
+
+
+# ============================ #
+# 📥 DRAFT QUEUE               #
+# ============================ #
+
+def produce_drafts(config, account: dict = None) -> int:
+    """Tops the draft queue of `account` up to [Queue] DEPTH without posting anything.
+
+    Expired topic drafts are rewritten for the same topic first (no Grok call
+    needed); the rest is filled with new targets. Returns the number of drafts queued.
+    """
+    account = account or accounts.default_account(config)
+    grok_api_key, together_api_key = config.get("GrokAI", "API_KEY"), config.get("TogetherAI", "API_KEY")
+    voice = {"persona": account.get("persona"), "tone": account.get("tone")}
+    expired = draft_queue.prune(account["name"])
+    missing = draft_queue.TARGET_DEPTH - draft_queue.stats(account["name"])["depth"]
+    if missing <= 0:
+        return 0
+
+    targets = [
+        (draft["context"], None, None, draft["additional_context"], False, None)
+        for draft in expired if not seen_index.topic_recently_used(draft["context"])
+    ][:missing]
+    if len(targets) < missing:
+        new_count = missing - len(targets)
+        # Only tweets young enough to still be answerable once the draft is popped
+        max_age = min(candidate_pool.MAX_AGE, draft_queue.REPLY_TTL)
+        new_targets = (find_tweet_targets(grok_api_key, new_count, max_age=max_age) if new_count > 1
+                       else [find_tweet_or_topic(grok_api_key, max_age=max_age)])
+        # Two drafts (of any account) replying to the same tweet would look like a bot farm
+        taken = draft_queue.queued_targets()
+        targets += [target for target in new_targets if target[0] and (not target[1] or str(target[1]) not in taken)]
+    # Paying for a generation is wasted on a draft that would be stored already expired
+    now = time.time()
+    stale = [target for target in targets if draft_queue.expires_at(target[4], now, target[5]) <= now]
+    for target in stale:
+        logging.info(f"⌛ Skipping tweet {target[1]}: posted more than {draft_queue.REPLY_TTL:g}s ago.")
+    targets = [target for target in targets if target not in stale]
+    if not targets:
+        logging.error("❌ No targets found for drafts.")
+        return 0
+
+    if len(targets) > 1:
+        tweets = together_ai_generate_batch(together_api_key, targets, **voice)
+    else:
+        context, _, username, additional_context, is_reply, _ = targets[0]
+        tweets = [together_ai_generate(together_api_key, context, is_reply, additional_context, username=username, **voice)]
+
+    queued = 0
+    for (context, tweet_id, username, additional_context, is_reply, posted_at), tweet_text in zip(targets, tweets):
+        if not tweet_text or seen_index.is_duplicate(tweet_text):
+            continue
+        if draft_queue.push(account["name"], tweet_text, context, is_reply, tweet_id, username, additional_context,
+                            posted_at=posted_at):
+            queued += 1
+    logging.info(f"📥 Queued {queued} new draft(s).")
+    return queued
+
+
+def post_from_queue(config, account: dict = None) -> bool:
+    """Posts the freshest valid queued draft of `account`. Returns True if a tweet was posted.
+
+    Due outbox tweets go first. With an empty queue the cycle runs inline instead,
+    unless [Queue] FALLBACK_INLINE is off.
+    """
+    account = account or accounts.default_account(config)
+    if not rate_ledger.can_post(account["name"]):
+        logging.info(f"⏳ Rate limited; next slot at {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(rate_ledger.next_slot(account['name'])))}.")
+        return False
+    posted = drain_outbox(account)
+    if posted or not rate_ledger.can_post(account["name"]):
+        return bool(posted)
+
+    while True:
+        draft = draft_queue.pop(account["name"])
+        if draft is None:
+            break
+        # Checked again at posting time: other drafts or accounts may have got there first
+        if seen_index.is_duplicate(draft["text"]):
+            continue
+        if draft["is_reply"] and not seen_index.filter_candidates([{"tweet_id": draft["tweet_id"], "username": draft["username"]}]):
+            continue
+
+        log_tweet_decision(draft["context"], draft["is_reply"], "TogetherAI (queued)", draft["text"], draft["tweet_id"], draft["username"])
+        # The draft moves to the outbox, which keeps it if the send fails
+        if send_new(account, draft["text"], draft["context"], draft["tweet_id"], draft["username"],
+                    draft["additional_context"], draft["is_reply"]):
+            return True
+        logging.error("❌ Failed to post tweet; it stays in the outbox.")
+        return False
+
+    if config.getboolean("Queue", "FALLBACK_INLINE", fallback=True):
+        logging.info("📭 Draft queue empty; generating inline.")
+        return run_cycle(config, account)
+    logging.info("📭 Draft queue empty; nothing to post.")
+    return False
+
+
+# ============================ #
+# 🚀 MAIN EXECUTION            #
+# ============================ #
+
+def run_daemon(config, selected: list, workers: int, settings=None) -> None:
+    """Keeps config, HTTP pools and caches warm and runs cycles on an internal schedule.
+
+    With several accounts each one follows its own schedule; at most `workers`
+    cycles run at the same time. config.ini is checked before every cycle (one stat
+    call) and a changed file is applied once no other cycle is running; the account
+    list and the schedule keep their startup values until a restart.
+    """
+    settings = settings or parse_settings(config)
+    daemon_settings = settings.daemon
+    posts_per_day, jitter, batch_size = daemon_settings.posts_per_day, daemon_settings.jitter, daemon_settings.batch_size
+    stop_event = threading.Event()
+
+    def stop(signum, frame):
+        logging.info(f"🛑 Received signal {signum}; stopping after the current cycle.")
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    logging.info(
+        f"😈 Daemon mode for {len(selected)} account(s): ~{posts_per_day:g} posts/day each "
+        f"in batches of {batch_size} with ±{jitter:.0%} jitter."
+    )
+
+    current = {"settings": settings, "rejected": None, "active": 0}
+    current_lock = threading.Lock()
+
+    def start_cycle():
+        """Counts a cycle in and returns the config it runs with, reloaded if the file changed."""
+        with current_lock:
+            if current["active"] == 0 and current["settings"].path:
+                try:
+                    latest = load_settings(current["settings"].path)
+                except ConfigError as e:
+                    latest = current["settings"]
+                    logging.error(f"❌ {e}; keeping the previous config.")
+                if latest is not current["settings"] and latest is not current["rejected"]:
+                    try:
+                        configure_runtime(latest.parser, settings=latest)
+                        current["settings"] = latest
+                    except Exception as e:
+                        # Undo whatever part of the new config was applied; retry only once the file changes again
+                        logging.error(f"❌ Could not apply the changed config: {e}; keeping the previous config.")
+                        configure_runtime(current["settings"].parser, settings=current["settings"])
+                        current["rejected"] = latest
+            current["active"] += 1
+            return current["settings"].parser
+
+    def cycle(account):
+        config = start_cycle()
+        try:
+            run_one_cycle(config, account)
+        finally:
+            with current_lock:
+                current["active"] -= 1
+
+    def run_one_cycle(config, account):
+        if config.getboolean("Queue", "ENABLED", fallback=False):
+            # Post first, then prepare the next drafts while there is time to spare
+            post_from_queue(config, account)
+            produce_drafts(config, account)
+            draft_queue.report(account["name"])
+        elif batch_size > 1:
+            run_batch(config, batch_size, account)
+        else:
+            run_cycle(config, account)
+        outbox.report(account["name"])
+        http_client.log_connection_stats()
+        fetcher.log_transfer_stats()
+        llm_router.log_summary()
+        llm_router.save_stats()
+        metrics.log_summary()
+        metrics.export()
+        profiler.flush()
+
+    # One cycle posts `batch_size` tweets, so fewer cycles are needed per day
+    cycles_per_day = posts_per_day / max(batch_size, 1)
+    if len(selected) == 1:
+        accounts.run_as(selected[0], lambda account: scheduler.run_forever(lambda: cycle(account), cycles_per_day, jitter, stop_event))
+    else:
+        accounts.run_scheduled(
+            selected, cycle, lambda account_cycle: scheduler.run_forever(account_cycle, cycles_per_day, jitter, stop_event),
+            workers, stop_event,
+        )
+
+
+def logging_settings(config) -> dict:
+    """Reads the [Logging] section into `setup_logging` keyword arguments."""
+    return {
+        "level": config.get("Logging", "LEVEL", fallback="INFO"),
+        "log_dir": config.get("Logging", "DIR", fallback=None) or None,
+        "rotate": config.get("Logging", "ROTATE", fallback="size"),
+        "max_bytes": config.getint("Logging", "MAX_BYTES", fallback=5 * 1024 * 1024),
+        "backup_count": config.getint("Logging", "BACKUP_COUNT", fallback=7),
+        "when": config.get("Logging", "WHEN", fallback="midnight"),
+        "compress": config.getboolean("Logging", "COMPRESS", fallback=True),
+        "max_field_chars": config.getint("Logging", "MAX_FIELD_CHARS", fallback=2000),
+        "debug_sample_rate": config.getfloat("Logging", "DEBUG_SAMPLE_RATE", fallback=1.0),
+    }
+
+
+def main(refresh_cache: bool = False, daemon: bool = False, batch: int = 0, config_path: str = None,
+         account_names: list = None, queue: str = None, profile: bool = False):
+   #Main function to run the bot.
+    # Load configuration first: it decides where and how we log
+    try:
+        settings = load_settings(config_path)
+    except ConfigError as e:
+        setup_logging()
+        logging.error(f"❌ {e}")
+        return
+    config = settings.parser
+    selected = accounts.load_accounts(config, account_names)
+    multi_account = len(selected) > 1 or any(account["name"] != "default" for account in selected)
+    setup_logging(**logging_settings(config), accounts=[account["name"] for account in selected] if multi_account else ())
+    logging.info("🚀 Starting Twitter bot...")
+    for warning in settings.warnings:
+        logging.warning(f"⚠️ {warning}")
+    if not selected:
+        logging.error("❌ No Twitter account configured; exiting.")
+        return
+
+    # Cron runs and the daemon must never post at the same time; producing drafts posts nothing
+    lock = None
+    if queue != "produce":
+        lock = instance_lock.acquire()
+        if lock is None:
+            logging.error("❌ Bot is already running; exiting.")
+            return
+
+    try:
+        configure_runtime(config, refresh_cache, settings)
+        if profile:
+            profiler.start(daemon)
+
+        workers = config.getint("Accounts", "WORKERS", fallback=accounts.DEFAULT_WORKERS)
+        if daemon:
+            run_daemon(config, selected, workers, settings)
+        else:
+            # Accounts run side by side on a bounded pool; a single account runs just the same
+            if queue:
+                def queue_job(account):
+                    result = produce_drafts(config, account) if queue == "produce" else post_from_queue(config, account)
+                    draft_queue.report(account["name"])
+                    return result
+                results = accounts.run_all(selected, queue_job, workers)
+            elif batch > 1:
+                results = accounts.run_all(selected, lambda account: run_batch(config, batch, account), workers)
+            else:
+                results = accounts.run_all(selected, lambda account: run_cycle(config, account), workers)
+            if queue != "produce":
+                for account in selected:
+                    outbox.report(account["name"])
+            if multi_account:
+                logging.info(f"👥 Finished {len(results)} account(s): {results}")
+            http_client.log_connection_stats()
+            fetcher.log_transfer_stats()
+    finally:
+        llm_router.save_stats()
+        metrics.log_summary()
+        metrics.export()
+        http_client.close()
+        profiler.stop()
+        if lock is not None:
+            instance_lock.release(lock)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="PigeonCall Twitter bot")
+    parser.add_argument("--refresh-cache", action="store_true", help="Ignore cached Grok topic answers and fetch fresh ones")
+    parser.add_argument("--daemon", action="store_true", help="Keep running and post on an internal schedule instead of once")
+    parser.add_argument("--batch", type=int, default=0, metavar="N", help="Find and write N tweets with one Grok and one TogetherAI call")
+    parser.add_argument("--config", dest="config_path", metavar="PATH", help="Use this config file instead of config.ini")
+    parser.add_argument("--account", dest="account_names", action="append", metavar="NAME",
+                        help="Only run this [Twitter:NAME] account (repeatable; default: all)")
+    queue = parser.add_mutually_exclusive_group()
+    queue.add_argument("--produce", dest="queue", action="store_const", const="produce",
+                       help="Only generate drafts into the queue (up to [Queue] DEPTH), post nothing")
+    queue.add_argument("--from-queue", dest="queue", action="store_const", const="post",
+                       help="Post the freshest queued draft instead of generating one")
+    parser.add_argument("--profile", action="store_true",
+                        help="Write CPU, memory and per-stage profiles of this run to [Profile] DIR")
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    main(refresh_cache=args.refresh_cache, daemon=args.daemon, batch=args.batch, config_path=args.config_path,
+         account_names=args.account_names, queue=args.queue, profile=args.profile)
@@ -0,0 +1,229 @@
+import json
+import logging
+import sqlite3
+import time
+import candidate_scoring
+import seen_index
+from utils import state_path, sqlite_connect
+
+# ============================ #
+# 🎣 NITTER CANDIDATE POOL     #
+# ============================ #
+
+# A Nitter search page lists a few dozen tweets; one is used as the reply target.
+# Every parsed timeline item is kept here with its text, timestamp and stats, keyed
+# by the words of the topic it was found for. A later search for the same or a
+# related topic (at least MIN_OVERLAP of its words shared) takes an unused, still
+# fresh candidate from the pool instead of fetching Nitter again, so one round trip
+# yields several reply targets.
+#
+# Candidates expire MAX_AGE after the tweet was posted (or after it was fetched,
+# when the page had no date); the pool never holds more than MAX_ENTRIES tweets.
+
+POOL_FILE = "candidate_pool.sqlite3"
+MAX_AGE = 6 * 3600   # Replying to older tweets looks out of place
+MAX_ENTRIES = 2000   # Oldest fetched candidates are evicted first
+MIN_OVERLAP = 0.5    # Share of the topic's words a pooled topic must share
+
+_STOPWORDS = frozenset(
+    "the and for with from that this about over into after what why how are was were will its their "
+    "new news vs not has have more than just".split()
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS candidates (
+    tweet_id TEXT PRIMARY KEY,
+    username TEXT NOT NULL,
+    text TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    posted_at REAL,
+    fetched_at REAL NOT NULL,
+    stats TEXT,
+    used_at REAL
+);
+CREATE INDEX IF NOT EXISTS candidates_fetched ON candidates (fetched_at);
+CREATE TABLE IF NOT EXISTS candidate_tokens (
+    token TEXT NOT NULL,
+    tweet_id TEXT NOT NULL,
+    PRIMARY KEY (token, tweet_id)
+) WITHOUT ROWID;
+"""
+
+_pool_path = None
+
+
+def configure(max_age: float = None, max_entries: int = None, min_overlap: float = None, path: str = None) -> None:
+    global MAX_AGE, MAX_ENTRIES, MIN_OVERLAP, _pool_path
+    if max_age is not None:
+        MAX_AGE = max_age
+    if max_entries is not None:
+        MAX_ENTRIES = max(max_entries, 0)
+    if min_overlap is not None:
+        MIN_OVERLAP = min(max(min_overlap, 0.01), 1.0)
+    if path is not None:
+        _pool_path = path
+
+
+def _connect():
+    return sqlite_connect(_pool_path or state_path(POOL_FILE), _SCHEMA)
+
+
+def topic_tokens(topic: str) -> set:
+    """The words that identify a topic: its title without short and filler words."""
+    return {word for word in seen_index.topic_key(topic).split() if len(word) > 2 and word not in _STOPWORDS}
+
+
+_COLUMNS = ("tweet_id", "username", "text", "topic", "posted_at", "fetched_at", "stats")
+
+
+def _as_candidate(row) -> dict:
+    """A pooled row shaped like a parsed timeline item (`tweet_text`, `timestamp`, `stats`)."""
+    candidate = dict(zip(_COLUMNS, row))
+    candidate["tweet_text"] = candidate.pop("text")
+    candidate["timestamp"] = candidate.pop("posted_at")
+    candidate["stats"] = json.loads(candidate["stats"]) if candidate["stats"] else {}
+    return candidate
+
+
+# ============================ #
+# 📝 FILLING                   #
+# ============================ #
+
+def add(topic: str, items: list, now: float = None) -> int:
+    """Stores parsed timeline items found for `topic`. Returns how many were new."""
+    now = time.time() if now is None else now
+    tokens = topic_tokens(topic)
+    rows = [
+        (str(item["tweet_id"]), item["username"], item["tweet_text"], topic, item.get("timestamp"), now,
+         json.dumps(item.get("stats") or {}))
+        for item in items if item.get("tweet_text") and item.get("tweet_id") and item.get("username")
+    ]
+    if not rows or not tokens:
+        return 0
+    try:
+        with _connect() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO candidates (tweet_id, username, text, topic, posted_at, fetched_at, stats) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            added = conn.total_changes - before
+            conn.executemany(
+                "INSERT OR IGNORE INTO candidate_tokens (token, tweet_id) VALUES (?, ?)",
+                [(token, row[0]) for row in rows for token in tokens],
+            )
+            _evict(conn, now)
+    except sqlite3.Error as e:
+        logging.warning(f"⚠️ Candidate pool write failed: {e}")
+        return 0
+    return added
+
+
+def _evict(conn, now: float) -> None:
+    """Drops expired candidates, then the oldest fetched ones beyond MAX_ENTRIES."""
+    conn.execute("DELETE FROM candidates WHERE COALESCE(posted_at, fetched_at) <= ?", (now - MAX_AGE,))
+    conn.execute(
+        "DELETE FROM candidates WHERE tweet_id IN "
+        "(SELECT tweet_id FROM candidates ORDER BY fetched_at DESC, posted_at DESC LIMIT -1 OFFSET ?)",
+        (MAX_ENTRIES,),
+    )
+    conn.execute("DELETE FROM candidate_tokens WHERE tweet_id NOT IN (SELECT tweet_id FROM candidates)")
+
+
+# ============================ #
+# 🎯 TAKING                    #
+# ============================ #
+
+def matching(topic: str, now: float = None) -> list:
+    """Unused, fresh candidates for `topic` or a related one, best topic match and newest first."""
+    now = time.time() if now is None else now
+    tokens = topic_tokens(topic)
+    if not tokens:
+        return []
+    needed = max(1, round(len(tokens) * MIN_OVERLAP))
+    placeholders = ", ".join("?" * len(tokens))
+    try:
+        with _connect() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join('c.' + column for column in _COLUMNS)} FROM candidates c "
+                f"JOIN (SELECT tweet_id, COUNT(*) AS shared FROM candidate_tokens WHERE token IN ({placeholders}) "
+                "GROUP BY tweet_id HAVING shared >= ?) m ON m.tweet_id = c.tweet_id "
+                "WHERE c.used_at IS NULL AND COALESCE(c.posted_at, c.fetched_at) > ? "
+                "ORDER BY m.shared DESC, COALESCE(c.posted_at, c.fetched_at) DESC",
+                [*tokens, needed, now - MAX_AGE],
+            ).fetchall()
+    except sqlite3.Error as e:
+        logging.warning(f"⚠️ Candidate pool read failed: {e}")
+        return []
+    return [_as_candidate(row) for row in rows]
+
+
+def claim(candidate: dict, topic: str = "", now: float = None) -> bool:
+    """Marks `candidate` used unless another worker already took it. Returns whether we got it.
+
+    Check and update run in one write transaction, so two accounts resolving
+    related topics at the same time never reply to the same tweet. A tweet that
+    is not pooled yet is stored as used.
+    """
+    now = time.time() if now is None else now
+    try:
+        with _connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR IGNORE INTO candidates (tweet_id, username, text, topic, posted_at, fetched_at, stats) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (str(candidate["tweet_id"]), candidate["username"], candidate["tweet_text"], topic,
+                 candidate.get("timestamp"), now, json.dumps(candidate.get("stats") or {})),
+            )
+            cursor = conn.execute(
+                "UPDATE candidates SET used_at = ? WHERE tweet_id = ? AND used_at IS NULL",
+                (now, str(candidate["tweet_id"])),
+            )
+            return cursor.rowcount == 1
+    except sqlite3.Error as e:
+        logging.warning(f"⚠️ Candidate pool write failed: {e}")
+        return False
+
+
+def claim_best(candidates: list, context: str, topic: str = "", now: float = None, max_age: float = None):
+    """Claims the best-scoring candidate for `context` (see candidate_scoring) that no
+    other worker took in the meantime. Returns it, or None.
+
+    With `max_age`, tweets posted longer ago than that are left in the pool (the
+    draft producer passes its reply TTL, since a draft for them would be stale).
+    """
+    now = time.time() if now is None else now
+    if max_age is not None:
+        candidates = [
+            candidate for candidate in candidates
+            if not candidate.get("timestamp") or candidate["timestamp"] > now - max_age
+        ]
+    for candidate in candidate_scoring.rank(candidates, context, now):
+        if claim(candidate, topic, now):
+            return candidate
+        logging.info(f"🎣 {candidate['username']}'s tweet {candidate['tweet_id']} was just taken; trying the next one.")
+    return None
+
+
+def take(topic: str, context: str = None, now: float = None, max_age: float = None):
+    """Claims the best pooled candidate for `topic` among those we have not replied to and
+    whose user is off cooldown, posted within `max_age` if given. Returns it, or None."""
+    now = time.time() if now is None else now
+    candidates = seen_index.filter_candidates(matching(topic, now), now)
+    return claim_best(candidates, context or topic, topic, now, max_age)
+
+
+def stats(now: float = None) -> dict:
+    """size (all pooled candidates) and unused (fresh, not taken yet)."""
+    now = time.time() if now is None else now
+    try:
+        with _connect() as conn:
+            size, unused = conn.execute(
+                "SELECT COUNT(*), SUM(used_at IS NULL AND COALESCE(posted_at, fetched_at) > ?) FROM candidates",
+                (now - MAX_AGE,),
+            ).fetchone()
+    except sqlite3.Error as e:
+        logging.warning(f"⚠️ Candidate pool read failed: {e}")
+        return {"size": 0, "unused": 0}
+    return {"size": size, "unused": unused or 0}
@@ -0,0 +1,163 @@
+import itertools
+import logging
+import math
+import random
+import re
+import time
+
+# ============================ #
+# 🎯 REPLY TARGET SCORING      #
+# ============================ #
+
+# With ~17 posts a day every reply should go to the best target, not a random one
+# of the first four tweets. Each candidate gets one score from three features:
+#   relevance  - TF-IDF cosine between the tweet and the Grok topic/context block
+#   engagement - log-scaled replies / retweets / quotes / likes from tweet-stats
+#   freshness  - halves every FRESHNESS_HALF_LIFE seconds (0.5 when the date is unknown)
+#
+# All candidates (of one topic or many) are scored in one batch with NumPy: the
+# TF-IDF vectors stay sparse as (document, term, weight) arrays, so the cost grows
+# with the number of words, not documents x vocabulary. Without NumPy the old
+# random pick among the newest FALLBACK_POOL candidates is used.
+
+WEIGHTS = {"relevance": 2.0, "engagement": 1.0, "freshness": 1.0}
+ENGAGEMENT_WEIGHTS = {"replies": 1.5, "retweets": 2.0, "quotes": 2.0, "likes": 1.0}  # Discussion counts most
+ENGAGEMENT_SCALE = 10000    # Weighted interactions scoring 1.0 (log scale, capped)
+FRESHNESS_HALF_LIFE = 2 * 3600
+FALLBACK_POOL = 4           # Without NumPy: random pick among this many newest candidates
+
+_WORD_RE = re.compile(r"[a-z0-9#$@']+")
+_URL_RE = re.compile(r"https?://\S+")
+_STOPWORDS = frozenset(
+    "the and for with from that this about over into after what why how are was were will its their "
+    "you your they them but not has have had more than just can all our out who get got been being "
+    "topic context".split()
+)
+
+
+def configure(relevance: float = None, engagement: float = None, freshness: float = None, half_life: float = None) -> None:
+    global FRESHNESS_HALF_LIFE
+    for feature, weight in (("relevance", relevance), ("engagement", engagement), ("freshness", freshness)):
+        if weight is not None:
+            WEIGHTS[feature] = weight
+    if half_life is not None:
+        FRESHNESS_HALF_LIFE = max(half_life, 1)
+
+
+def _numpy():
+    try:
+        import numpy
+        return numpy
+    except ImportError:
+        return None
+
+
+def _terms(texts: list):
+    """Tokenizes `texts` into flat (document, term) id arrays and the vocabulary size."""
+    np = _numpy()
+    tokens = [_WORD_RE.findall(_URL_RE.sub(" ", (text or "").lower())) for text in texts]
+    words = list(itertools.chain.from_iterable(tokens))
+    vocabulary = {word: term for term, word in enumerate(dict.fromkeys(words))}
+    term_ids = np.fromiter(map(vocabulary.__getitem__, words), dtype=np.int64, count=len(words))
+    doc_ids = np.repeat(np.arange(len(texts), dtype=np.int64), [len(doc) for doc in tokens])
+    # Short and filler words are dropped once per vocabulary entry, not once per occurrence
+    kept = np.array([len(word) > 2 and word not in _STOPWORDS for word in vocabulary], dtype=bool)
+    if not kept.any():
+        return doc_ids[:0], term_ids[:0], len(vocabulary)
+    kept = kept[term_ids]
+    return doc_ids[kept], term_ids[kept], len(vocabulary)
+
+
+# ============================ #
+# 🧮 FEATURES                  #
+# ============================ #
+
+def relevance(texts: list, contexts: list, context_index=None):
+    """TF-IDF cosine of each text with its context (`contexts[context_index[i]]`, default 0).
+
+    IDF comes from the whole batch (texts and contexts). Returns an array aligned with `texts`.
+    """
+    np = _numpy()
+    n_texts = len(texts)
+    context_index = np.zeros(n_texts, dtype=np.int64) if context_index is None else np.asarray(context_index, dtype=np.int64)
+
+    doc_ids, term_ids, n_terms = _terms(list(texts) + list(contexts))
+    if not len(term_ids):
+        return np.zeros(n_texts)
+
+    n_docs = n_texts + len(contexts)
+    # One sorted (document, term) key per distinct pair: the sparse term-count matrix
+    keys, counts = np.unique(doc_ids * n_terms + term_ids, return_counts=True)
+    doc_of, term_of = np.divmod(keys, n_terms)
+    idf = np.log((1 + n_docs) / (1 + np.bincount(term_of, minlength=n_terms))) + 1
+    weights = (1 + np.log(counts)) * idf[term_of]  # Sublinear term frequency
+    norms = np.sqrt(np.bincount(doc_of, weights ** 2, minlength=n_docs))
+
+    # Dot products: look each text's (context, term) pair up among the context entries
+    in_context = doc_of >= n_texts
+    context_keys = (doc_of[in_context] - n_texts) * n_terms + term_of[in_context]  # Still sorted
+    context_weights = weights[in_context]
+    in_text = ~in_context
+    dots = np.zeros(n_texts)
+    if len(context_keys):
+        lookup = context_index[doc_of[in_text]] * n_terms + term_of[in_text]
+        position = np.minimum(np.searchsorted(context_keys, lookup), len(context_keys) - 1)
+        shared = context_keys[position] == lookup
+        dots = np.bincount(doc_of[in_text], np.where(shared, weights[in_text] * context_weights[position], 0.0),
+                           minlength=n_texts)
+    denominator = norms[:n_texts] * norms[n_texts + context_index]
+    return np.divide(dots, denominator, out=np.zeros(n_texts), where=denominator > 0)
+
+
+def engagement(stats: list):
+    """log(1 + weighted interactions) / log(1 + ENGAGEMENT_SCALE), capped at 1."""
+    np = _numpy()
+    counts = np.array([[(entry or {}).get(key, 0) or 0 for key in ENGAGEMENT_WEIGHTS] for entry in stats], dtype=float)
+    weighted = counts.reshape(len(stats), len(ENGAGEMENT_WEIGHTS)) @ np.array(list(ENGAGEMENT_WEIGHTS.values()))
+    return np.minimum(np.log1p(weighted) / math.log1p(ENGAGEMENT_SCALE), 1.0)
+
+
+def freshness(timestamps: list, now: float):
+    np = _numpy()
+    ages = np.array([now - timestamp if timestamp else np.nan for timestamp in timestamps], dtype=float)
+    return np.where(np.isnan(ages), 0.5, np.exp2(-np.maximum(np.nan_to_num(ages), 0) / FRESHNESS_HALF_LIFE))
+
+
+# ============================ #
+# 🏆 SCORING & PICKING         #
+# ============================ #
+
+def score(candidates: list, contexts: list, context_index=None, now: float = None) -> dict:
+    """Scores parsed timeline items (`tweet_text`, `timestamp`, `stats`) in one batch.
+
+    Candidate i is compared with `contexts[context_index[i]]` (default: all with
+    contexts[0]). Returns {"score": array, "relevance": array, "engagement": array,
+    "freshness": array}, aligned with `candidates`.
+    """
+    now = time.time() if now is None else now
+    features = {
+        "relevance": relevance([candidate["tweet_text"] for candidate in candidates], contexts, context_index),
+        "engagement": engagement([candidate.get("stats") for candidate in candidates]),
+        "freshness": freshness([candidate.get("timestamp") for candidate in candidates], now),
+    }
+    features["score"] = sum(WEIGHTS[name] * values for name, values in features.items())
+    return features
+
+
+def rank(candidates: list, context: str, now: float = None) -> list:
+    """`candidates` best first for `context`: by score, or the FALLBACK_POOL newest in random order without NumPy."""
+    if not candidates:
+        return []
+    if _numpy() is None:
+        head = random.sample(candidates[:FALLBACK_POOL], min(len(candidates), FALLBACK_POOL))
+        return head + candidates[FALLBACK_POOL:]
+
+    features = score(candidates, [context], now=now)
+    order = features["score"].argsort()[::-1]
+    best = int(order[0])
+    logging.info(
+        f"🎯 Best of {len(candidates)}: {candidates[best]['username']}, score {features['score'][best]:.2f} "
+        f"(relevance {features['relevance'][best]:.2f}, engagement {features['engagement'][best]:.2f}, "
+        f"freshness {features['freshness'][best]:.2f})"
+    )
+    return [candidates[index] for index in order]
@@ -1,25 +1,327 @@
 import os
 import logging
-from configparser import ConfigParser
+import threading
+from configparser import ConfigParser, Error as ConfigParserError
+from dataclasses import dataclass, field, replace
+import http_client
+import scheduler
+import seen_index
 
 # ============================ #
 # 🚀 LOADING & PARSING CONFIG  #
 # ============================ #
 
-def ensure_utf8_config(file_path: str) -> None:
-    """Ensures the config.ini file is UTF-8 encoded."""
-    with open(file_path, 'r', encoding='ascii', errors='ignore') as f:
-        content = f.read()
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
-
-def load_config() -> ConfigParser:
-    """Loads the configuration from config.ini."""
-    base_path = os.path.dirname(__file__)
-    config_path = os.path.join(base_path, 'config.ini')
-    ensure_utf8_config(config_path)
-    
-    config = ConfigParser(interpolation=None)
-    config.read(config_path, encoding='utf-8')
-    
-    return config
+# config.ini is parsed and validated into a frozen `Settings` snapshot, cached per
+# path and keyed by the file's mtime/size (plus the environment overrides), so a
+# repeated load costs one stat call: the daemon calls `load_settings` before every
+# cycle and reconfigures itself only when the file changed. The file is only ever
+# read, never rewritten.
+#
+# Environment overrides beat the file:
+#   PIGEONCALL_<SECTION>_<KEY>, e.g. PIGEONCALL_GROKAI_API_KEY or
+#   PIGEONCALL_TWITTER_ALICE_API_KEY for [Twitter:alice]
+#   and the names the Grok v1 script reads (TWITTER_CONSUMER_KEY, GROK_API_KEY, ...).
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.ini")
+ENV_PREFIX = "PIGEONCALL_"
+ENV_ALIASES = {
+    "TWITTER_CONSUMER_KEY": ("Twitter", "API_KEY"),
+    "TWITTER_CONSUMER_SECRET": ("Twitter", "API_KEY_SECRET"),
+    "TWITTER_ACCESS_TOKEN": ("Twitter", "ACCESS_TOKEN"),
+    "TWITTER_ACCESS_TOKEN_SECRET": ("Twitter", "ACCESS_TOKEN_SECRET"),
+    "GROK_API_KEY": ("GrokAI", "API_KEY"),
+    "TOGETHER_API_KEY": ("TogetherAI", "API_KEY"),
+    "GEMINI_API_KEY": ("Gemini", "API_KEY"),
+}
+PLACEHOLDERS = ("XXXXX", "[YOUR", "NOT USED", "MANDATORY")  # Values shipped in the example config.ini
+
+# Options the modules read straight from the parser (see botty.configure_runtime).
+# They are only checked here, so a typo is a ConfigError at load time instead of a
+# ValueError halfway through reconfiguring the clients.
+_CHOICES = {
+    ("Router", "MODE"): ("hedged", "failover", "single"),
+    ("Nitter", "MODE"): ("sequential", "concurrent"),
+    ("Nitter", "PARSER"): ("auto", "lxml", "strainer", "bs4"),
+    ("Metrics", "FORMAT"): ("prometheus", "json"),
+    ("Logging", "ROTATE"): ("size", "time"),
+}
+_NUMBERS = {  # (section, key) -> (kind, minimum, maximum)
+    ("Accounts", "WORKERS"): (int, 1, None),
+    ("Router", "HEDGE_PERCENTILE"): (float, 0, 1),
+    ("Router", "DEFAULT_HEDGE_DELAY"): (float, 0, None),
+    ("Nitter", "DEADLINE"): (float, 0.1, None),
+    ("Nitter", "RACE_WIDTH"): (int, 1, None),
+    ("Nitter", "SCAN"): (int, 1, None),
+    ("Nitter", "PAGE_CACHE_TTL"): (float, 0, None),
+    ("Nitter", "POOL_MAX_AGE"): (float, 0, None),
+    ("Nitter", "POOL_SIZE"): (int, 0, None),
+    ("Nitter", "POOL_MIN_OVERLAP"): (float, 0, 1),
+    ("Nitter", "SCORE_RELEVANCE"): (float, 0, None),
+    ("Nitter", "SCORE_ENGAGEMENT"): (float, 0, None),
+    ("Nitter", "SCORE_FRESHNESS"): (float, 0, None),
+    ("Nitter", "FRESHNESS_HALF_LIFE"): (float, 1, None),
+    ("Nitter", "FAILURE_THRESHOLD"): (int, 1, None),
+    ("Nitter", "COOLDOWN"): (float, 0, None),
+    ("Cache", "MAX_ENTRIES"): (int, 0, None),
+    ("Cache", "GROK_TTL"): (float, 0, None),
+    ("Cache", "FORCE_REFRESH"): (bool, None, None),
+    ("TogetherAI", "STREAM"): (bool, None, None),
+    ("RateLimit", "PER_15MIN"): (int, 0, None),
+    ("RateLimit", "DAILY"): (int, 0, None),
+    ("RateLimit", "MONTHLY"): (int, 0, None),
+    ("Metrics", "ENABLED"): (bool, None, None),
+    ("Profile", "SAMPLE_HZ"): (float, 0, None),
+    ("Profile", "DAEMON_SAMPLE_HZ"): (float, 0, None),
+    ("Profile", "DAEMON_DETERMINISTIC"): (bool, None, None),
+    ("Profile", "TOP_ALLOCATIONS"): (int, 0, None),
+    ("Dedup", "USER_COOLDOWN"): (float, 0, None),
+    ("Dedup", "TOPIC_COOLDOWN"): (float, 0, None),
+    ("Dedup", "NEAR_DUPLICATE_DISTANCE"): (int, 0, seen_index.SIMHASH_BANDS - 1),
+    ("Outbox", "MAX_ATTEMPTS"): (int, 1, None),
+    ("Outbox", "RETRY_BACKOFF"): (float, 0, None),
+    ("Outbox", "MAX_AGE"): (float, 0, None),
+    ("Queue", "ENABLED"): (bool, None, None),
+    ("Queue", "FALLBACK_INLINE"): (bool, None, None),
+    ("Queue", "REPLY_TTL"): (float, 1, None),
+    ("Queue", "ORIGINAL_TTL"): (float, 1, None),
+    ("Queue", "DEPTH"): (int, 0, None),
+    ("Prompts", "TOKEN_BUDGET"): (int, 0, None),
+    ("Batch", "SPACING"): (float, 0, None),
+    ("Logging", "MAX_BYTES"): (int, 0, None),
+    ("Logging", "BACKUP_COUNT"): (int, 0, None),
+    ("Logging", "COMPRESS"): (bool, None, None),
+    ("Logging", "MAX_FIELD_CHARS"): (int, 0, None),
+    ("Logging", "DEBUG_SAMPLE_RATE"): (float, 0, 1),
+}
+
+_snapshots = {}  # path -> (fingerprint, Settings)
+_snapshots_lock = threading.Lock()
+
+
+class ConfigError(ValueError):
+    """config.ini is missing, unreadable or has invalid values."""
+
+
+@dataclass(frozen=True)
+class TwitterSettings:
+    api_key: str = ""
+    api_key_secret: str = ""
+    access_token: str = ""
+    access_token_secret: str = ""
+    bearer_token: str = ""
+
+
+@dataclass(frozen=True)
+class AISettings:
+    """[GrokAI] / [TogetherAI] / [Gemini]: `model` and `timeout` are None when the module default applies."""
+    api_key: str = ""
+    model: str = None
+    timeout: float = None
+
+
+@dataclass(frozen=True)
+class GeminiSettings(AISettings):
+    """[Gemini]: like AISettings; None again means the gemini_api default."""
+    retries: int = None
+    cache_ttl: float = None
+    grounded: bool = None
+    topics: bool = False  # Topic discovery through Gemini instead of GrokAI
+
+
+@dataclass(frozen=True)
+class HTTPSettings:
+    pool_connections: int = http_client.DEFAULT_POOL_CONNECTIONS
+    pool_maxsize: int = http_client.DEFAULT_POOL_MAXSIZE
+    retries: int = http_client.DEFAULT_RETRIES
+    backoff_factor: float = http_client.DEFAULT_BACKOFF_FACTOR
+    timeout: float = http_client.DEFAULT_TIMEOUT
+
+
+@dataclass(frozen=True)
+class DaemonSettings:
+    posts_per_day: float = scheduler.DEFAULT_POSTS_PER_DAY
+    jitter: float = scheduler.DEFAULT_JITTER
+    batch_size: int = 1
+
+
+@dataclass(frozen=True)
+class Settings:
+    path: str
+    parser: ConfigParser = field(repr=False, compare=False)  # Every section, overrides applied
+    twitter: TwitterSettings
+    grok: AISettings
+    together: AISettings
+    gemini: GeminiSettings
+    http: HTTPSettings
+    daemon: DaemonSettings
+    warnings: tuple = ()  # Non-fatal problems, logged once logging is set up
+
+
+def _env_overrides(environ=None) -> dict:
+    """{(section, key): value} from PIGEONCALL_* variables and the Grok v1 aliases."""
+    environ = os.environ if environ is None else environ
+    overrides = {}
+    for name, (section, key) in ENV_ALIASES.items():
+        if environ.get(name):
+            overrides[(section, key)] = environ[name]
+    for name, value in environ.items():
+        if name.startswith(ENV_PREFIX) and len(name) > len(ENV_PREFIX):
+            overrides[(None, name[len(ENV_PREFIX):])] = value
+    return overrides
+
+
+def _apply_overrides(parser: ConfigParser, overrides: dict) -> None:
+    known = set(parser.sections()) | {section for section, _ in ENV_ALIASES.values()}
+    by_env_name = {section.upper().replace(":", "_") + "_": section for section in known}
+    for (section, key), value in overrides.items():
+        if section is None:
+            # PIGEONCALL_<SECTION>_<KEY>: the longest matching section wins ([Twitter:alice] over [Twitter])
+            matches = [prefix for prefix in by_env_name if key.startswith(prefix) and len(key) > len(prefix)]
+            if not matches:
+                continue
+            prefix = max(matches, key=len)
+            section, key = by_env_name[prefix], key[len(prefix):]
+        if not parser.has_section(section):
+            parser.add_section(section)
+        parser.set(section, key, value)
+
+
+def _read(parser: ConfigParser, section: str, key: str, kind, default, errors: list, minimum=None, maximum=None):
+    """Typed option value; bad values are collected in `errors` and replaced by `default`."""
+    raw = parser.get(section, key, fallback="").strip()
+    if not raw:
+        return default
+    try:
+        if kind is bool:
+            value = parser.getboolean(section, key)
+        else:
+            value = kind(raw)
+    except ValueError:
+        errors.append(f"[{section}] {key} = {raw!r} is not a valid {kind.__name__}")
+        return default
+    if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+        bounds = f">= {minimum}" if maximum is None else f"between {minimum} and {maximum}"
+        errors.append(f"[{section}] {key} = {raw!r} must be {bounds}")
+        return default
+    return value
+
+
+def _ai_settings(parser: ConfigParser, section: str, errors: list) -> AISettings:
+    return AISettings(
+        api_key=parser.get(section, "API_KEY", fallback="").strip(),
+        model=parser.get(section, "MODEL", fallback="").strip() or None,
+        timeout=_read(parser, section, "TIMEOUT", float, None, errors, minimum=0.1),
+    )
+
+
+def _gemini_settings(parser: ConfigParser, errors: list) -> GeminiSettings:
+    ai = _ai_settings(parser, "Gemini", errors)
+    return GeminiSettings(
+        api_key=ai.api_key,
+        model=ai.model,
+        timeout=ai.timeout,
+        retries=_read(parser, "Gemini", "RETRIES", int, None, errors, minimum=0),
+        cache_ttl=_read(parser, "Gemini", "CACHE_TTL", float, None, errors, minimum=0),
+        grounded=_read(parser, "Gemini", "GROUNDED", bool, None, errors),
+        topics=_read(parser, "Gemini", "TOPICS", bool, False, errors),
+    )
+
+
+def _check_runtime_options(parser: ConfigParser, errors: list) -> None:
+    """Collects invalid values of the `_CHOICES` / `_NUMBERS` options (and [Prompts] BUDGET_*) in `errors`."""
+    for (section, key), choices in _CHOICES.items():
+        value = parser.get(section, key, fallback="").strip()
+        if value and value not in choices:
+            errors.append(f"[{section}] {key} = {value!r} must be one of {', '.join(choices)}")
+    for (section, key), (kind, minimum, maximum) in _NUMBERS.items():
+        _read(parser, section, key, kind, None, errors, minimum, maximum)
+    if parser.has_section("Prompts"):
+        for key in parser.options("Prompts"):
+            if key.startswith("budget_"):
+                _read(parser, "Prompts", key.upper(), int, None, errors, minimum=0)
+
+
+def is_placeholder(value: str) -> bool:
+    """True for empty values and the placeholders shipped in the example config.ini."""
+    return not value or any(marker in value.upper() for marker in PLACEHOLDERS)
+
+
+def parse_settings(parser: ConfigParser, path: str = None) -> Settings:
+    """Validates a parsed config into `Settings`. Raises ConfigError listing every invalid value."""
+    errors = []
+    settings = Settings(
+        path=path,
+        parser=parser,
+        twitter=TwitterSettings(**{
+            key: parser.get("Twitter", key.upper(), fallback="").strip()
+            for key in ("api_key", "api_key_secret", "access_token", "access_token_secret", "bearer_token")
+        }),
+        grok=_ai_settings(parser, "GrokAI", errors),
+        together=_ai_settings(parser, "TogetherAI", errors),
+        gemini=_gemini_settings(parser, errors),
+        http=HTTPSettings(
+            pool_connections=_read(parser, "HTTP", "POOL_CONNECTIONS", int, HTTPSettings.pool_connections, errors, minimum=1),
+            pool_maxsize=_read(parser, "HTTP", "POOL_MAXSIZE", int, HTTPSettings.pool_maxsize, errors, minimum=1),
+            retries=_read(parser, "HTTP", "RETRIES", int, HTTPSettings.retries, errors, minimum=0),
+            backoff_factor=_read(parser, "HTTP", "BACKOFF_FACTOR", float, HTTPSettings.backoff_factor, errors, minimum=0),
+            timeout=_read(parser, "HTTP", "TIMEOUT", float, HTTPSettings.timeout, errors, minimum=0.1),
+        ),
+        daemon=DaemonSettings(
+            posts_per_day=_read(parser, "Daemon", "POSTS_PER_DAY", float, DaemonSettings.posts_per_day, errors, minimum=0.001),
+            jitter=_read(parser, "Daemon", "JITTER", float, DaemonSettings.jitter, errors, minimum=0, maximum=1),
+            batch_size=_read(parser, "Daemon", "BATCH_SIZE", int, DaemonSettings.batch_size, errors, minimum=1),
+        ),
+    )
+    _check_runtime_options(parser, errors)
+    if errors:
+        raise ConfigError(f"Invalid config {path or ''}: " + "; ".join(errors))
+
+    warnings = [
+        f"[{section}] API_KEY is not set (still a placeholder)."
+        for section, ai in (("GrokAI", settings.grok), ("TogetherAI", settings.together))
+        if is_placeholder(ai.api_key)
+    ]
+    if settings.gemini.topics and is_placeholder(settings.gemini.api_key):
+        warnings.append("[Gemini] TOPICS is on but API_KEY is not set; topics come from GrokAI.")
+    return replace(settings, warnings=tuple(warnings))
+
+
+def load_settings(config_path: str = None) -> Settings:
+    """Returns the validated snapshot of config.ini (or `config_path`).
+
+    Re-parses only when the file's mtime or size, or an override, changed.
+    """
+    path = os.path.abspath(config_path or DEFAULT_CONFIG_PATH)
+    try:
+        stat = os.stat(path)
+    except OSError as e:
+        raise ConfigError(f"Cannot read config {path}: {e}") from e
+    overrides = _env_overrides()
+    fingerprint = (stat.st_mtime_ns, stat.st_size, tuple(sorted(overrides.items(), key=repr)))
+    with _snapshots_lock:
+        cached = _snapshots.get(path)
+    if cached and cached[0] == fingerprint:
+        return cached[1]
+
+    parser = ConfigParser(interpolation=None)
+    try:
+        # utf-8-sig also accepts files saved with a BOM by Windows editors
+        with open(path, "r", encoding="utf-8-sig") as f:
+            parser.read_file(f, source=path)
+    except UnicodeDecodeError as e:
+        raise ConfigError(f"Config {path} is not valid UTF-8 ({e}); save it as UTF-8.") from e
+    except (OSError, ConfigParserError) as e:
+        raise ConfigError(f"Cannot parse config {path}: {e}") from e
+    _apply_overrides(parser, overrides)
+
+    settings = parse_settings(parser, path)
+    with _snapshots_lock:
+        _snapshots[path] = (fingerprint, settings)
+    if cached:
+        logging.info(f"🔄 Reloaded changed config {path}.")
+    return settings
+
+
+def load_config(config_path: str = None) -> ConfigParser:
+    """Loads the configuration from config.ini (or `config_path`), overrides applied."""
+    return load_settings(config_path).parser
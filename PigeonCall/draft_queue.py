@@ -0,0 +1,203 @@
+import logging
+import sqlite3
+import time
+import metrics
+from utils import state_path, sqlite_connect
+
+# ============================ #
+# 📥 PRE-GENERATED DRAFTS      #
+# ============================ #
+
+# Persistent queue of ready-to-post tweets, so the slow Grok / Nitter / LLM work
+# can run ahead of time (`botty.py --produce`, or right after a daemon post) and
+# the posting step only pops a draft and calls the Twitter API.
+#
+# Every draft carries its target (tweet ID / username, or the topic) and expires
+# after a TTL: replies go stale quickly (counted from when the target tweet was
+# posted), original tweets about a topic less so.
+# Expired replies are dropped; expired originals are handed back by `prune` so
+# their text can be regenerated for the same topic without a new Grok call.
+
+QUEUE_FILE = "draft_queue.sqlite3"
+REPLY_TTL = 2 * 3600      # A reply to a tweet older than this looks out of place
+ORIGINAL_TTL = 12 * 3600  # Topic tweets stay relevant longer
+TARGET_DEPTH = 3          # Drafts the producer keeps ready per account
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS drafts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    account TEXT NOT NULL,
+    text TEXT NOT NULL,
+    tweet_id TEXT,
+    username TEXT,
+    context TEXT,
+    additional_context TEXT,
+    is_reply INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS drafts_account_created ON drafts (account, created_at);
+"""
+
+_queue_path = None
+
+
+def configure(reply_ttl: float = None, original_ttl: float = None, target_depth: int = None, path: str = None) -> None:
+    global REPLY_TTL, ORIGINAL_TTL, TARGET_DEPTH, _queue_path
+    if reply_ttl is not None:
+        REPLY_TTL = reply_ttl
+    if original_ttl is not None:
+        ORIGINAL_TTL = original_ttl
+    if target_depth is not None:
+        TARGET_DEPTH = max(target_depth, 0)
+    if path is not None:
+        _queue_path = path
+
+
+def _connect():
+    return sqlite_connect(_queue_path or state_path(QUEUE_FILE), _SCHEMA)
+
+
+_COLUMNS = ("id", "account", "text", "tweet_id", "username", "context", "additional_context", "is_reply",
+            "created_at", "expires_at")
+
+
+def _as_draft(row) -> dict:
+    draft = dict(zip(_COLUMNS, row))
+    draft["is_reply"] = bool(draft["is_reply"])
+    return draft
+
+
+# ============================ #
+# 📝 PRODUCER SIDE             #
+# ============================ #
+
+def expires_at(is_reply: bool, now: float = None, posted_at: float = None) -> float:
+    """When a draft written `now` stops being postable.
+
+    A reply expires REPLY_TTL after the tweet it answers was posted (`posted_at`),
+    not after the draft was written, so a pooled tweet cannot go stale in the queue.
+    """
+    now = time.time() if now is None else now
+    if is_reply:
+        return min(now, posted_at or now) + REPLY_TTL
+    return now + ORIGINAL_TTL
+
+
+def push(account: str, text: str, context: str, is_reply: bool, tweet_id: str = None, username: str = None,
+         additional_context: str = None, now: float = None, posted_at: float = None):
+    """Queues a generated tweet for `account`. Returns the draft id, or None if it could not be
+    stored or would already be expired (see `expires_at`)."""
+    now = time.time() if now is None else now
+    expires = expires_at(is_reply, now, posted_at)
+    if expires <= now:
+        logging.warning(f"⚠️ Not queueing a reply to tweet {tweet_id}: it is older than the {REPLY_TTL:g}s reply TTL.")
+        return None
+    try:
+        with _connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO drafts (account, text, tweet_id, username, context, additional_context, is_reply, "
+                "created_at, expires_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (account, text, str(tweet_id) if tweet_id else None, username, context,
+                 additional_context if isinstance(additional_context, str) else None, int(bool(is_reply)), now, expires),
+            )
+            return cursor.lastrowid
+    except sqlite3.Error as e:
+        logging.warning(f"⚠️ Draft queue write failed: {e}")
+        return None
+
+
+def queued_targets(account: str = None) -> set:
+    """Tweet IDs that already have a queued reply (for any account unless given)."""
+    try:
+        with _connect() as conn:
+            if account is None:
+                rows = conn.execute("SELECT tweet_id FROM drafts WHERE tweet_id IS NOT NULL")
+            else:
+                rows = conn.execute("SELECT tweet_id FROM drafts WHERE tweet_id IS NOT NULL AND account = ?", (account,))
+            return {row[0] for row in rows}
+    except sqlite3.Error as e:
+        logging.warning(f"⚠️ Draft queue read failed: {e}")
+        return set()
+
+
+def prune(account: str = None, now: float = None) -> list:
+    """Deletes expired drafts. Returns the expired originals, which are worth regenerating."""
+    now = time.time() if now is None else now
+    where, params = "expires_at <= ?", [now]
+    if account is not None:
+        where, params = where + " AND account = ?", params + [account]
+    try:
+        with _connect() as conn:
+            expired = [_as_draft(row) for row in conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM drafts WHERE {where}", params)]
+            conn.execute(f"DELETE FROM drafts WHERE {where}", params)
+    except sqlite3.Error as e:
+        logging.warning(f"⚠️ Draft queue prune failed: {e}")
+        return []
+    if expired:
+        replies = sum(1 for draft in expired if draft["is_reply"])
+        logging.info(f"🗑 Dropped {len(expired)} expired draft(s) ({replies} stale replies).")
+    return [draft for draft in expired if not draft["is_reply"]]
+
+
+# ============================ #
+# 📤 CONSUMER SIDE             #
+# ============================ #
+
+def pop(account: str, now: float = None):
+    """Removes and returns the freshest unexpired draft of `account`, or None if there is none.
+
+    The select and delete run in one write transaction, so two processes never
+    pop the same draft.
+    """
+    now = time.time() if now is None else now
+    try:
+        with _connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM drafts WHERE account = ? AND expires_at > ? "
+                "ORDER BY created_at DESC LIMIT 1",
+                (account, now),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("DELETE FROM drafts WHERE id = ?", (row[0],))
+    except sqlite3.Error as e:
+        logging.warning(f"⚠️ Draft queue read failed: {e}")
+        return None
+    draft = _as_draft(row)
+    logging.info(f"📤 Popped draft {draft['id']} ({(now - draft['created_at']) / 60:.1f} min old).")
+    return draft
+
+
+# ============================ #
+# 📊 DEPTH & AGE               #
+# ============================ #
+
+def stats(account: str, now: float = None) -> dict:
+    """depth (unexpired drafts), oldest and newest draft age in seconds (None when empty)."""
+    now = time.time() if now is None else now
+    try:
+        with _connect() as conn:
+            depth, oldest, newest = conn.execute(
+                "SELECT COUNT(*), MIN(created_at), MAX(created_at) FROM drafts WHERE account = ? AND expires_at > ?",
+                (account, now),
+            ).fetchone()
+    except sqlite3.Error as e:
+        logging.warning(f"⚠️ Draft queue read failed: {e}")
+        return {"depth": 0, "oldest_age": None, "newest_age": None}
+    return {
+        "depth": depth,
+        "oldest_age": now - oldest if oldest is not None else None,
+        "newest_age": now - newest if newest is not None else None,
+    }
+
+
+def report(account: str) -> dict:
+    """Logs and exports (as gauges) the queue depth and draft ages of `account`."""
+    current = stats(account)
+    oldest = f"{current['oldest_age'] / 60:.0f} min" if current["oldest_age"] is not None else "n/a"
+    logging.info(f"📥 Draft queue: {current['depth']}/{TARGET_DEPTH} ready, oldest {oldest}.")
+    metrics.gauge("draft_queue_depth", current["depth"], account=account)
+    metrics.gauge("draft_queue_oldest_age_seconds", current["oldest_age"] or 0, account=account)
+    return current
@@ -1,8 +1,17 @@
-from bs4 import BeautifulSoup
-import requests
+import json
 import logging
+import queue
 import random
+import threading
+import time
 import urllib.parse
+import candidate_pool
+import http_client
+import metrics
+import nitter_health
+import response_cache
+import seen_index
+from nitter_parser import parse_timeline, scan_timeline_items
 
 # ✅ Restored full list of valid Nitter instances
 NITTER_INSTANCES = [
@@ -12,67 +21,319 @@ NITTER_INSTANCES = [
     "https://nitter.privacydev.net"
 ]
 
-def fetch_nitter_results(topic: str):
-    """Fetch tweets from Nitter based on a topic and extract tweet ID, text & username."""
+# ✅ Restored User-Agent randomization to prevent blocking
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.1 Safari/605.1.15",
+    "Mozilla/5.0 (X11; Linux x86_64; rv:89.0) Gecko/20100101 Firefox/89.0"
+]
 
-    if not topic or topic.strip() == "":
-        logging.error("❌ No topic provided for Nitter search.")
-        return None, None, None
+INSTANCE_TIMEOUT = None  # Per-instance request timeout (seconds; None = [HTTP] TIMEOUT)
+NITTER_MODE = "sequential"  # "sequential" or "concurrent"
+NITTER_DEADLINE = 25    # Overall deadline for a concurrent search (seconds)
+RACE_WIDTH = 4          # Healthiest instances raced at once in concurrent mode
+CANDIDATE_SCAN = 20     # Timeline items parsed per page; all of them go into the candidate pool
+PAGE_CACHE_TTL = 6 * 3600  # Pages sent with an ETag / Last-Modified are revalidated (not re-downloaded) this long
+READ_CHUNK = 16384
 
-    search_query = urllib.parse.quote(topic)
+_transfer = {}  # instance -> page / byte counters for this process
+_transfer_lock = threading.Lock()
 
-    for instance in NITTER_INSTANCES:
-        search_url = f"{instance}/search?f=tweets&q={search_query}"
-        logging.info(f"🔍 Searching Nitter: {search_url}")
 
-        # ✅ Restored User-Agent randomization to prevent blocking
-        user_agents = [
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/14.1.1 Safari/605.1.15",
-            "Mozilla/5.0 (X11; Linux x86_64; rv:89.0) Gecko/20100101 Firefox/89.0"
-        ]
-        headers = {
-            "User-Agent": random.choice(user_agents),
-            "Accept-Language": "en-US,en;q=0.9",
-        }
+class _Cancelled(Exception):
+    """Raised inside a worker when another instance already won the race."""
+
+
+def configure(mode: str = None, deadline: float = None, race_width: int = None) -> None:
+    """Sets the default search mode, overall deadline and fan-out for concurrent searches."""
+    global NITTER_MODE, NITTER_DEADLINE, RACE_WIDTH
+    if mode is not None:
+        if mode not in ("sequential", "concurrent"):
+            raise ValueError(f"Unknown Nitter search mode: {mode}")
+        NITTER_MODE = mode
+    if deadline is not None:
+        NITTER_DEADLINE = deadline
+    if race_width is not None:
+        RACE_WIDTH = race_width
+
+
+# ============================ #
+# 🔍 SINGLE INSTANCE SEARCH    #
+# ============================ #
+
+def _accept_encoding() -> str:
+    # What urllib3 can decode here: gzip and deflate, plus br when brotli is installed
+    from urllib3.util.request import ACCEPT_ENCODING
+    return ACCEPT_ENCODING
+
+
+def _record_transfer(instance: str, wire_bytes: int, page_bytes: int, not_modified: bool = False, capped: bool = False) -> None:
+    with _transfer_lock:
+        stats = _transfer.setdefault(instance, {"pages": 0, "wire_bytes": 0, "page_bytes": 0, "not_modified": 0, "capped": 0})
+        stats["pages"] += 1
+        stats["wire_bytes"] += wire_bytes
+        stats["page_bytes"] += page_bytes
+        stats["not_modified"] += not_modified
+        stats["capped"] += capped
+
 
+def transfer_stats() -> dict:
+    """Per instance: pages fetched, bytes on the wire, decoded page bytes, 304s and capped reads."""
+    with _transfer_lock:
+        return {instance: dict(stats) for instance, stats in _transfer.items()}
+
+
+def log_transfer_stats() -> None:
+    for instance, stats in transfer_stats().items():
+        logging.info(
+            f"📦 {instance}: {stats['pages']} pages, {stats['wire_bytes'] / 1024:.1f} KiB on the wire for "
+            f"{stats['page_bytes'] / 1024:.1f} KiB of HTML, {stats['not_modified']} not modified, {stats['capped']} cut short"
+        )
+
+
+def _download(search_url: str, timeout: float, cancelled: threading.Event = None, instance: str = None) -> str:
+    """Downloads a search page, compressed, and stops reading once CANDIDATE_SCAN items arrived.
+
+    Pages sent with an ETag / Last-Modified are kept in the response cache and
+    revalidated with If-None-Match / If-Modified-Since; a 304 reuses the stored
+    page. Aborts mid-body if `cancelled` gets set.
+    """
+    headers = {
+        "User-Agent": random.choice(USER_AGENTS),
+        "Accept-Language": "en-US,en;q=0.9",
+        "Accept-Encoding": _accept_encoding(),
+    }
+    page_key = response_cache.cache_key("nitter_page", search_url)
+    cached = response_cache.get(page_key, PAGE_CACHE_TTL)
+    cached = json.loads(cached) if cached else None
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    with http_client.get(search_url, headers=headers, timeout=timeout, stream=True) as response:
+        if response.status_code == 304 and cached:
+            metrics.annotate(bytes=response.raw.tell())
+            _record_transfer(instance or search_url, response.raw.tell(), 0, not_modified=True)
+            logging.info(f"♻️ {instance or search_url} page not modified; reusing the cached copy.")
+            return cached["page"]
+        response.raise_for_status()
+
+        # The first CANDIDATE_SCAN items are all we parse; the next item's start bounds the last one
+        body = bytearray()
+        items, scanned, capped = 0, 0, False
         try:
-            response = requests.get(search_url, headers=headers, timeout=20)
-            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=READ_CHUNK):
+                if cancelled is not None and cancelled.is_set():
+                    raise _Cancelled()
+                body += chunk
+                found, scanned = scan_timeline_items(body, scanned)
+                items += found
+                if items > CANDIDATE_SCAN:
+                    capped = True
+                    break
+        finally:
+            wire_bytes = response.raw.tell()  # Compressed bytes actually received
+            metrics.annotate(bytes=wire_bytes)
+        page = body.decode(response.encoding or "utf-8", errors="replace")
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+
+    _record_transfer(instance or search_url, wire_bytes, len(body), capped=capped)
+    logging.debug(f"📦 {instance or search_url}: {wire_bytes} bytes on the wire, {len(body)} bytes of HTML"
+                  f"{' (stopped early)' if capped else ''}.")
+    if etag or last_modified:
+        response_cache.put(page_key, json.dumps({"etag": etag, "last_modified": last_modified, "page": page}))
+    return page
+
+
+def _select_tweet(page: str, topic: str = None, context: str = None, cancelled: threading.Event = None,
+                  max_age: float = None):
+    """Claims the unseen tweet on a search page that best fits `context` (see candidate_scoring).
+
+    Every parsed item is pooled under `topic` for later searches. A race loser stops
+    before claiming, so it does not use up a tweet nobody replies to.
+    """
+    with metrics.span("nitter_parse"):
+        tweet_candidates = [
+            item for item in parse_timeline(page, limit=CANDIDATE_SCAN)
+            if item["tweet_text"] and item["tweet_id"] and item["username"]
+        ]
+    if topic:
+        candidate_pool.add(topic, tweet_candidates)
+    # ✅ Skip tweets we already replied to and users on cooldown before choosing
+    tweet_candidates = seen_index.filter_candidates(tweet_candidates)
+    if cancelled is not None and cancelled.is_set():
+        raise _Cancelled()
+
+    # ✅ Rank all unseen tweets by relevance, engagement and freshness; skip any another worker just took
+    selected_tweet = candidate_pool.claim_best(tweet_candidates, context or topic, topic or "", max_age=max_age)
+    if selected_tweet is None:
+        return None, None, None, None
+    return selected_tweet["tweet_text"], selected_tweet["tweet_id"], selected_tweet["username"], selected_tweet.get("timestamp")
 
-            if not response.text.strip():
+
+def _search_instance(instance: str, search_query: str, topic: str, timeout: float = None,
+                     cancelled: threading.Event = None, context: str = None, max_age: float = None):
+    """Searches one instance. Returns (tweet_text, tweet_id, username, posted_at) or None."""
+    search_url = f"{instance}/search?f=tweets&q={search_query}"
+    logging.info(f"🔍 Searching Nitter: {search_url}")
+
+    with metrics.span("nitter_instance", instance=instance) as span:
+        try:
+            page = _download(search_url, timeout or INSTANCE_TIMEOUT, cancelled, instance)
+            if not page.strip():
                 logging.error(f"❌ {instance} returned an empty response.")
-                continue
+                span.annotate(outcome="empty")
+                return None
+            tweet_text, tweet_id, username, posted_at = _select_tweet(page, topic, context, cancelled, max_age)
+        except _Cancelled:
+            span.annotate(outcome="cancelled")
+            raise
+
+        if not (tweet_text and tweet_id and username):
+            logging.warning(f"⚠️ No tweets found on {instance} for topic: {topic}")
+            span.annotate(outcome="empty")
+            return None
+
+        return tweet_text, tweet_id, username, posted_at
+
+
+def _record_health(instance: str, outcome: str, elapsed: float) -> None:
+    """Feeds a search outcome into the persisted instance health scores."""
+    if outcome == "ok":
+        nitter_health.record_success(instance, elapsed)
+    elif outcome in ("empty", "error"):
+        nitter_health.record_failure(instance, elapsed, reason=outcome)
+
+
+# ============================ #
+# 🏁 CONCURRENT INSTANCE RACE  #
+# ============================ #
+
+def race_nitter_instances(topic: str, deadline: float = None, context: str = None, max_age: float = None) -> dict:
+    """Sends the search to every instance at once; the first parseable result wins.
+
+    Only the `RACE_WIDTH` healthiest instances are raced, so adding mirrors to
+    NITTER_INSTANCES does not widen every search.
+
+    Returns a report dict:
+        - result (tuple): (tweet_text, tweet_id, username, posted_at), all None if nobody won.
+        - winner (str | None): The instance whose result was used.
+        - timings (dict): Per instance {"seconds": float, "outcome": str}.
+    """
+    deadline = NITTER_DEADLINE if deadline is None else deadline
+    search_query = urllib.parse.quote(topic)
+    cancelled = threading.Event()
+    instances = nitter_health.rank_instances(NITTER_INSTANCES)[:RACE_WIDTH]
+    timings = {instance: {"seconds": None, "outcome": "pending"} for instance in instances}
+    report = {"result": (None, None, None, None), "winner": None, "timings": timings}
+    results = queue.Queue()
+    race_start = time.perf_counter()
 
-            soup = BeautifulSoup(response.text, "html.parser")
-            tweet_divs = soup.find_all("div", class_="timeline-item")
+    def worker(instance):
+        start = time.perf_counter()
+        # Connect and each read wait at most until the deadline, so a loser cannot hang on past it
+        remaining = max(deadline - (start - race_start), 0.001)
+        limit = min(INSTANCE_TIMEOUT or http_client.default_timeout(), remaining)
+        timeout = (limit, limit)
+        outcome, result = "error", None
+        try:
+            result = _search_instance(instance, search_query, topic, timeout, cancelled, context, max_age)
+            outcome = "ok" if result else "empty"
+        except _Cancelled:
+            outcome = "cancelled"
+        except Exception as e:
+            logging.error(f"❌ Error fetching from {instance}: {e}")
+        finally:
+            elapsed = time.perf_counter() - start
+            timings[instance] = {"seconds": round(elapsed, 3), "outcome": outcome}
+            _record_health(instance, outcome, elapsed)
+            results.put((instance, result))
+
+    # Daemon threads: a loser still blocked in a read must not keep the process alive after the race
+    for instance in instances:
+        threading.Thread(target=worker, args=(instance,), name=f"nitter-{instance}", daemon=True).start()
+    try:
+        for _ in instances:
+            instance, result = results.get(timeout=max(deadline - (time.perf_counter() - race_start), 0))
+            if result:
+                report["result"], report["winner"] = result, instance
+                break
+    except queue.Empty:
+        logging.error(f"❌ Nitter search hit the {deadline}s deadline.")
+    finally:
+        # Losers abort at their next body chunk
+        cancelled.set()
+
+    for instance, timing in timings.items():
+        if timing["outcome"] == "pending":
+            timing["seconds"] = round(time.perf_counter() - race_start, 3)
+            timing["outcome"] = "abandoned"
+            if report["winner"] is None:  # Still hanging when the deadline hit
+                nitter_health.record_failure(instance, timing["seconds"], reason="deadline")
+    return report
 
-            if not tweet_divs:
-                logging.warning(f"⚠️ No tweets found for topic: {topic}")
-                continue
 
-            # ✅ Select a random tweet from the latest 4 tweets
-            tweet_candidates = tweet_divs[:4] if len(tweet_divs) >= 4 else tweet_divs
-            selected_tweet = random.choice(tweet_candidates)
+# ============================ #
+# 🐦 NITTER SEARCH             #
+# ============================ #
 
-            # ✅ Extract tweet text
-            tweet_text_element = selected_tweet.find("div", class_="tweet-content")
-            tweet_text = tweet_text_element.get_text(strip=True) if tweet_text_element else None
+@metrics.traced("fetch_nitter_results", outcome=lambda result: "ok" if result[0] else "empty")
+def fetch_nitter_results(topic: str, mode: str = None, deadline: float = None, context: str = None,
+                         max_age: float = None):
+    """Fetch tweets from Nitter based on a topic and extract tweet ID, text & username.
 
-            # ✅ Extract tweet ID from <a class="tweet-link" href="/username/status/1234567890#m">
-            tweet_link_element = selected_tweet.find("a", class_="tweet-link")
-            tweet_id = tweet_link_element['href'].split('/')[-1].split('#')[0] if tweet_link_element else None
+    Returns (tweet_text, tweet_id, username, posted_at); posted_at is the tweet's
+    epoch time, or None if the page did not show it.
 
-            # ✅ Extract username
-            username_element = selected_tweet.find("a", class_="username")
-            username = username_element.text.strip() if username_element else None
+    `mode` is "sequential" (try instances one by one) or "concurrent" (race them all
+    within `deadline` seconds); both default to the module settings. `context` (the
+    Topic:/Context: block) is what candidates are ranked against; defaults to `topic`.
+    Tweets posted more than `max_age` seconds ago are not picked (default: the pool's MAX_AGE).
+    """
 
-            if tweet_text and tweet_id and username:
+    import requests
+
+    if not topic or topic.strip() == "":
+        logging.error("❌ No topic provided for Nitter search.")
+        return None, None, None, None
+
+    # ✅ A tweet pooled by an earlier search on this (or a related) topic saves the round trip
+    pooled = candidate_pool.take(topic, context, max_age=max_age)
+    if pooled:
+        logging.info(f"🎣 Using pooled Nitter tweet: {pooled['tweet_text']} (ID: {pooled['tweet_id']}, Username: {pooled['username']})")
+        metrics.annotate(outcome="pooled")
+        return pooled["tweet_text"], pooled["tweet_id"], pooled["username"], pooled["timestamp"]
+
+    if (mode or NITTER_MODE) == "concurrent":
+        report = race_nitter_instances(topic, deadline, context, max_age)
+        timings = ", ".join(
+            f"{instance}={timing['outcome']}@{timing['seconds']}s" for instance, timing in report["timings"].items()
+        )
+        logging.info(f"🏁 Nitter race winner: {report['winner']} ({timings})")
+        tweet_text, tweet_id, username, _ = report["result"]
+        if tweet_text:
+            logging.info(f"✅ Selected Tweet: {tweet_text} (ID: {tweet_id}, Username: {username})")
+            return report["result"]
+        logging.error("❌ No tweets found across all Nitter instances.")
+        return None, None, None, None
+
+    search_query = urllib.parse.quote(topic)
+
+    for instance in nitter_health.rank_instances(NITTER_INSTANCES):
+        start = time.perf_counter()
+        try:
+            result = _search_instance(instance, search_query, topic, context=context, max_age=max_age)
+            _record_health(instance, "ok" if result else "empty", time.perf_counter() - start)
+            if result:
+                tweet_text, tweet_id, username, _ = result
                 logging.info(f"✅ Selected Tweet: {tweet_text} (ID: {tweet_id}, Username: {username})")
-                return tweet_text, tweet_id, username
+                return result
 
         except requests.exceptions.RequestException as e:
+            _record_health(instance, "error", time.perf_counter() - start)
             logging.error(f"❌ Error fetching from {instance}: {e}")
 
     logging.error("❌ No tweets found across all Nitter instances.")
-    return None, None, None
+    return None, None, None, None
@@ -0,0 +1,179 @@
+import logging
+import threading
+import time
+import metrics
+import response_cache
+
+# ============================ #
+# 💎 Gemini API REQUESTS       #
+# ============================ #
+
+# Gemini backend (google-genai SDK, `pip install google-genai`). One client is
+# built on first use and reused, so its HTTP connection pool stays warm between
+# calls, and the GoogleSearch grounding tool is created once. Every attempt gets
+# its own HTTP timeout, capped at what is left of the caller's deadline.
+#
+# With [Gemini] TOPICS, topic discovery (`api_requests.topic_request`) goes through
+# `gemini_request`: grounded in Google Search when GROUNDED is on, and slow, so
+# answers are cached in the response cache keyed by model, prompt and settings.
+# Tweet generation through `gemini_complete` is neither grounded nor cached: the
+# same prompt must not produce the same tweet twice.
+
+GEMINI_MODEL = "gemini-2.0-flash"  # Grounding with the GoogleSearch tool needs Gemini 2.0+
+GEMINI_TEMPERATURE = 0.7
+GEMINI_TIMEOUT = 30      # Seconds per attempt (less when the caller's deadline is closer)
+GEMINI_RETRIES = 2       # Extra attempts after 429 / 5xx / timeouts
+GEMINI_BACKOFF = 1.0     # Seconds before the first retry, doubled each time
+GEMINI_CACHE_TTL = 1800  # Grounded answers are reused for this long (0 disables)
+GEMINI_GROUNDED = True   # Let Gemini search the web before answering topic discovery
+
+_client = None
+_client_key = None
+_search_tool = None
+_client_lock = threading.Lock()
+
+
+def configure(model: str = None, timeout: float = None, retries: int = None, cache_ttl: float = None,
+              grounded: bool = None) -> None:
+    global GEMINI_MODEL, GEMINI_TIMEOUT, GEMINI_RETRIES, GEMINI_CACHE_TTL, GEMINI_GROUNDED
+    if model:
+        GEMINI_MODEL = model
+    if timeout is not None:
+        GEMINI_TIMEOUT = timeout
+    if retries is not None:
+        GEMINI_RETRIES = max(retries, 0)
+    if cache_ttl is not None:
+        GEMINI_CACHE_TTL = cache_ttl
+    if grounded is not None:
+        GEMINI_GROUNDED = grounded
+
+
+def get_client(gemini_api_key: str):
+    """Returns the shared genai client, creating it on first use (or for a new key)."""
+    global _client, _client_key
+    with _client_lock:
+        if _client is None or _client_key != gemini_api_key:
+            # Imported here so runs that never use Gemini don't pay for the SDK
+            from google import genai
+
+            _client = genai.Client(api_key=gemini_api_key)
+            _client_key = gemini_api_key
+        return _client
+
+
+def _get_search_tool():
+    global _search_tool
+    if _search_tool is None:
+        from google.genai.types import Tool, GoogleSearch
+        _search_tool = Tool(google_search=GoogleSearch())
+    return _search_tool
+
+
+def gemini_cache_key(prompt: str, grounded: bool) -> str:
+    return response_cache.cache_key("gemini", GEMINI_MODEL, prompt, GEMINI_TEMPERATURE, grounded)
+
+
+def _retryable(error: Exception) -> bool:
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return code == 429 or code >= 500
+    return "timeout" in type(error).__name__.lower() or isinstance(error, (ConnectionError, TimeoutError))
+
+
+def _response_text(response) -> str:
+    for candidate in response.candidates or []:
+        for part in (candidate.content.parts if candidate.content else None) or []:
+            if part.text:
+                return part.text
+    return ""
+
+
+def _log_response(response) -> None:
+    """Logs what matters about a response (not the whole object) at DEBUG."""
+    if not logging.getLogger().isEnabledFor(logging.DEBUG):
+        return
+    candidate = (response.candidates or [None])[0]
+    grounding = getattr(candidate, "grounding_metadata", None) if candidate else None
+    usage = response.usage_metadata
+    logging.debug("🔍 Gemini response", extra={
+        "finish_reason": str(getattr(candidate, "finish_reason", None)),
+        "prompt_tokens": getattr(usage, "prompt_token_count", None),
+        "answer_tokens": getattr(usage, "candidates_token_count", None),
+        "search_queries": getattr(grounding, "web_search_queries", None),
+        "sources": len(getattr(grounding, "grounding_chunks", None) or []),
+    })
+
+
+def generate(gemini_api_key: str, prompt: str, timeout: float = None, max_tokens: int = None, grounded: bool = None) -> str:
+    """One Gemini generation with retries on rate limits, server errors and timeouts.
+
+    `timeout` (default GEMINI_TIMEOUT) is the total time allowed: each attempt's HTTP
+    timeout is GEMINI_TIMEOUT capped at what is left of it. Raises the last error (or
+    TimeoutError) once the retries or the time are used up.
+    """
+    from google.genai import types
+
+    timeout = GEMINI_TIMEOUT if timeout is None else timeout
+    grounded = GEMINI_GROUNDED if grounded is None else grounded
+    deadline = time.monotonic() + timeout
+    client = get_client(gemini_api_key)
+    for attempt in range(GEMINI_RETRIES + 1):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"Gemini request exceeded {timeout}s")
+        config = types.GenerateContentConfig(
+            temperature=GEMINI_TEMPERATURE,
+            max_output_tokens=max_tokens,
+            tools=[_get_search_tool()] if grounded else None,
+            http_options=types.HttpOptions(timeout=max(int(min(GEMINI_TIMEOUT, remaining) * 1000), 1)),
+        )
+        metrics.annotate(requests=1, retries=1 if attempt else 0)
+        try:
+            response = client.models.generate_content(model=GEMINI_MODEL, contents=prompt, config=config)
+        except Exception as e:
+            delay = GEMINI_BACKOFF * 2 ** attempt
+            if attempt == GEMINI_RETRIES or not _retryable(e) or time.monotonic() + delay >= deadline:
+                raise
+            logging.warning(f"⚠️ Gemini request failed ({e}); retrying in {delay:.1f}s.")
+            time.sleep(delay)
+            continue
+        _log_response(response)
+        text = _response_text(response)
+        metrics.annotate(bytes=len(text.encode("utf-8")))
+        return text
+    return ""
+
+
+@metrics.traced("gemini_request", outcome=lambda content: "ok" if content else "empty")
+def gemini_request(gemini_api_key: str, prompt: str, timeout: float = None, cache_ttl: float = None,
+                   force_refresh: bool = False, grounded: bool = None) -> str:
+    """Calls Gemini, serving grounded answers from the response cache while younger than `cache_ttl`.
+
+    Returns "" on errors.
+    """
+    grounded = GEMINI_GROUNDED if grounded is None else grounded
+    cache_ttl = GEMINI_CACHE_TTL if cache_ttl is None else cache_ttl
+    key = gemini_cache_key(prompt, grounded)
+    if cache_ttl and not force_refresh:
+        cached = response_cache.get(key, cache_ttl)
+        if cached is not None:
+            logging.info("♻️ Using cached Gemini response.")
+            metrics.annotate(outcome="cached")
+            return cached
+
+    try:
+        content = generate(gemini_api_key, prompt, timeout, grounded=grounded)
+    except ImportError:
+        logging.error("❌ Gemini needs the google-genai package (pip install google-genai).")
+        return ""
+    except Exception as e:
+        logging.error(f"❌ Gemini request error: {e}")
+        return ""
+    if content and cache_ttl:
+        response_cache.put(key, content)
+    return content
+
+
+def gemini_complete(gemini_api_key: str, prompt: str, timeout: float, max_tokens: int = 1224, stream: bool = False) -> str:
+    """Gemini provider for `llm_router` (ungrounded and uncached; `stream` is not used)."""
+    return generate(gemini_api_key, prompt, timeout, max_tokens, grounded=False)
@@ -0,0 +1,203 @@
+import logging
+import threading
+import time
+import urllib.parse
+import metrics
+from utils import requests_retry_session
+
+# ============================ #
+# 🌐 SHARED HTTP CLIENT        #
+# ============================ #
+
+# Every outbound call (GrokAI, TogetherAI, Nitter) goes through one process-wide
+# session so keep-alive sockets are reused across requests instead of paying a
+# TCP + TLS handshake per call. urllib3 keeps one pool per host behind it.
+
+DEFAULT_POOL_CONNECTIONS = 10  # Number of hosts kept warm
+DEFAULT_POOL_MAXSIZE = 10      # Sockets kept per host
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.3
+DEFAULT_TIMEOUT = 15
+
+_settings = {
+    "pool_connections": DEFAULT_POOL_CONNECTIONS,
+    "pool_maxsize": DEFAULT_POOL_MAXSIZE,
+    "retries": DEFAULT_RETRIES,
+    "backoff_factor": DEFAULT_BACKOFF_FACTOR,
+    "timeout": DEFAULT_TIMEOUT,
+}
+_session = None
+_session_lock = threading.Lock()
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _host_stats(host: str) -> dict:
+    """Returns the (mutable) counter dict for a host. Caller must hold `_stats_lock`."""
+    return _stats.setdefault(host, {"requests": 0, "connections": 0, "handshake_seconds": 0.0})
+
+
+def _record_connect(host: str, elapsed: float) -> None:
+    with _stats_lock:
+        stats = _host_stats(host)
+        stats["connections"] += 1
+        stats["handshake_seconds"] += elapsed
+
+
+def _record_request(response, *args, **kwargs):
+    """Response hook counting every request that went through the pool."""
+    host = urllib.parse.urlparse(response.url).hostname or "unknown"
+    with _stats_lock:
+        _host_stats(host)["requests"] += 1
+    return response
+
+
+# ============================ #
+# ⏱ HANDSHAKE INSTRUMENTATION  #
+# ============================ #
+
+_adapter_class = None
+
+
+def _instrumented_adapter_class():
+    """Builds the instrumented HTTPAdapter on first use so importing this module stays cheap."""
+    global _adapter_class
+    if _adapter_class is not None:
+        return _adapter_class
+
+    from requests.adapters import HTTPAdapter
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    class _TimedHTTPConnection(HTTPConnection):
+        def connect(self):
+            start = time.perf_counter()
+            super().connect()
+            _record_connect(self.host, time.perf_counter() - start)
+
+    class _TimedHTTPSConnection(HTTPSConnection):
+        def connect(self):
+            start = time.perf_counter()
+            super().connect()  # TCP connect + TLS handshake
+            _record_connect(self.host, time.perf_counter() - start)
+
+    class _TimedHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = _TimedHTTPConnection
+
+    class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = _TimedHTTPSConnection
+
+    class _InstrumentedAdapter(HTTPAdapter):
+        """HTTPAdapter whose pools time every new connection they open."""
+
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {
+                "http": _TimedHTTPConnectionPool,
+                "https": _TimedHTTPSConnectionPool,
+            }
+
+    _adapter_class = _InstrumentedAdapter
+    return _adapter_class
+
+
+# ============================ #
+# 🔌 SESSION MANAGEMENT        #
+# ============================ #
+
+def configure(pool_connections: int = None, pool_maxsize: int = None, retries: int = None,
+              backoff_factor: float = None, timeout: float = None) -> None:
+    """Updates pool, retry and timeout policy. Rebuilds the shared session on next use."""
+    global _session
+    updates = {
+        "pool_connections": pool_connections,
+        "pool_maxsize": pool_maxsize,
+        "retries": retries,
+        "backoff_factor": backoff_factor,
+        "timeout": timeout,
+    }
+    with _session_lock:
+        _settings.update({key: value for key, value in updates.items() if value is not None})
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def get_session():
+    """Returns the process-wide pooled session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests_retry_session(
+                retries=_settings["retries"],
+                backoff_factor=_settings["backoff_factor"],
+                pool_connections=_settings["pool_connections"],
+                pool_maxsize=_settings["pool_maxsize"],
+                adapter_class=_instrumented_adapter_class(),
+            )
+            _session.hooks["response"].append(_record_request)
+        return _session
+
+
+def default_timeout() -> float:
+    """The [HTTP] TIMEOUT callers fall back to when they have no timeout of their own."""
+    return _settings["timeout"]
+
+
+def request(method: str, url: str, **kwargs):
+    """Sends a request through the shared session, applying the default timeout when none (or None) is given.
+
+    Retries and (non-streamed) body bytes are added to the current metrics span;
+    streaming callers annotate the bytes they actually read.
+    """
+    if kwargs.get("timeout") is None:
+        kwargs["timeout"] = _settings["timeout"]
+    response = get_session().request(method, url, **kwargs)
+    span = metrics.current_span()
+    if span is not None:
+        retries = getattr(response.raw, "retries", None)
+        span.annotate(
+            requests=1,
+            retries=len(retries.history) if retries is not None else 0,
+            bytes=0 if kwargs.get("stream") else len(response.content),
+        )
+    return response
+
+
+def get(url: str, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+def close() -> None:
+    """Closes all pooled connections (e.g. on shutdown)."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+# ============================ #
+# 📊 CONNECTION STATS          #
+# ============================ #
+
+def connection_stats() -> dict:
+    """Returns per-host request, connection, reuse and handshake-time counters."""
+    with _stats_lock:
+        report = {}
+        for host, stats in _stats.items():
+            report[host] = dict(stats)
+            report[host]["reused"] = max(stats["requests"] - stats["connections"], 0)
+        return report
+
+
+def log_connection_stats() -> None:
+    for host, stats in connection_stats().items():
+        logging.info(
+            f"🌐 {host}: {stats['requests']} requests, {stats['connections']} new connections, "
+            f"{stats['reused']} reused, {stats['handshake_seconds']:.3f}s in handshakes"
+        )
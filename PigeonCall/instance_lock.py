@@ -0,0 +1,56 @@
+import logging
+import os
+from utils import state_path
+
+# ============================ #
+# 🔒 SINGLE-INSTANCE LOCK      #
+# ============================ #
+
+# Cron runs and the long-running daemon share one lock file so they never post
+# at the same time. The OS releases the lock if the process dies.
+
+LOCK_FILE = "botty.lock"
+
+
+def acquire(name: str = LOCK_FILE):
+    """Tries to take the lock without blocking.
+
+    Returns:
+        - file object holding the lock, or None if another instance owns it.
+    """
+    lock_file = open(state_path(name), "a+")
+    try:
+        if os.name == "nt":
+            import msvcrt
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.seek(0)
+        owner = lock_file.read().strip() or "unknown"
+        lock_file.close()
+        logging.warning(f"🔒 Another bot instance is running (pid {owner}).")
+        return None
+
+    lock_file.seek(0)
+    lock_file.truncate()
+    lock_file.write(str(os.getpid()))
+    lock_file.flush()
+    return lock_file
+
+
+def release(lock_file) -> None:
+    if lock_file is None:
+        return
+    try:
+        if os.name == "nt":
+            import msvcrt
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+    finally:
+        lock_file.close()
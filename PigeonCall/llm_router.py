@@ -0,0 +1,228 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import logging_setup
+import metrics
+from utils import state_path, load_json, write_json_atomic
+
+# ============================ #
+# 🔀 LLM PROVIDER ROUTER       #
+# ============================ #
+
+# Tweet generation goes through registered providers (TogetherAI, Grok, ...), each
+# a `complete(prompt, timeout, max_tokens, stream) -> raw text` callable. The
+# primary is the provider with the lowest expected time to a usable answer,
+# judged from its latest WINDOW calls: median latency / success rate.
+#
+# Modes:
+#   failover - the next provider is only asked once the previous one failed
+#   hedged   - if the primary has not answered after its HEDGE_PERCENTILE latency,
+#              the next provider is asked too; the first accepted answer wins.
+#              Lower tail latency for more spend: each hedge bills a second generation
+#   single   - only the primary is asked
+# In every mode a provider that fails or answers without tweet markers hands over
+# to the next one right away. Latency samples persist in state/, so cron runs
+# route on the history of earlier runs.
+
+MODE = "failover"
+HEDGE_PERCENTILE = 0.9     # Hedge once the primary is slower than this share of its past answers
+DEFAULT_HEDGE_DELAY = 8.0  # Seconds, while a provider has fewer than MIN_SAMPLES answers
+MIN_HEDGE_DELAY = 1.0
+MIN_SAMPLES = 5
+WINDOW = 50                # Latest calls per provider used for stats
+STATS_FILE = "llm_stats.json"
+MAX_WORKERS = 8
+
+_providers = {}  # name -> complete callable, in configured order
+_stats = {}      # name -> deque of [seconds, ok]
+_stats_lock = threading.Lock()
+_stats_loaded = False
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def configure(mode: str = None, hedge_percentile: float = None, default_hedge_delay: float = None,
+              window: int = None) -> None:
+    global MODE, HEDGE_PERCENTILE, DEFAULT_HEDGE_DELAY, WINDOW
+    if mode is not None:
+        if mode not in ("hedged", "failover", "single"):
+            raise ValueError(f"Unknown router mode: {mode}")
+        MODE = mode
+    if hedge_percentile is not None:
+        HEDGE_PERCENTILE = min(max(hedge_percentile, 0.0), 1.0)
+    if default_hedge_delay is not None:
+        DEFAULT_HEDGE_DELAY = default_hedge_delay
+    if window is not None:
+        WINDOW = max(window, MIN_SAMPLES)
+
+
+def register(name: str, complete) -> None:
+    """Adds (or replaces) a provider; registration order breaks ties between providers."""
+    _providers[name] = complete
+
+
+def clear() -> None:
+    _providers.clear()
+
+
+def providers() -> list:
+    return list(_providers)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    # Shared pool: a hedged loser keeps running after the winner returned, so the
+    # caller must not wait for it the way a `with ThreadPoolExecutor()` block would
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="llm")
+        return _executor
+
+
+# ============================ #
+# 📊 PROVIDER STATS            #
+# ============================ #
+
+def _history(name: str) -> deque:
+    """Call history of `name`; the caller holds _stats_lock."""
+    global _stats_loaded
+    if not _stats_loaded:
+        _stats_loaded = True
+        for stored_name, samples in (load_json(state_path(STATS_FILE), default=None) or {}).items():
+            _stats[stored_name] = deque((list(sample) for sample in samples), maxlen=WINDOW)
+    if name not in _stats:
+        _stats[name] = deque(maxlen=WINDOW)
+    return _stats[name]
+
+
+def _record(name: str, seconds: float, ok: bool) -> None:
+    with _stats_lock:
+        _history(name).append([round(seconds, 3), ok])
+
+
+def provider_stats(name: str) -> dict:
+    """calls, error_rate, p50 and hedge_delay (seconds) over the provider's latest calls."""
+    with _stats_lock:
+        samples = list(_history(name))
+    latencies = sorted(seconds for seconds, ok in samples if ok)
+    errors = sum(1 for _, ok in samples if not ok)
+    if len(latencies) >= MIN_SAMPLES:
+        p50 = latencies[len(latencies) // 2]
+        hedge_delay = max(latencies[int(HEDGE_PERCENTILE * (len(latencies) - 1))], MIN_HEDGE_DELAY)
+    else:
+        p50, hedge_delay = None, DEFAULT_HEDGE_DELAY
+    return {
+        "calls": len(samples),
+        "error_rate": errors / len(samples) if samples else 0.0,
+        "p50": p50,
+        "hedge_delay": hedge_delay,
+    }
+
+
+def _expected_seconds(stats: dict) -> float:
+    # Unmeasured providers are assumed average-slow, so a measured fast one stays primary
+    p50 = stats["p50"] if stats["p50"] is not None else DEFAULT_HEDGE_DELAY
+    return p50 / max(1.0 - stats["error_rate"], 0.05)
+
+
+def ranked() -> list:
+    """Provider names, most promising first."""
+    order = list(_providers)
+    return sorted(order, key=lambda name: (_expected_seconds(provider_stats(name)), order.index(name)))
+
+
+def save_stats() -> None:
+    """Persists the latency/error history for the next run."""
+    with _stats_lock:
+        if not _stats:
+            return
+        snapshot = {name: list(samples) for name, samples in _stats.items()}
+    try:
+        write_json_atomic(state_path(STATS_FILE), snapshot)
+    except OSError as e:
+        logging.warning(f"⚠️ Could not save LLM provider stats: {e}")
+
+
+# ============================ #
+# 🏁 ROUTED GENERATION         #
+# ============================ #
+
+def _call(name: str, prompt: str, timeout: float, max_tokens: int, stream: bool, accept, account: str = None) -> str:
+    """Runs one provider; returns its raw answer if `accept` takes it, else None."""
+    logging_setup.set_account(account)  # Pool threads log for whichever account asked
+    started = time.perf_counter()
+    raw = None
+    with metrics.span("llm_provider", provider=name) as span:
+        try:
+            raw = _providers[name](prompt, timeout, max_tokens, stream) or ""
+        except Exception as e:  # Any provider failure just hands over to the next one
+            logging.warning(f"⚠️ LLM provider {name} failed: {e}")
+        ok = raw is not None and accept(raw)
+        span.annotate(outcome="ok" if ok else ("error" if raw is None else "invalid"))
+    _record(name, time.perf_counter() - started, ok)
+    if raw is not None and not ok:
+        logging.warning(f"⚠️ LLM provider {name} answered without the expected tweet format.")
+    return raw if ok else None
+
+
+def generate(prompt: str, timeout: float, max_tokens: int = 1224, stream: bool = False, accept=None) -> str:
+    """Asks providers according to MODE and returns the first raw answer `accept(raw)` takes.
+
+    Returns "" when no provider produced an accepted answer within `timeout` seconds.
+    """
+    accept = accept or bool
+    order = ranked()
+    if MODE == "single":
+        order = order[:1]
+    if not order:
+        logging.error("❌ No LLM provider registered.")
+        return ""
+
+    executor = _get_executor()
+    account = logging_setup.current_account()
+    deadline = time.monotonic() + timeout
+    pending = {}  # future -> (name, started)
+
+    def launch(name):
+        remaining = max(deadline - time.monotonic(), 0.1)
+        pending[executor.submit(_call, name, prompt, remaining, max_tokens, stream, accept, account)] = (name, time.monotonic())
+
+    launch(order[0])
+    next_index = 1
+    while pending:
+        now = time.monotonic()
+        wait_for = deadline - now
+        if MODE == "hedged" and next_index < len(order):
+            name, started = list(pending.values())[-1]
+            wait_for = min(wait_for, started + provider_stats(name)["hedge_delay"] - now)
+        done, _ = wait(list(pending), timeout=max(wait_for, 0), return_when=FIRST_COMPLETED)
+
+        for future in done:
+            name, started = pending.pop(future)
+            raw = future.result()
+            if raw is not None:
+                logging.info(f"🔀 {name} answered in {time.monotonic() - started:.2f}s.")
+                return raw
+
+        if time.monotonic() >= deadline:
+            break
+        if next_index < len(order) and (done or MODE == "hedged"):
+            if not done:
+                logging.info(f"🪁 {list(pending.values())[-1][0]} is slow; hedging with {order[next_index]}.")
+            launch(order[next_index])
+            next_index += 1
+
+    logging.error(f"❌ No LLM provider produced a tweet ({', '.join(order[:next_index])} tried).")
+    return ""
+
+
+def log_summary() -> None:
+    for name in _providers:
+        stats = provider_stats(name)
+        p50 = f"{stats['p50']:.2f}s" if stats["p50"] is not None else "n/a"
+        logging.info(
+            f"🔀 {name}: {stats['calls']} calls, {stats['error_rate']:.0%} failed, p50 {p50}, "
+            f"hedge after {stats['hedge_delay']:.2f}s"
+        )
@@ -1,51 +1,234 @@
+import atexit
+import copy
+import gzip
+import json
 import logging
+import logging.handlers
 import os
-from datetime import datetime
+import queue
+import random
+import shutil
+import threading
+from datetime import datetime, timezone
 
 # ====================== #
 # 📝 LOGGING MANAGEMENT  #
 # ====================== #
 
+# Log calls only put records on an in-memory queue (QueueHandler); a background
+# QueueListener thread does the formatting and file I/O, so the hot path never
+# blocks on disk. The file gets one JSON object per line and is rotated by size
+# or time, with rotated files gzip-compressed.
+
 # ✅ Get the directory where bot.py is located
 bot_directory = os.path.dirname(os.path.abspath(__file__))
 
-# ✅ Ensure logs are stored inside the bot's directory
-log_dir = os.path.join(bot_directory, "logs")
-os.makedirs(log_dir, exist_ok=True)  # ✅ Create logs directory if it doesn’t exist
+DEFAULT_LOG_DIR = os.path.join(bot_directory, "logs")
+LOG_FILE = "bot_log.jsonl"
+MAX_FIELD_CHARS = 2000  # Long messages/fields are truncated above DEBUG level
+DEBUG_SAMPLE_RATE = 1.0  # Share of DEBUG records with payload fields that are kept
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_STANDARD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener = None
+_context = threading.local()  # Account the current thread works for (multi-account runs)
+
+
+def set_account(name: str = None) -> None:
+    """Tags this thread's log records with `name` (None clears it)."""
+    _context.account = name
+
+
+def current_account():
+    """The account this thread's records are tagged with, for handing over to helper threads."""
+    return getattr(_context, "account", None)
+
+
+def truncate(value, limit: int = None):
+    """Shortens long strings, keeping the head and noting how much was cut."""
+    limit = MAX_FIELD_CHARS if limit is None else limit
+    if isinstance(value, str) and limit and len(value) > limit:
+        return f"{value[:limit]}… [+{len(value) - limit} chars]"
+    return value
+
+
+class JsonLineFormatter(logging.Formatter):
+    """One JSON object per record, including any structured `extra=` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        full = record.levelno <= logging.DEBUG  # Debug records keep full payloads
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage() if full else truncate(record.getMessage()),
+        }
+        for key, value in _extra_fields(record).items():
+            entry[key] = value if full else truncate(value)
+        # Tracebacks are never truncated; queued records carry them as text (see _RecordQueueHandler)
+        exc = self.formatException(record.exc_info) if record.exc_info else record.exc_text
+        if exc:
+            entry["exc"] = exc
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def _extra_fields(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in record.__dict__.items() if key not in _STANDARD_ATTRS and not key.startswith("_")}
+
+
+class _TruncatingFormatter(logging.Formatter):
+    """Human-readable console format; long messages are shortened above DEBUG and
+    DEBUG records show their payload fields after the message."""
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        account = getattr(record, "account", None)
+        if account:
+            record.message = f"[{account}] {record.message}"
+        if record.levelno > logging.DEBUG:
+            record.message = truncate(record.message)
+            return super().formatMessage(record)
+        line = super().formatMessage(record)
+        extras = {key: value for key, value in _extra_fields(record).items() if key != "account"}
+        return line + "".join(f"\n    {key}: {value}" for key, value in extras.items())
+
+
+class _RecordQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that keeps the traceback apart from the message.
+
+    The stock `prepare` formats the traceback into `msg` and drops `exc_info`, so
+    the JSON file would get it truncated inside "msg". Here the traceback is turned
+    into text (`exc_text`, which formatters print as is) before the record leaves
+    the thread, and the message stays plain.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None  # Tracebacks hold frames; only the text goes on the queue
+        return record
+
+
+class _PayloadSampler(logging.Filter):
+    """Keeps only DEBUG_SAMPLE_RATE of the DEBUG records that carry payload fields."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or DEBUG_SAMPLE_RATE >= 1 or not _extra_fields(record):
+            return True
+        return random.random() < DEBUG_SAMPLE_RATE
+
+
+class _AccountStamp(logging.Filter):
+    """Copies the thread's account onto the record before it leaves the thread."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        account = getattr(_context, "account", None)
+        if account and not hasattr(record, "account"):
+            record.account = account
+        return True
+
+
+class _AccountFilter(logging.Filter):
+    def __init__(self, account: str):
+        super().__init__()
+        self.account = account
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return getattr(record, "account", None) == self.account
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+def _file_handler(log_path: str, rotate: str, max_bytes: int, backup_count: int, when: str, compress: bool):
+    if rotate == "time":
+        handler = logging.handlers.TimedRotatingFileHandler(log_path, when=when, backupCount=backup_count, encoding="utf-8")
+    else:
+        handler = logging.handlers.RotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+    if compress:
+        handler.namer = lambda name: f"{name}.gz"
+        handler.rotator = _gzip_rotator
+    return handler
+
+
+def setup_logging(level: str = "INFO", log_dir: str = None, rotate: str = "size", max_bytes: int = 5 * 1024 * 1024,
+                  backup_count: int = 7, when: str = "midnight", compress: bool = True, max_field_chars: int = None,
+                  debug_sample_rate: float = None, accounts: tuple = ()) -> None:
+    """Routes all logging through a queue to a rotating JSON-lines file and the console.
+
+    Each name in `accounts` also gets its own file (bot_log_<name>.jsonl) with the
+    records logged while working for that account (see `set_account`).
+
+    Called from `botty.main` rather than at import time, so importing modules has
+    no filesystem side effects. Calling it again replaces the previous setup.
+    """
+    global _listener, MAX_FIELD_CHARS, DEBUG_SAMPLE_RATE
+    if max_field_chars is not None:
+        MAX_FIELD_CHARS = max_field_chars
+    if debug_sample_rate is not None:
+        DEBUG_SAMPLE_RATE = debug_sample_rate
+    stop_logging()
+
+    log_dir = log_dir or DEFAULT_LOG_DIR
+    os.makedirs(log_dir, exist_ok=True)  # ✅ Create logs directory if it doesn’t exist
+
+    file_handler = _file_handler(os.path.join(log_dir, LOG_FILE), rotate, max_bytes, backup_count, when, compress)
+    file_handler.setFormatter(JsonLineFormatter())
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(_TruncatingFormatter("%(asctime)s - %(levelname)s - %(message)s"))
+
+    log_queue = queue.SimpleQueue()
+    handlers = [file_handler, console_handler]
+    for account in accounts:
+        account_handler = _file_handler(os.path.join(log_dir, f"bot_log_{account}.jsonl"), rotate, max_bytes, backup_count, when, compress)
+        account_handler.setFormatter(JsonLineFormatter())
+        account_handler.addFilter(_AccountFilter(account))
+        handlers.append(account_handler)
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
 
-# ✅ Set the correct log file path
-log_file = os.path.join(log_dir, "bot_log.txt")
-file_handler = logging.FileHandler(log_file, mode="a", encoding="utf-8")
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    queue_handler = _RecordQueueHandler(log_queue)
+    queue_handler.addFilter(_PayloadSampler())
+    queue_handler.addFilter(_AccountStamp())
+    root.addHandler(queue_handler)
+    root.setLevel(getattr(logging, str(level).upper(), logging.INFO))
 
-# Ensure logs directory exists
-log_dir = os.path.join(os.getcwd(), "logs")
-os.makedirs(log_dir, exist_ok=True)
 
-# Set up logging
-log_file = os.path.join(log_dir, "bot_log.txt")
+def stop_logging() -> None:
+    """Flushes queued records and stops the background writer."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
 
-# ✅ Define handlers first
-file_handler = logging.FileHandler(log_file, mode="a", encoding="utf-8")  # ✅ Now writes inside logs/
-console_handler = logging.StreamHandler()
 
-# ✅ Set formatter
-formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-file_handler.setFormatter(formatter)
-console_handler.setFormatter(formatter)
+atexit.register(stop_logging)
 
-# ✅ Configure logging
-logging.basicConfig(level=logging.INFO, handlers=[file_handler, console_handler])
 
 def log_tweet_decision(context, is_reply, model, tweet_text, tweet_id=None, username=None):
-    """Logs the decision to both console and a file."""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_entry = f"\n[{timestamp}] 🔥 Tweet Decision\n"
-    log_entry += f"🔄 Is Reply?: {'Yes' if is_reply else 'No'}\n"
-    if is_reply:
-        log_entry += f"📌 Replying to: @{username} (Tweet ID: {tweet_id})\n"
-    log_entry += f"📝 Context: {context}\n"
-    log_entry += f"⚙️ Generation Route: {model}\n"
-    log_entry += f"📢 Final Tweet: {tweet_text}\n"
-    log_entry += "=" * 50  # Separator for readability
-
-    logging.info(log_entry)
+    """Logs the decision as one structured record (console line + JSON fields in the file)."""
+    target = f" → @{(username or '').lstrip('@')} ({tweet_id})" if is_reply else ""
+    logging.info(
+        f"🔥 Tweet decision via {model}{target}: {tweet_text}",
+        extra={
+            "event": "tweet_decision",
+            "is_reply": bool(is_reply),
+            "reply_to_username": username,
+            "reply_to_tweet_id": tweet_id,
+            "context": context,
+            "route": model,
+            "tweet": tweet_text,
+        },
+    )
@@ -0,0 +1,317 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from utils import state_path, load_json, write_json_atomic
+
+# ============================ #
+# 📈 STAGE SPANS & METRICS     #
+# ============================ #
+
+# Spans time one pipeline stage (Grok call, Nitter search, generation, post...)
+# and carry an outcome plus bytes / retries annotated by the HTTP layer. Finished
+# spans are aggregated per (stage, labels, outcome) and exported as a Prometheus
+# textfile (for node_exporter's textfile collector) or as JSON.
+#
+# Totals are persisted in state/, so counters keep growing across cron runs.
+# Gauges (queue depth, ...) are point-in-time values; the latest one per name and
+# labels is kept.
+# While disabled, `traced` functions are called directly and `span()` hands out
+# a shared no-op object, so instrumentation costs one global lookup.
+#
+# With TRACK_STAGES (set by `profiler`) the names of the open spans of every
+# thread are also kept in a registry other threads can read, even while metrics
+# are disabled, so stack samples can be labelled by pipeline stage.
+
+ENABLED = False
+EXPORT_FORMAT = "prometheus"  # "prometheus" or "json"
+EXPORT_PATH = None            # Default: state/metrics.prom or state/metrics.json
+TOTALS_FILE = "metrics_totals.json"
+GAUGES_FILE = "metrics_gauges.json"
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)  # Histogram upper bounds (seconds)
+TRACK_STAGES = False
+
+_stages = {}   # Thread id -> names of its open spans, outermost first
+
+_pending = {}  # Aggregates since the last export
+_gauges = {}   # Gauge values set since the last export
+_pending_lock = threading.Lock()
+_local = threading.local()
+
+
+def configure(enabled: bool = None, export_format: str = None, export_path: str = None,
+              track_stages: bool = None) -> None:
+    global ENABLED, EXPORT_FORMAT, EXPORT_PATH, TRACK_STAGES
+    if enabled is not None:
+        ENABLED = enabled
+    if track_stages is not None:
+        TRACK_STAGES = track_stages
+    if export_format is not None:
+        if export_format not in ("prometheus", "json"):
+            raise ValueError(f"Unknown metrics format: {export_format}")
+        EXPORT_FORMAT = export_format
+    if export_path is not None:
+        EXPORT_PATH = export_path or None
+
+
+# ============================ #
+# ⏱ SPANS                      #
+# ============================ #
+
+class Span:
+    """One timed stage. Unless annotated, `outcome` is "ok", or "error" if the block raised."""
+
+    def __init__(self, name: str, labels: dict):
+        self.name = name
+        self.labels = labels
+        self.outcome = None
+        self.bytes = 0
+        self.retries = 0
+        self.requests = 0
+        self.start = None
+        self.stage = None
+
+    def annotate(self, outcome: str = None, bytes: int = 0, retries: int = 0, requests: int = 0) -> None:
+        if outcome is not None:
+            self.outcome = outcome
+        self.bytes += bytes
+        self.retries += retries
+        self.requests += requests
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self)
+        self.stage = _enter_stage(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        _local.stack.pop()
+        _exit_stage(self.stage)
+        if exc_type is not None and self.outcome is None:
+            self.outcome = "error"
+        _observe(self, elapsed)
+        return False
+
+
+class _NoopSpan:
+    """Stand-in returned while metrics are disabled."""
+
+    def annotate(self, *args, **kwargs) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _StageSpan(_NoopSpan):
+    """Untimed stand-in that only registers its stage (metrics disabled, TRACK_STAGES on)."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.stage = None
+
+    def __enter__(self):
+        self.stage = _enter_stage(self.name)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _exit_stage(self.stage)
+        return False
+
+
+def _enter_stage(name: str):
+    """Pushes `name` on this thread's stage list; returns the list (None when not tracking)."""
+    if not TRACK_STAGES:
+        return None
+    stages = _stages.setdefault(threading.get_ident(), [])
+    stages.append(name)
+    return stages
+
+
+def _exit_stage(stages) -> None:
+    if stages is not None:
+        stages.pop()
+
+
+def current_stages() -> dict:
+    """Open span names of every thread (thread id -> tuple, outermost first); empty unless TRACK_STAGES."""
+    return {ident: tuple(stages) for ident, stages in list(_stages.items()) if stages}
+
+
+def span(name: str, **labels):
+    """Context manager timing a stage: `with metrics.span("nitter_instance", instance=url) as s: ...`."""
+    if not ENABLED:
+        return _StageSpan(name) if TRACK_STAGES else _NOOP
+    return Span(name, {key: str(value) for key, value in labels.items()})
+
+
+def traced(name: str, outcome=None):
+    """Decorator timing every call as a span; `outcome(result)` names the result (default ok)."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                if not TRACK_STAGES:
+                    return func(*args, **kwargs)
+                with _StageSpan(name):
+                    return func(*args, **kwargs)
+            with Span(name, {}) as current:
+                result = func(*args, **kwargs)
+                if current.outcome is None and outcome is not None:
+                    current.outcome = outcome(result)
+                return result
+        return wrapper
+    return decorator
+
+
+def current_span():
+    """The innermost open span of this thread, or None."""
+    if not ENABLED:
+        return None
+    stack = getattr(_local, "stack", None)
+    return stack[-1] if stack else None
+
+
+def annotate(**kwargs) -> None:
+    """Adds outcome / bytes / retries / requests to the current span, if any."""
+    current = current_span()
+    if current is not None:
+        current.annotate(**kwargs)
+
+
+def gauge(name: str, value: float, **labels) -> None:
+    """Sets a point-in-time value, exported as pigeoncall_<name>."""
+    if not ENABLED:
+        return
+    labels = {key: str(label) for key, label in labels.items()}
+    key = json.dumps([name, labels], sort_keys=True)
+    with _pending_lock:
+        _gauges[key] = {"name": name, "labels": labels, "value": value, "updated_at": time.time()}
+
+
+# ============================ #
+# 📊 AGGREGATION & EXPORT      #
+# ============================ #
+
+def _empty_series(name: str, labels: dict, outcome: str) -> dict:
+    return {"stage": name, "labels": labels, "outcome": outcome, "count": 0, "seconds": 0.0,
+            "bytes": 0, "retries": 0, "requests": 0, "buckets": [0] * len(BUCKETS), "last_seconds": 0.0}
+
+
+def _observe(finished: Span, elapsed: float) -> None:
+    outcome = finished.outcome or "ok"
+    key = json.dumps([finished.name, finished.labels, outcome], sort_keys=True)
+    with _pending_lock:
+        series = _pending.setdefault(key, _empty_series(finished.name, finished.labels, outcome))
+        series["count"] += 1
+        series["seconds"] += elapsed
+        series["bytes"] += finished.bytes
+        series["retries"] += finished.retries
+        series["requests"] += finished.requests
+        series["last_seconds"] = elapsed
+        for i, bound in enumerate(BUCKETS):
+            if elapsed <= bound:
+                series["buckets"][i] += 1
+
+
+def _merge(totals: dict, pending: dict) -> dict:
+    for key, series in pending.items():
+        total = totals.setdefault(key, _empty_series(series["stage"], series["labels"], series["outcome"]))
+        for field in ("count", "seconds", "bytes", "retries", "requests"):
+            total[field] += series[field]
+        total["buckets"] = [a + b for a, b in zip(total["buckets"], series["buckets"])]
+        total["last_seconds"] = series["last_seconds"]
+    return totals
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(series: dict, **extra) -> str:
+    labels = dict(series["labels"], stage=series["stage"], outcome=series["outcome"], **extra)
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in sorted(labels.items()))
+
+
+def _prometheus_text(totals: dict, gauges: dict = None) -> str:
+    lines = [
+        "# HELP pigeoncall_stage_duration_seconds Time spent per pipeline stage.",
+        "# TYPE pigeoncall_stage_duration_seconds histogram",
+    ]
+    for series in totals.values():
+        for bound, count in zip(BUCKETS, series["buckets"]):
+            lines.append(f"pigeoncall_stage_duration_seconds_bucket{{{_label_text(series, le=bound)}}} {count}")
+        lines.append(f'pigeoncall_stage_duration_seconds_bucket{{{_label_text(series, le="+Inf")}}} {series["count"]}')
+        lines.append(f"pigeoncall_stage_duration_seconds_sum{{{_label_text(series)}}} {series['seconds']:.6f}")
+        lines.append(f"pigeoncall_stage_duration_seconds_count{{{_label_text(series)}}} {series['count']}")
+    for metric, field, help_text in (
+        ("pigeoncall_stage_last_duration_seconds", "last_seconds", "Duration of the latest span per stage."),
+        ("pigeoncall_stage_bytes_total", "bytes", "Response bytes received per stage."),
+        ("pigeoncall_stage_retries_total", "retries", "HTTP retries per stage."),
+        ("pigeoncall_stage_requests_total", "requests", "HTTP requests per stage."),
+    ):
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {'gauge' if field == 'last_seconds' else 'counter'}")
+        lines.extend(f"{metric}{{{_label_text(series)}}} {series[field]}" for series in totals.values())
+    for name in sorted({entry["name"] for entry in (gauges or {}).values()}):
+        lines.append(f"# TYPE pigeoncall_{name} gauge")
+        for entry in (gauges or {}).values():
+            if entry["name"] == name:
+                labels = ",".join(f'{key}="{_escape(value)}"' for key, value in sorted(entry["labels"].items()))
+                lines.append(f"pigeoncall_{name}{{{labels}}} {entry['value']}")
+    return "\n".join(lines) + "\n"
+
+
+def export() -> None:
+    """Folds spans finished since the last export into the persisted totals and writes the export file."""
+    if not ENABLED:
+        return
+    with _pending_lock:
+        pending = dict(_pending)
+        _pending.clear()
+        new_gauges = dict(_gauges)
+        _gauges.clear()
+    totals_path = state_path(TOTALS_FILE)
+    totals = _merge(load_json(totals_path, default=None) or {}, pending)
+    gauges_path = state_path(GAUGES_FILE)
+    gauges = dict(load_json(gauges_path, default=None) or {}, **new_gauges)
+    try:
+        write_json_atomic(totals_path, totals)
+        write_json_atomic(gauges_path, gauges)
+        if EXPORT_FORMAT == "json":
+            write_json_atomic(EXPORT_PATH or state_path("metrics.json"), {
+                "updated_at": time.time(), "series": list(totals.values()), "gauges": list(gauges.values()),
+            })
+        else:
+            # Write-then-rename so node_exporter never reads a half-written file
+            path = EXPORT_PATH or state_path("metrics.prom")
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(_prometheus_text(totals, gauges))
+            os.replace(tmp_path, path)
+    except OSError as e:
+        logging.warning(f"⚠️ Could not export metrics: {e}")
+
+
+def log_summary() -> None:
+    """Logs count / mean duration per stage for spans not yet exported."""
+    with _pending_lock:
+        series_list = list(_pending.values())
+    for series in sorted(series_list, key=lambda s: s["stage"]):
+        labels = "".join(f" {key}={value}" for key, value in series["labels"].items())
+        logging.info(
+            f"📈 {series['stage']}{labels} [{series['outcome']}]: {series['count']}x, "
+            f"avg {series['seconds'] / series['count']:.3f}s, {series['bytes']} bytes, {series['retries']} retries"
+        )
@@ -0,0 +1,137 @@
+import logging
+import threading
+import time
+from utils import state_path, load_json, write_json_atomic
+
+# ============================ #
+# 🩺 NITTER INSTANCE HEALTH    #
+# ============================ #
+
+# Each run starts from a fresh process, so instance health is kept on disk:
+# a latency EWMA, an error-rate EWMA and a circuit breaker per instance.
+# Instances are tried best-score first, and an instance that keeps failing
+# (errors or empty timelines) is skipped until its cooldown expires.
+
+HEALTH_FILE = "nitter_health.json"
+EWMA_ALPHA = 0.3          # Weight of the newest observation
+FAILURE_THRESHOLD = 3     # Consecutive failures before the breaker opens
+COOLDOWN = 6 * 3600       # Seconds an open breaker skips the instance
+MAX_COOLDOWN = 72 * 3600  # Cooldown doubles on every re-trip up to this cap
+ERROR_PENALTY = 4.0       # How much the error rate inflates the latency score
+
+_lock = threading.Lock()
+_health = None
+
+
+def configure(failure_threshold: int = None, cooldown: float = None) -> None:
+    global FAILURE_THRESHOLD, COOLDOWN
+    if failure_threshold is not None:
+        FAILURE_THRESHOLD = failure_threshold
+    if cooldown is not None:
+        COOLDOWN = cooldown
+
+
+def _load() -> dict:
+    """Returns the in-memory health table, loading it from disk on first use. Caller holds `_lock`."""
+    global _health
+    if _health is None:
+        _health = load_json(state_path(HEALTH_FILE), default={}) or {}
+    return _health
+
+
+def _entry(health: dict, instance: str) -> dict:
+    return health.setdefault(instance, {
+        "latency_ewma": None,
+        "error_rate": 0.0,
+        "last_failure": None,
+        "consecutive_failures": 0,
+        "trips": 0,
+        "open_until": 0,
+    })
+
+
+def _save(health: dict) -> None:
+    try:
+        write_json_atomic(state_path(HEALTH_FILE), health)
+    except OSError as e:
+        logging.warning(f"⚠️ Could not persist Nitter health scores: {e}")
+
+
+def _ewma(previous, value):
+    return value if previous is None else EWMA_ALPHA * value + (1 - EWMA_ALPHA) * previous
+
+
+# ============================ #
+# 📈 RECORDING OUTCOMES        #
+# ============================ #
+
+def record_success(instance: str, latency: float) -> None:
+    """Records a search that returned usable timeline items."""
+    with _lock:
+        health = _load()
+        entry = _entry(health, instance)
+        entry["latency_ewma"] = _ewma(entry["latency_ewma"], latency)
+        entry["error_rate"] = _ewma(entry["error_rate"], 0.0)
+        entry["consecutive_failures"] = 0
+        entry["trips"] = 0
+        entry["open_until"] = 0
+        _save(health)
+
+
+def record_failure(instance: str, latency: float, reason: str = "error") -> None:
+    """Records an error, timeout or empty response; opens the breaker after repeated failures."""
+    now = time.time()
+    with _lock:
+        health = _load()
+        entry = _entry(health, instance)
+        entry["latency_ewma"] = _ewma(entry["latency_ewma"], latency)
+        entry["error_rate"] = _ewma(entry["error_rate"], 1.0)
+        entry["last_failure"] = now
+        entry["consecutive_failures"] += 1
+
+        if entry["consecutive_failures"] >= FAILURE_THRESHOLD:
+            cooldown = min(COOLDOWN * (2 ** entry["trips"]), MAX_COOLDOWN)
+            entry["trips"] += 1
+            entry["open_until"] = now + cooldown
+            entry["consecutive_failures"] = 0
+            logging.warning(f"⚡ Circuit open for {instance} ({reason}); skipping it for {cooldown / 3600:.1f}h.")
+        _save(health)
+
+
+# ============================ #
+# 🏅 RANKING                   #
+# ============================ #
+
+def score(instance: str) -> float:
+    """Lower is better. Unknown instances score 0 so new mirrors get probed."""
+    with _lock:
+        entry = _load().get(instance)
+    if not entry or entry["latency_ewma"] is None:
+        return 0.0
+    return entry["latency_ewma"] * (1 + ERROR_PENALTY * entry["error_rate"])
+
+
+def is_available(instance: str, now: float = None) -> bool:
+    """False while the instance's circuit breaker is open."""
+    now = time.time() if now is None else now
+    with _lock:
+        entry = _load().get(instance)
+    return not entry or entry["open_until"] <= now
+
+
+def rank_instances(instances: list) -> list:
+    """Returns available instances ordered best-first.
+
+    If every breaker is open, all instances are returned (best-first) so a run
+    never gives up without trying.
+    """
+    available = [instance for instance in instances if is_available(instance)]
+    if not available:
+        logging.warning("⚠️ All Nitter circuit breakers are open; trying every instance anyway.")
+        available = list(instances)
+    return sorted(available, key=score)
+
+
+def health_report() -> dict:
+    with _lock:
+        return {instance: dict(entry) for instance, entry in _load().items()}
@@ -0,0 +1,218 @@
+import calendar
+import logging
+import re
+import time
+
+# ============================ #
+# 🧩 NITTER TIMELINE PARSING   #
+# ============================ #
+
+# A Nitter search page is mostly chrome, scripts and dozens of timeline items,
+# but we only ever use the first few. Instead of building a tree of the whole
+# page, the fast backends slice out the first `limit` timeline-item blocks and
+# parse only those. The full BeautifulSoup parse stays as the fallback.
+
+BACKENDS = ("lxml", "strainer", "bs4")
+PARSER_BACKEND = "auto"  # "auto" picks lxml when installed, else strainer
+
+_TIMELINE_ITEM_RE = re.compile(r"""<div\b[^>]*\bclass\s*=\s*["'](?:[^"']*\s)?timeline-item(?=[\s"'])""", re.IGNORECASE)
+_TIMELINE_ITEM_BYTES_RE = re.compile(_TIMELINE_ITEM_RE.pattern.encode("ascii"), re.IGNORECASE)
+_STAT_ICONS = {"icon-comment": "replies", "icon-retweet": "retweets", "icon-quote": "quotes", "icon-heart": "likes"}
+
+
+def configure(backend: str = None) -> None:
+    global PARSER_BACKEND
+    if backend is not None:
+        if backend != "auto" and backend not in BACKENDS:
+            raise ValueError(f"Unknown Nitter parser backend: {backend}")
+        PARSER_BACKEND = backend
+
+
+def resolve_backend(backend: str = None) -> str:
+    """Resolves "auto" to the fastest installed backend."""
+    backend = backend or PARSER_BACKEND
+    if backend != "auto":
+        return backend
+    try:
+        import lxml.html  # noqa: F401
+        return "lxml"
+    except ImportError:
+        return "strainer"
+
+
+def _clean_text(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _tweet_id_from_href(href: str):
+    # <a class="tweet-link" href="/username/status/1234567890#m">
+    return href.split('/')[-1].split('#')[0] if href else None
+
+
+def _parse_date(title: str):
+    """Epoch seconds from a tweet-date title like "Oct 17, 2026 · 1:00 PM UTC", or None."""
+    if not title:
+        return None
+    try:
+        parsed = time.strptime(" ".join(title.replace("·", " ").replace("UTC", " ").split()), "%b %d, %Y %I:%M %p")
+    except ValueError:
+        return None
+    return float(calendar.timegm(parsed))
+
+
+def _parse_count(text: str) -> int:
+    # "1,204" (Nitter prints full numbers; an empty stat means 0)
+    digits = (text or "").strip().replace(",", "")
+    return int(digits) if digits.isdigit() else 0
+
+
+def _stats(icon_counts) -> dict:
+    """{replies, retweets, quotes, likes} from (icon classes, count text) pairs."""
+    stats = dict.fromkeys(_STAT_ICONS.values(), 0)
+    for classes, count in icon_counts:
+        for css_class in classes:
+            if css_class in _STAT_ICONS:
+                stats[_STAT_ICONS[css_class]] = _parse_count(count)
+    return stats
+
+
+def _timeline_chunks(page: str, limit: int) -> list:
+    """Returns the raw HTML of the first `limit` timeline items without parsing the page."""
+    starts = []
+    for match in _TIMELINE_ITEM_RE.finditer(page):
+        starts.append(match.start())
+        if len(starts) > limit:  # Start of the next item bounds the last one we keep
+            break
+    if not starts:
+        return []
+    bounds = starts[1:] + ([len(page)] if len(starts) <= limit else [])
+    return [page[start:end] for start, end in zip(starts, bounds)][:limit]
+
+
+def scan_timeline_items(data: bytes, pos: int = 0) -> tuple:
+    """Counts timeline-item starts in raw page bytes from `pos` on.
+
+    Returns (count, position after the last start found), so a streaming download
+    only rescans what arrived since the previous call.
+    """
+    count = 0
+    for match in _TIMELINE_ITEM_BYTES_RE.finditer(data, pos):
+        count, pos = count + 1, match.end()
+    return count, pos
+
+
+# ============================ #
+# ⚡ BACKENDS                  #
+# ============================ #
+
+def _has_class(tag: str, css_class: str) -> str:
+    return f"{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {css_class} ')]"
+
+
+_lxml_queries = {}
+
+
+def _lxml_query(name: str):
+    """Compiled XPath queries (compiling once is noticeably cheaper than `node.xpath(str)` per item)."""
+    if not _lxml_queries:
+        from lxml.etree import XPath
+
+        _lxml_queries.update({
+            "content": XPath(".//" + _has_class("div", "tweet-content")),
+            "link": XPath(".//" + _has_class("a", "tweet-link")),
+            "user": XPath(".//" + _has_class("a", "username")),
+            "date": XPath(".//" + _has_class("span", "tweet-date") + "/a/@title"),
+            "stat_icons": XPath(".//" + _has_class("span", "tweet-stat") + "//span[starts-with(@class, 'icon-')]"),
+        })
+    return _lxml_queries[name]
+
+
+def _parse_lxml(chunks: list) -> list:
+    import lxml.html
+
+    def first(node, name):
+        found = _lxml_query(name)(node)
+        return found[0] if found else None
+
+    items = []
+    for chunk in chunks:
+        node = lxml.html.fragment_fromstring(chunk, create_parent="div")
+        content, link, user = first(node, "content"), first(node, "link"), first(node, "user")
+        # <div class="icon-container"><span class="icon-heart"></span> 1,204</div>
+        icon_counts = [(icon.get("class", "").split(), icon.getparent().text_content()) for icon in _lxml_query("stat_icons")(node)]
+        items.append({
+            "tweet_text": _clean_text(content.text_content()) if content is not None else None,
+            "tweet_id": _tweet_id_from_href(link.get("href")) if link is not None else None,
+            "username": user.text_content().strip() if user is not None else None,
+            "timestamp": _parse_date(first(node, "date")),
+            "stats": _stats(icon_counts),
+        })
+    return items
+
+
+def _items_from_soup_nodes(tweet_divs) -> list:
+    items = []
+    for tweet_div in tweet_divs:
+        content = tweet_div.find("div", class_="tweet-content")
+        link = tweet_div.find("a", class_="tweet-link")
+        user = tweet_div.find("a", class_="username")
+        date = tweet_div.find("span", class_="tweet-date")
+        date_link = date.find("a") if date else None
+        icon_counts = []
+        for stat in tweet_div.find_all("span", class_="tweet-stat"):
+            icon = stat.find("span", class_=lambda css_class: bool(css_class) and css_class.startswith("icon-"))
+            if icon:
+                icon_counts.append((icon.get("class") or [], stat.get_text()))
+        items.append({
+            "tweet_text": _clean_text(content.get_text()) if content else None,
+            "tweet_id": _tweet_id_from_href(link.get("href")) if link else None,
+            "username": user.text.strip() if user else None,
+            "timestamp": _parse_date(date_link.get("title")) if date_link else None,
+            "stats": _stats(icon_counts),
+        })
+    return items
+
+
+def _parse_strainer(chunks: list) -> list:
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    def is_timeline_item(css_class) -> bool:
+        # Strainers see the raw attribute, and Nitter emits class="timeline-item " with a trailing space
+        classes = css_class.split() if isinstance(css_class, str) else (css_class or [])
+        return "timeline-item" in classes
+
+    strainer = SoupStrainer("div", class_=is_timeline_item)
+    soup = BeautifulSoup("".join(chunks), "html.parser", parse_only=strainer)
+    return _items_from_soup_nodes(soup.find_all("div", class_="timeline-item"))
+
+
+def _parse_bs4(page: str, limit: int) -> list:
+    """Original full-page parse; slow but tolerant of any markup changes."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(page, "html.parser")
+    return _items_from_soup_nodes(soup.find_all("div", class_="timeline-item")[:limit])
+
+
+# ============================ #
+# 🐦 PUBLIC API                #
+# ============================ #
+
+def parse_timeline(page: str, limit: int = 4, backend: str = None) -> list:
+    """Extracts up to `limit` timeline items from a Nitter search page.
+
+    Returns:
+        list[dict]: Items with `tweet_text`, `tweet_id`, `username`, `timestamp` (epoch
+        seconds; any of these may be None) and `stats` (replies, retweets, quotes, likes).
+    """
+    backend = resolve_backend(backend)
+    if backend != "bs4":
+        chunks = _timeline_chunks(page, limit)
+        if chunks:
+            try:
+                items = _parse_lxml(chunks) if backend == "lxml" else _parse_strainer(chunks)
+                if items:
+                    return items
+            except ImportError as e:
+                logging.warning(f"⚠️ Nitter parser backend '{backend}' unavailable ({e}); using BeautifulSoup.")
+    return _parse_bs4(page, limit)
@@ -0,0 +1,224 @@
+import logging
+import sqlite3
+import time
+import metrics
+from utils import state_path, sqlite_connect
+
+# ============================ #
+# 📮 OUTBOX                    #
+# ============================ #
+
+# Every generated tweet is written here before it is sent, so a 429 or a network
+# error never throws away a generation we already paid for. A failed send stays
+# in the outbox with the time it may be retried: the rate-limit reset for 429s
+# (see `rate_ledger.next_slot`), an exponential backoff for other errors. The
+# next run or daemon tick drains whatever is due before generating anything new.
+#
+# After MAX_ATTEMPTS failed sends, a rejection Twitter will never accept (403
+# duplicate, 400), or once a tweet is older than MAX_AGE, it is dead-lettered:
+# kept with its last error for inspection, but never sent.
+
+OUTBOX_FILE = "outbox.sqlite3"
+MAX_ATTEMPTS = 5        # Failed sends (429s not counted) before a tweet is dead-lettered
+RETRY_BACKOFF = 5 * 60  # Seconds before the first retry after an error, doubled each time
+MAX_AGE = 24 * 3600     # Older tweets are stale: dead-lettered instead of sent
+LEASE = 10 * 60         # A claimed tweet whose sender crashed is retried after this long
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    account TEXT NOT NULL,
+    text TEXT NOT NULL,
+    tweet_id TEXT,
+    username TEXT,
+    context TEXT,
+    additional_context TEXT,
+    is_reply INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS outbox_account_due ON outbox (account, status, next_attempt_at);
+"""
+
+_outbox_path = None
+
+
+def configure(max_attempts: int = None, retry_backoff: float = None, max_age: float = None, path: str = None) -> None:
+    global MAX_ATTEMPTS, RETRY_BACKOFF, MAX_AGE, _outbox_path
+    if max_attempts is not None:
+        MAX_ATTEMPTS = max(max_attempts, 1)
+    if retry_backoff is not None:
+        RETRY_BACKOFF = retry_backoff
+    if max_age is not None:
+        MAX_AGE = max_age
+    if path is not None:
+        _outbox_path = path
+
+
+def _connect():
+    return sqlite_connect(_outbox_path or state_path(OUTBOX_FILE), _SCHEMA)
+
+
+_COLUMNS = ("id", "account", "text", "tweet_id", "username", "context", "additional_context", "is_reply",
+            "status", "attempts", "last_error", "created_at", "next_attempt_at")
+
+
+def _as_entry(row) -> dict:
+    entry = dict(zip(_COLUMNS, row))
+    entry["is_reply"] = bool(entry["is_reply"])
+    return entry
+
+
+# ============================ #
+# 📝 ENQUEUE & CLAIM           #
+# ============================ #
+
+def enqueue(account: str, text: str, context: str, is_reply: bool, tweet_id: str = None, username: str = None,
+            additional_context: str = None, now: float = None):
+    """Stores a tweet to send for `account`, due right away. Returns its id, or None if it could not be stored."""
+    now = time.time() if now is None else now
+    try:
+        with _connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO outbox (account, text, tweet_id, username, context, additional_context, is_reply, "
+                "created_at, next_attempt_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (account, text, str(tweet_id) if tweet_id else None, username, context,
+                 additional_context if isinstance(additional_context, str) else None, int(bool(is_reply)), now, now),
+            )
+            return cursor.lastrowid
+    except sqlite3.Error as e:
+        logging.warning(f"⚠️ Outbox write failed: {e}")
+        return None
+
+
+def claim(account: str, entry_id: int = None, now: float = None):
+    """Takes the oldest due tweet of `account` (or tweet `entry_id`) for sending. Returns it, or None.
+
+    The tweet is leased rather than removed: select and update run in one write
+    transaction, so two processes never send the same tweet, and a sender that
+    dies before `mark_sent` / `mark_failed` only delays it by LEASE.
+    """
+    now = time.time() if now is None else now
+    query = f"SELECT {', '.join(_COLUMNS)} FROM outbox WHERE account = ? AND status = 'pending' AND next_attempt_at <= ?"
+    params = [account, now]
+    if entry_id is not None:
+        query, params = query + " AND id = ?", params + [entry_id]
+    try:
+        with _connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(query + " ORDER BY created_at LIMIT 1", params).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE outbox SET next_attempt_at = ? WHERE id = ?", (now + LEASE, row[0]))
+    except sqlite3.Error as e:
+        logging.warning(f"⚠️ Outbox read failed: {e}")
+        return None
+    return _as_entry(row)
+
+
+# ============================ #
+# 📬 SEND RESULTS              #
+# ============================ #
+
+def mark_sent(entry_id: int) -> None:
+    try:
+        with _connect() as conn:
+            conn.execute("DELETE FROM outbox WHERE id = ?", (entry_id,))
+    except sqlite3.Error as e:
+        logging.warning(f"⚠️ Outbox update failed: {e}")
+
+
+def _dead_letter(conn, entry_id: int, error: str) -> None:
+    conn.execute("UPDATE outbox SET status = 'dead', last_error = ? WHERE id = ?", (error, entry_id))
+    logging.error(f"🪦 Outbox tweet {entry_id} dead-lettered: {error}")
+
+
+def mark_failed(entry: dict, error: str, retry_at: float = None, count_attempt: bool = True, permanent: bool = False,
+                now: float = None) -> None:
+    """Reschedules a failed send for `retry_at` (default: exponential backoff) or dead-letters it.
+
+    429s pass `count_attempt=False`: waiting for a rate-limit reset is not a
+    failure of the tweet itself.
+    """
+    now = time.time() if now is None else now
+    attempts = entry["attempts"] + (1 if count_attempt else 0)
+    try:
+        with _connect() as conn:
+            conn.execute("UPDATE outbox SET attempts = ?, last_error = ? WHERE id = ?", (attempts, error, entry["id"]))
+            if permanent or attempts >= MAX_ATTEMPTS:
+                _dead_letter(conn, entry["id"], error)
+                return
+            if retry_at is None:
+                retry_at = now + RETRY_BACKOFF * 2 ** (attempts - 1)
+            conn.execute("UPDATE outbox SET status = 'pending', next_attempt_at = ? WHERE id = ?", (retry_at, entry["id"]))
+    except sqlite3.Error as e:
+        logging.warning(f"⚠️ Outbox update failed: {e}")
+        return
+    logging.info(f"📮 Tweet kept in the outbox; retry at {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(retry_at))}.")
+
+
+def expire(account: str = None, now: float = None) -> int:
+    """Dead-letters pending tweets older than MAX_AGE. Returns how many."""
+    now = time.time() if now is None else now
+    where, params = "status = 'pending' AND created_at <= ?", [now - MAX_AGE]
+    if account is not None:
+        where, params = where + " AND account = ?", params + [account]
+    try:
+        with _connect() as conn:
+            cursor = conn.execute(f"UPDATE outbox SET status = 'dead', last_error = 'expired' WHERE {where}", params)
+    except sqlite3.Error as e:
+        logging.warning(f"⚠️ Outbox update failed: {e}")
+        return 0
+    if cursor.rowcount:
+        logging.warning(f"🪦 Dead-lettered {cursor.rowcount} outbox tweet(s) older than {MAX_AGE / 3600:g}h.")
+    return cursor.rowcount
+
+
+# ============================ #
+# 📊 DEPTH & DEAD LETTERS      #
+# ============================ #
+
+def dead_letters(account: str = None) -> list:
+    """Dead-lettered tweets (all accounts unless given), oldest first."""
+    query = f"SELECT {', '.join(_COLUMNS)} FROM outbox WHERE status = 'dead'"
+    params = []
+    if account is not None:
+        query, params = query + " AND account = ?", [account]
+    try:
+        with _connect() as conn:
+            return [_as_entry(row) for row in conn.execute(query + " ORDER BY created_at", params)]
+    except sqlite3.Error as e:
+        logging.warning(f"⚠️ Outbox read failed: {e}")
+        return []
+
+
+def stats(account: str, now: float = None) -> dict:
+    """pending and due (pending and sendable now) tweets, dead letters, and the next retry time (None when empty)."""
+    now = time.time() if now is None else now
+    try:
+        with _connect() as conn:
+            pending, due, next_attempt = conn.execute(
+                "SELECT COUNT(*), SUM(next_attempt_at <= ?), MIN(next_attempt_at) FROM outbox "
+                "WHERE account = ? AND status = 'pending'",
+                (now, account),
+            ).fetchone()
+            dead = conn.execute("SELECT COUNT(*) FROM outbox WHERE account = ? AND status = 'dead'", (account,)).fetchone()[0]
+    except sqlite3.Error as e:
+        logging.warning(f"⚠️ Outbox read failed: {e}")
+        return {"pending": 0, "due": 0, "dead": 0, "next_attempt_at": None}
+    return {"pending": pending, "due": due or 0, "dead": dead, "next_attempt_at": next_attempt}
+
+
+def report(account: str) -> dict:
+    """Logs (when not empty) and exports (as gauges) the outbox size of `account`."""
+    current = stats(account)
+    if current["pending"] or current["dead"]:
+        next_attempt = (time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(current["next_attempt_at"]))
+                        if current["next_attempt_at"] is not None else "n/a")
+        logging.info(f"📮 Outbox: {current['pending']} waiting (next at {next_attempt}), {current['dead']} dead-lettered.")
+    metrics.gauge("outbox_pending", current["pending"], account=account)
+    metrics.gauge("outbox_dead", current["dead"], account=account)
+    return current
@@ -0,0 +1,334 @@
+import collections
+import cProfile
+import io
+import itertools
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import metrics
+
+# ============================ #
+# 🔬 RUN PROFILING             #
+# ============================ #
+
+# `python botty.py --profile` records why a run is slow or memory hungry and
+# writes three files per run to PROFILE_DIR:
+#   <run>.pstats  - cProfile call statistics of every thread (open with pstats or snakeviz)
+#   <run>.folded  - collapsed stacks for flamegraph.pl / speedscope, rooted at the stage
+#                   (`stage:fetch_nitter_results;stage:nitter_parse;...`)
+#   <run>.txt     - time and peak memory per stage, the top allocations at the memory
+#                   peak and at exit, and the slowest functions
+#
+# Stages are the metrics spans (grok_request, nitter_parse, together_response,
+# post_tweet, ...). A sampler thread reads every thread's stack and open stages
+# SAMPLE_HZ times a second. cProfile and tracemalloc slow everything down, so in
+# daemon mode only the sampler runs, at DAEMON_SAMPLE_HZ, unless DAEMON_DETERMINISTIC
+# is set; the daemon rewrites the .folded and .txt files after every cycle.
+
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+SAMPLE_HZ = 100
+DAEMON_SAMPLE_HZ = 5
+DAEMON_DETERMINISTIC = False
+TOP_ALLOCATIONS = 25
+TRACE_FRAMES = 1        # Frames tracemalloc keeps per allocation (reports group by line)
+PEAK_STEP = 1.25        # A new peak snapshot once traced memory grows by 25% (snapshots are slow)
+MIN_PEAK_BYTES = 4 * 1024 * 1024
+TOP_FUNCTIONS = 30      # Slowest functions (cumulative) listed in the report
+
+_OWN_FILES = frozenset((
+    __file__, tracemalloc.__file__, cProfile.__file__, pstats.__file__,
+    "<frozen importlib._bootstrap>", "<frozen importlib._bootstrap_external>", "<unknown>",
+))
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def configure(directory: str = None, sample_hz: float = None, daemon_sample_hz: float = None,
+              daemon_deterministic: bool = None, top_allocations: int = None) -> None:
+    global PROFILE_DIR, SAMPLE_HZ, DAEMON_SAMPLE_HZ, DAEMON_DETERMINISTIC, TOP_ALLOCATIONS
+    if directory:
+        PROFILE_DIR = directory
+    if sample_hz is not None:
+        SAMPLE_HZ = max(sample_hz, 0.1)
+    if daemon_sample_hz is not None:
+        DAEMON_SAMPLE_HZ = max(daemon_sample_hz, 0.1)
+    if daemon_deterministic is not None:
+        DAEMON_DETERMINISTIC = daemon_deterministic
+    if top_allocations is not None:
+        TOP_ALLOCATIONS = max(top_allocations, 1)
+
+
+def _format_bytes(size: float) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def _write_text(path: str, text: str) -> None:
+    """Writes via a temp file + rename, so a daemon rewrite never leaves a partial file."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+# ============================ #
+# 📸 STACK SAMPLER             #
+# ============================ #
+
+class _Sampler(threading.Thread):
+    """Samples every thread's stack and open stages; tracks traced memory per stage."""
+
+    def __init__(self, interval: float):
+        super().__init__(name="profiler", daemon=True)
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.lock = threading.Lock()
+        self.stacks = collections.Counter()         # Collapsed stack -> samples
+        self.stage_samples = collections.Counter()  # Stage -> samples with it open (any depth)
+        self.self_samples = collections.Counter()   # Stage -> samples with it innermost
+        self.stage_memory = {}                      # Stage -> highest traced bytes seen while open
+        self.samples = 0
+        self.peak = None                            # (bytes, stages, snapshot) of the largest memory peak
+        self._labels = {}                           # Code object -> "function (file:line)"
+
+    def run(self) -> None:
+        own = threading.get_ident()
+        while not self.stopped.wait(self.interval):
+            try:
+                self.sample(own)
+            except Exception as e:  # A failing sample must never take the bot down
+                logging.debug(f"🔬 Profiler sample failed: {e}")
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        return label
+
+    def _collapse(self, frame) -> str:
+        labels = []
+        while frame is not None:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        return ";".join(reversed(labels))
+
+    def sample(self, own: int) -> None:
+        stages = metrics.current_stages()
+        frames = sys._current_frames()
+        traced = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        with self.lock:
+            self.samples += 1
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                open_stages = stages.get(ident, ())
+                root = ";".join(f"stage:{name}" for name in open_stages) or "stage:none"
+                self.stacks[f"{root};{self._collapse(frame)}"] += 1
+                if open_stages:
+                    self.self_samples[open_stages[-1]] += 1
+                for name in set(open_stages):
+                    self.stage_samples[name] += 1
+                    if traced is not None:
+                        self.stage_memory[name] = max(self.stage_memory.get(name, 0), traced)
+            del frames
+            if traced is not None and traced >= MIN_PEAK_BYTES and (self.peak is None or traced >= self.peak[0] * PEAK_STEP):
+                # Spikes (a huge page parse, a large model answer) are freed by the end of
+                # the run, so allocation sites are captured while memory is at its highest
+                busy = sorted({"/".join(open_stages) for open_stages in stages.values()})
+                self.peak = (traced, busy, tracemalloc.take_snapshot())
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.join(timeout=5)
+
+
+# ============================ #
+# ⏱ CPROFILE IN EVERY THREAD   #
+# ============================ #
+
+class _ThreadProfiles:
+    """One cProfile.Profile per thread: the bot runs accounts, Nitter races and LLM
+    hedges on worker threads, which a single Profile (main thread only) would miss."""
+
+    def __init__(self):
+        self.profiles = []
+        self.lock = threading.Lock()
+
+    def _hook(self, frame, event, arg):
+        # Runs once in each new thread; enabling the Profile replaces this hook
+        profile = cProfile.Profile()
+        with self.lock:
+            self.profiles.append(profile)
+        profile.enable()
+
+    def start(self) -> None:
+        threading.setprofile(self._hook)
+        self._hook(None, None, None)
+
+    def stop(self) -> None:
+        """Stops profiling this thread and keeps new threads from being profiled."""
+        threading.setprofile(None)
+        with self.lock:
+            self.profiles[0].disable()
+
+    def merged(self):
+        """The merged pstats.Stats of all threads (None if nothing ran)."""
+        with self.lock:
+            profiles = [profile for profile in self.profiles if profile.getstats()]
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+
+# ============================ #
+# 📝 SESSION & REPORTS         #
+# ============================ #
+
+class _Session:
+    def __init__(self, daemon: bool):
+        self.started = time.time()
+        self.stem = os.path.join(PROFILE_DIR, f"botty-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+        self.deterministic = DAEMON_DETERMINISTIC or not daemon
+        self.hz = DAEMON_SAMPLE_HZ if daemon else SAMPLE_HZ
+        self.sampler = _Sampler(1 / self.hz)
+        self.profiles = _ThreadProfiles() if self.deterministic else None
+        self.write_lock = threading.Lock()
+
+    def start(self) -> None:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        metrics.configure(track_stages=True)
+        if self.deterministic:
+            tracemalloc.start(TRACE_FRAMES)
+        self.sampler.start()
+        if self.profiles:
+            self.profiles.start()
+
+    def _stage_lines(self) -> list:
+        sampler = self.sampler
+        busy = sum(sampler.self_samples.values())
+        lines = [f"Stages ({sampler.samples} samples at {self.hz:g} Hz; share of samples inside any stage)"]
+        if not busy:
+            return lines + ["  (no stage was running during a sample)"]
+        lines.append(f"  {'stage':<28}{'total':>8}{'self':>8}{'peak traced':>14}")
+        for name, count in sampler.stage_samples.most_common():
+            memory = sampler.stage_memory.get(name)
+            lines.append(
+                f"  {name:<28}{count / busy:>8.1%}{sampler.self_samples[name] / busy:>8.1%}"
+                f"{_format_bytes(memory) if memory is not None else 'n/a':>14}"
+            )
+        return lines
+
+    def _allocation_lines(self, title: str, snapshot) -> list:
+        lines = [title]
+        # Skipping the profiler's own lines afterwards is much cheaper than snapshot.filter_traces
+        top = (stat for stat in snapshot.statistics("lineno") if stat.traceback[0].filename not in _OWN_FILES)
+        for rank, stat in enumerate(itertools.islice(top, TOP_ALLOCATIONS), start=1):
+            frame = stat.traceback[0]
+            lines.append(f"  {rank:>3}. {frame.filename}:{frame.lineno}: {_format_bytes(stat.size)} in {stat.count} blocks")
+        return lines
+
+    def report(self, stats=None, snapshot=None) -> str:
+        lines = [
+            f"PigeonCall profile {os.path.basename(self.stem)}: "
+            f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started))}, {time.time() - self.started:.1f}s",
+            "",
+        ]
+        with self.sampler.lock:
+            lines += self._stage_lines()
+            peak = self.sampler.peak
+        if not self.deterministic:
+            lines += ["", "Allocation tracing off (daemon mode without [Profile] DAEMON_DETERMINISTIC)."]
+        else:
+            lines.append("")
+            if peak is not None:
+                lines += self._allocation_lines(
+                    f"Top {TOP_ALLOCATIONS} allocations at the memory peak ({_format_bytes(peak[0])}, "
+                    f"during {', '.join(peak[1]) or 'no stage'})", peak[2])
+            else:
+                lines.append(f"Traced memory never reached {_format_bytes(MIN_PEAK_BYTES)}; no peak snapshot.")
+            if snapshot is not None:
+                lines += [""] + self._allocation_lines(f"Top {TOP_ALLOCATIONS} allocations still held at exit", snapshot)
+        if stats is not None:
+            buffer = io.StringIO()
+            stats.stream = buffer
+            stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+            lines += ["", f"Slowest {TOP_FUNCTIONS} functions (cumulative, all threads)", buffer.getvalue().strip()]
+        return "\n".join(lines) + "\n"
+
+    def flush(self, stats=None, snapshot=None) -> None:
+        with self.sampler.lock:
+            folded = "".join(f"{stack} {count}\n" for stack, count in self.sampler.stacks.items())
+        with self.write_lock:
+            _write_text(f"{self.stem}.folded", folded)
+            _write_text(f"{self.stem}.txt", self.report(stats, snapshot))
+
+    def stop(self) -> None:
+        if self.profiles:
+            self.profiles.stop()
+        self.sampler.stop()
+        snapshot = None
+        if self.deterministic:
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+        metrics.configure(track_stages=False)
+        # Merging the per-thread stats allocates a lot; done after tracing stopped
+        stats = self.profiles.merged() if self.profiles else None
+        if stats is not None:
+            stats.dump_stats(f"{self.stem}.pstats")
+        self.flush(stats, snapshot)
+
+
+def start(daemon: bool = False) -> bool:
+    """Starts profiling this process (no-op if already running). Returns whether it started."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            return False
+        try:
+            session = _Session(daemon)
+            session.start()
+        except OSError as e:
+            logging.error(f"❌ Could not start profiling: {e}")
+            return False
+        _session = session
+    mode = "cProfile + tracemalloc + sampling" if session.deterministic else "sampling only"
+    logging.info(f"🔬 Profiling ({mode} at {session.hz:g} Hz) into {session.stem}.*")
+    return True
+
+
+def flush() -> None:
+    """Rewrites the collapsed stacks and report of the running profile (daemon cycles)."""
+    session = _session
+    if session is None:
+        return
+    try:
+        session.flush()
+    except OSError as e:
+        logging.warning(f"⚠️ Profile write failed: {e}")
+
+
+def stop() -> None:
+    """Stops profiling and writes the .pstats, .folded and .txt files."""
+    global _session
+    with _session_lock:
+        session, _session = _session, None
+    if session is None:
+        return
+    try:
+        session.stop()
+    except OSError as e:
+        logging.error(f"❌ Profile write failed: {e}")
+        return
+    extras = ".pstats, .folded" if session.deterministic else ".folded"
+    logging.info(f"🔬 Profile written to {session.stem}.txt ({extras})")
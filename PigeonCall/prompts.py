@@ -0,0 +1,149 @@
+import logging
+import os
+import re
+import sys
+import threading
+from string import Template
+
+# ============================ #
+# 🧾 PROMPT TEMPLATES          #
+# ============================ #
+
+# Prompts live in prompts/<name>.txt as string.Template files ($variable, $$ for a
+# literal dollar sign). A template is compiled once and reused until its file's
+# mtime changes, so prompts can be edited while the daemon runs. Files starting
+# with "_" are shared snippets: `$_tweet_format` in a template inserts
+# prompts/_tweet_format.txt, so instructions repeated across prompts live once.
+#
+# Every rendered prompt is counted in (estimated) tokens; a template whose text
+# alone, or whose rendered prompt, exceeds its budget is flagged in the log,
+# because input tokens are a large part of each call's latency and cost.
+
+PROMPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompts")
+PERSONA = "a sharp, witty commentator on crypto, politics and cyber security"
+TONE = "witty, insightful and slightly controversial"
+DEFAULT_BUDGET = 400  # Tokens per rendered prompt, unless BUDGETS has the template
+BUDGETS = {}          # Template name -> token budget
+
+_templates = {}  # name -> (mtime, Template, static token count, snippet names)
+_templates_lock = threading.Lock()
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def configure(persona: str = None, tone: str = None, directory: str = None, default_budget: int = None,
+              budgets: dict = None) -> None:
+    global PERSONA, TONE, PROMPTS_DIR, DEFAULT_BUDGET
+    if persona:
+        PERSONA = persona
+    if tone:
+        TONE = tone
+    if directory:
+        PROMPTS_DIR = directory
+        with _templates_lock:
+            _templates.clear()
+    if default_budget is not None:
+        DEFAULT_BUDGET = default_budget
+    if budgets:
+        BUDGETS.update(budgets)
+
+
+def _tiktoken_encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:  # Not installed, or the encoding can't be downloaded
+        return None
+
+
+_encoding = None
+_encoding_checked = False
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count with tiktoken when installed, else ~1 token per word or punctuation mark."""
+    global _encoding, _encoding_checked
+    if not _encoding_checked:
+        _encoding, _encoding_checked = _tiktoken_encoding(), True
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return len(_TOKEN_RE.findall(text))
+
+
+def budget(name: str) -> int:
+    return BUDGETS.get(name, DEFAULT_BUDGET)
+
+
+def get_template(name: str) -> Template:
+    """Returns the compiled template, re-reading the file when it changed on disk."""
+    path = os.path.join(PROMPTS_DIR, f"{name}.txt")
+    mtime = os.stat(path).st_mtime_ns
+    with _templates_lock:
+        cached = _templates.get(name)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+    with open(path, "r", encoding="utf-8") as f:
+        template = Template(f.read().strip())
+    snippets = tuple(identifier for identifier in template.get_identifiers() if identifier.startswith("_"))
+    static_tokens = estimate_tokens(template.template)
+    if static_tokens > budget(name):
+        logging.warning(f"⚠️ Prompt template '{name}' alone is {static_tokens} tokens (budget {budget(name)}).")
+    with _templates_lock:
+        if cached:
+            logging.info(f"🔄 Reloaded prompt template '{name}'.")
+        _templates[name] = (mtime, template, static_tokens, snippets)
+    return template
+
+
+def _fill(name: str, variables: dict) -> str:
+    template = get_template(name)
+    for snippet in _templates[name][3]:
+        if snippet not in variables:
+            variables[snippet] = _fill(snippet, variables)
+    return template.substitute(variables)
+
+
+def render(name: str, **variables) -> str:
+    """Fills a template; `persona` and `tone` default to the configured voice.
+
+    Raises KeyError when the template uses a variable that was not passed.
+    """
+    variables.setdefault("persona", PERSONA)
+    variables.setdefault("tone", TONE)
+    prompt = _fill(name, variables)
+    tokens = estimate_tokens(prompt)
+    if tokens > budget(name):
+        logging.warning(f"⚠️ Prompt '{name}' is {tokens} tokens, over its budget of {budget(name)}.")
+    else:
+        logging.info(f"🧾 Prompt '{name}': {tokens} tokens.")
+    return prompt
+
+
+def _snippets(name: str) -> set:
+    found = set()
+    for snippet in _templates[name][3]:
+        get_template(snippet)
+        found |= {snippet} | _snippets(snippet)
+    return found
+
+
+def report() -> list:
+    """(name, static tokens, budget) for every template in PROMPTS_DIR, snippets counted in."""
+    rows = []
+    for filename in sorted(os.listdir(PROMPTS_DIR)):
+        if filename.endswith(".txt") and not filename.startswith("_"):
+            name = filename[:-len(".txt")]
+            get_template(name)
+            tokens = _templates[name][2] + sum(_templates[snippet][2] for snippet in _snippets(name))
+            rows.append((name, tokens, budget(name)))
+    return rows
+
+
+if __name__ == "__main__":
+    # python prompts.py: token size of every template before variables are filled in
+    over = False
+    for name, tokens, limit in report():
+        flag = "  OVER BUDGET" if tokens > limit else ""
+        over = over or bool(flag)
+        print(f"{name:<24}{tokens:>6} tokens  (budget {limit}){flag}")
+    sys.exit(1 if over else 0)
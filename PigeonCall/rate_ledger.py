@@ -0,0 +1,148 @@
+import logging
+import threading
+import time
+from utils import state_path, load_json, write_json_atomic
+
+# ============================ #
+# 🧾 LOCAL RATE-LIMIT LEDGER   #
+# ============================ #
+
+# Keeps our own record of posts per 15 minutes, day and month, plus whatever the
+# x-rate-limit-* / x-user-limit-24hour-* headers of create_tweet responses (and
+# 429s) told us. "Can I post now?" is answered from disk without a network call.
+
+LEDGER_FILE = "rate_ledger{suffix}.json"
+WINDOWS = {
+    "15min": 15 * 60,
+    "daily": 24 * 3600,
+    "monthly": 30 * 24 * 3600,
+}
+LIMITS = {
+    "15min": 10,    # Burst guard for batches
+    "daily": 17,    # Free Twitter API tier: 17 posts / 24h
+    "monthly": 500,  # Free Twitter API tier: 500 posts / month
+}
+DEFAULT_BACKOFF = 15 * 60  # Block for this long after a 429 without a reset header
+
+# Header prefixes whose `-remaining` / `-reset` values can block posting
+_HEADER_PREFIXES = ("x-rate-limit", "x-user-limit-24hour", "x-app-limit-24hour")
+
+_lock = threading.Lock()
+
+
+def configure(per_15min: int = None, daily: int = None, monthly: int = None) -> None:
+    for window, limit in (("15min", per_15min), ("daily", daily), ("monthly", monthly)):
+        if limit is not None:
+            LIMITS[window] = limit
+
+
+def _path(account: str) -> str:
+    return state_path(LEDGER_FILE.format(suffix="" if account == "default" else f"_{account}"))
+
+
+def _load(account: str) -> dict:
+    ledger = load_json(_path(account), default=None) or {}
+    ledger.setdefault("posts", [])
+    ledger.setdefault("blocked_until", 0)
+    ledger.setdefault("headers", {})
+    return ledger
+
+
+def _save(account: str, ledger: dict, now: float) -> None:
+    # Only the longest window matters for the history
+    ledger["posts"] = [ts for ts in ledger["posts"] if now - ts < WINDOWS["monthly"]]
+    try:
+        write_json_atomic(_path(account), ledger)
+    except OSError as e:
+        logging.warning(f"⚠️ Could not persist rate ledger: {e}")
+
+
+def _apply_headers(ledger: dict, headers, now: float) -> None:
+    """Blocks posting until reset when any rate-limit header reports nothing remaining."""
+    if not headers:
+        return
+    for prefix in _HEADER_PREFIXES:
+        remaining, reset = headers.get(f"{prefix}-remaining"), headers.get(f"{prefix}-reset")
+        if remaining is None:
+            continue
+        try:
+            remaining, reset = int(remaining), int(reset) if reset is not None else None
+        except ValueError:
+            continue
+        ledger["headers"][prefix] = {"remaining": remaining, "reset": reset, "seen_at": now}
+        if remaining <= 0 and reset:
+            ledger["blocked_until"] = max(ledger["blocked_until"], reset)
+
+
+# ============================ #
+# 📝 RECORDING                 #
+# ============================ #
+
+def record_post(headers=None, account: str = "default", now: float = None) -> None:
+    """Records a successful post and the rate-limit headers of its response."""
+    now = time.time() if now is None else now
+    with _lock:
+        ledger = _load(account)
+        ledger["posts"].append(now)
+        _apply_headers(ledger, headers, now)
+        _save(account, ledger, now)
+
+
+def record_rate_limited(headers=None, account: str = "default", now: float = None) -> None:
+    """Records a 429; posting stays blocked until the reset time from the headers."""
+    now = time.time() if now is None else now
+    with _lock:
+        ledger = _load(account)
+        _apply_headers(ledger, headers, now)
+        if ledger["blocked_until"] <= now:
+            ledger["blocked_until"] = now + DEFAULT_BACKOFF
+        _save(account, ledger, now)
+        logging.warning(f"⏳ Rate limited until {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ledger['blocked_until']))}.")
+
+
+# ============================ #
+# 🔎 QUERIES (NO NETWORK)      #
+# ============================ #
+
+def available(account: str = "default", now: float = None) -> int:
+    """How many posts can go out right now without breaking any window."""
+    now = time.time() if now is None else now
+    with _lock:
+        ledger = _load(account)
+    if ledger["blocked_until"] > now:
+        return 0
+    return max(min(
+        LIMITS[window] - sum(1 for ts in ledger["posts"] if now - ts < span)
+        for window, span in WINDOWS.items()
+    ), 0)
+
+
+def can_post(account: str = "default", now: float = None) -> bool:
+    return available(account, now) > 0
+
+
+def next_slot(account: str = "default", now: float = None) -> float:
+    """Timestamp of the earliest moment a post is allowed (`now` if allowed already)."""
+    now = time.time() if now is None else now
+    with _lock:
+        ledger = _load(account)
+    slot = max(now, ledger["blocked_until"])
+    for window, span in WINDOWS.items():
+        in_window = sorted(ts for ts in ledger["posts"] if slot - ts < span)
+        excess = len(in_window) - LIMITS[window] + 1
+        if excess > 0:  # Wait until enough of the oldest posts leave the window
+            slot = max(slot, in_window[excess - 1] + span)
+    return slot
+
+
+def status(account: str = "default", now: float = None) -> dict:
+    now = time.time() if now is None else now
+    with _lock:
+        ledger = _load(account)
+    used = {window: sum(1 for ts in ledger["posts"] if now - ts < span) for window, span in WINDOWS.items()}
+    return {
+        "used": used,
+        "limits": dict(LIMITS),
+        "blocked_until": ledger["blocked_until"],
+        "headers": ledger["headers"],
+    }
@@ -0,0 +1,104 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from utils import state_path, sqlite_connect
+
+# ============================ #
+# ♻️ AI RESPONSE CACHE         #
+# ============================ #
+
+# Persistent SQLite cache for AI responses that do not need to be fresh on every
+# run (e.g. Grok topic discovery). Entries expire after a TTL, and the table is
+# capped with least-recently-used eviction. Each cache hit is counted so callers
+# can rotate through the items of one cached answer.
+
+CACHE_FILE = "response_cache.sqlite3"
+DEFAULT_TTL = 3600       # Seconds a cached response stays valid
+MAX_ENTRIES = 256        # LRU cap on stored responses
+FORCE_REFRESH = False    # Bypass reads (writes still happen) when True
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+_cache_path = None
+
+
+def configure(ttl: float = None, max_entries: int = None, force_refresh: bool = None, path: str = None) -> None:
+    global DEFAULT_TTL, MAX_ENTRIES, FORCE_REFRESH, _cache_path
+    if ttl is not None:
+        DEFAULT_TTL = ttl
+    if max_entries is not None:
+        MAX_ENTRIES = max_entries
+    if force_refresh is not None:
+        FORCE_REFRESH = force_refresh
+    if path is not None:
+        _cache_path = path
+
+
+def _connect():
+    return sqlite_connect(_cache_path or state_path(CACHE_FILE), _SCHEMA)
+
+
+def cache_key(*parts) -> str:
+    """Stable key for e.g. (provider, model, prompt, temperature)."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def get(key: str, ttl: float = None):
+    """Returns the cached value, or None if missing, expired or a refresh is forced."""
+    if FORCE_REFRESH:
+        return None
+    ttl = DEFAULT_TTL if ttl is None else ttl
+    now = time.time()
+    try:
+        with _connect() as conn:
+            row = conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > ttl:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE responses SET accessed_at = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            return row[0]
+    except sqlite3.Error as e:
+        logging.warning(f"⚠️ Response cache read failed: {e}")
+        return None
+
+
+def hits(key: str) -> int:
+    """How many times the current entry for `key` was served from the cache."""
+    try:
+        with _connect() as conn:
+            row = conn.execute("SELECT hits FROM responses WHERE key = ?", (key,)).fetchone()
+            return row[0] if row else 0
+    except sqlite3.Error as e:
+        logging.warning(f"⚠️ Response cache read failed: {e}")
+        return 0
+
+
+def put(key: str, value: str) -> None:
+    """Stores a response and evicts the least recently used entries beyond MAX_ENTRIES."""
+    now = time.time()
+    try:
+        with _connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at, hits) VALUES (?, ?, ?, ?, 0)",
+                (key, value, now, now),
+            )
+            conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (MAX_ENTRIES,),
+            )
+    except sqlite3.Error as e:
+        logging.warning(f"⚠️ Response cache write failed: {e}")
@@ -0,0 +1,37 @@
+import logging
+import random
+import threading
+import time
+
+# ============================ #
+# ⏰ DAEMON SCHEDULER          #
+# ============================ #
+
+DEFAULT_POSTS_PER_DAY = 17  # Free Twitter API tier allows 17 posts a day
+DEFAULT_JITTER = 0.25       # +/- fraction of the interval, so posts don't land on a fixed grid
+
+
+def next_delay(posts_per_day: float = DEFAULT_POSTS_PER_DAY, jitter: float = DEFAULT_JITTER) -> float:
+    """Seconds until the next cycle: the even spacing for `posts_per_day`, jittered."""
+    interval = 86400 / max(posts_per_day, 0.001)
+    jitter = min(max(jitter, 0.0), 1.0)
+    return interval * random.uniform(1 - jitter, 1 + jitter)
+
+
+def run_forever(cycle, posts_per_day: float = DEFAULT_POSTS_PER_DAY, jitter: float = DEFAULT_JITTER,
+                stop_event: threading.Event = None) -> None:
+    """Runs `cycle()` now and then on the jittered schedule until `stop_event` is set.
+
+    A failing cycle is logged and the schedule carries on.
+    """
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        started = time.monotonic()
+        try:
+            cycle()
+        except Exception:
+            logging.exception("❌ Bot cycle crashed; continuing on schedule.")
+
+        delay = max(next_delay(posts_per_day, jitter) - (time.monotonic() - started), 0)
+        logging.info(f"⏰ Next cycle in {delay / 60:.1f} minutes.")
+        stop_event.wait(delay)
@@ -0,0 +1,256 @@
+import hashlib
+import logging
+import re
+import sqlite3
+import time
+from utils import state_path, sqlite_connect
+
+# ============================ #
+# 👀 SEEN / POSTED INDEX       #
+# ============================ #
+
+# Persistent record of what we already did, so a run can skip work before paying
+# for Grok / TogetherAI calls:
+#   - tweet IDs we replied to, and usernames (with a cooldown between replies)
+#   - topics we covered (with a cooldown)
+#   - exact hashes and 64-bit SimHashes of posted texts, for duplicate checks
+# ID, user, topic and exact-text lookups are primary-key probes, so their cost stays
+# flat as history grows.
+#
+# Near duplicates: two texts are near duplicates when their SimHashes differ in at
+# most NEAR_DUPLICATE_DISTANCE bits. The fingerprint is split into SIMHASH_BANDS
+# bands; with distance < bands, a near duplicate must match at least one band
+# exactly (pigeonhole), so only rows sharing a band value are compared (about
+# n * 8 / 256 rows for 8-bit bands, a few hundred at tens of thousands of posts).
+
+INDEX_FILE = "seen_index.sqlite3"
+USER_COOLDOWN = 3 * 24 * 3600   # Don't reply to the same user again for this long
+TOPIC_COOLDOWN = 24 * 3600      # Don't cover the same topic again for this long
+NEAR_DUPLICATE_DISTANCE = 6     # Max differing SimHash bits (one inserted word in a tweet is ~6)
+SIMHASH_BANDS = 8               # 8 bands of 8 bits
+
+_BAND_BITS = 64 // SIMHASH_BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+_WORD_RE = re.compile(r"[a-z0-9#@$']+")
+_URL_RE = re.compile(r"https?://\S+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS replied_tweets (
+    tweet_id TEXT PRIMARY KEY,
+    username TEXT,
+    replied_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    last_replied_at REAL NOT NULL,
+    replies INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS topics (
+    topic TEXT PRIMARY KEY,
+    last_used_at REAL NOT NULL,
+    uses INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS posted (
+    text_hash TEXT PRIMARY KEY,
+    simhash INTEGER NOT NULL,
+    posted_at REAL NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS posted_bands (
+    band INTEGER NOT NULL,
+    value INTEGER NOT NULL,
+    text_hash TEXT NOT NULL,
+    PRIMARY KEY (band, value, text_hash)
+) WITHOUT ROWID;
+"""
+
+_index_path = None
+
+
+def configure(user_cooldown: float = None, topic_cooldown: float = None, near_duplicate_distance: int = None,
+              path: str = None) -> None:
+    global USER_COOLDOWN, TOPIC_COOLDOWN, NEAR_DUPLICATE_DISTANCE, _index_path
+    if user_cooldown is not None:
+        USER_COOLDOWN = user_cooldown
+    if topic_cooldown is not None:
+        TOPIC_COOLDOWN = topic_cooldown
+    if near_duplicate_distance is not None:
+        if near_duplicate_distance >= SIMHASH_BANDS:
+            raise ValueError(f"Near-duplicate distance must be below {SIMHASH_BANDS} (the number of SimHash bands)")
+        NEAR_DUPLICATE_DISTANCE = near_duplicate_distance
+    if path is not None:
+        _index_path = path
+
+
+def _connect():
+    return sqlite_connect(_index_path or state_path(INDEX_FILE), _SCHEMA)
+
+
+# ============================ #
+# 🔑 NORMALISATION & HASHING   #
+# ============================ #
+
+def normalize_username(username: str) -> str:
+    return (username or "").strip().lstrip("@").lower()
+
+
+def topic_key(topic: str) -> str:
+    """Normalises a topic or a "Topic: ...\\nContext: ..." block to its title."""
+    title = (topic or "").strip().split("\n", 1)[0].replace("**", "")
+    title = re.sub(r"(?i)^\s*topic:\s*", "", title)
+    return " ".join(_WORD_RE.findall(title.lower()))
+
+
+def _tokens(text: str) -> list:
+    words = _WORD_RE.findall(_URL_RE.sub(" ", (text or "").lower()))
+    # Word bigrams keep some word order; single words keep short tweets comparable
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def text_hash(text: str) -> str:
+    """Exact-duplicate hash, insensitive to case, punctuation, spacing and links."""
+    return hashlib.sha256(" ".join(_WORD_RE.findall(_URL_RE.sub(" ", (text or "").lower()))).encode("utf-8")).hexdigest()
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash of the text's words and word bigrams."""
+    weights = [0] * 64
+    for token in _tokens(text):
+        value = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def _to_sql(value: int) -> int:
+    """SQLite integers are signed 64-bit."""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _from_sql(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+def _bands(fingerprint: int) -> list:
+    return [(band, fingerprint >> (band * _BAND_BITS) & _BAND_MASK) for band in range(SIMHASH_BANDS)]
+
+
+# ============================ #
+# 🔎 LOOKUPS                   #
+# ============================ #
+
+def filter_candidates(candidates: list, now: float = None) -> list:
+    """Drops candidate tweets already replied to, or by users still on cooldown.
+
+    `candidates` are dicts with `tweet_id` and `username` (as returned by
+    `nitter_parser.parse_timeline`); order is preserved.
+    """
+    if not candidates:
+        return []
+    now = time.time() if now is None else now
+    tweet_ids = [str(candidate["tweet_id"]) for candidate in candidates]
+    usernames = [normalize_username(candidate["username"]) for candidate in candidates]
+    try:
+        with _connect() as conn:
+            replied = {row[0] for row in conn.execute(
+                f"SELECT tweet_id FROM replied_tweets WHERE tweet_id IN ({','.join('?' * len(tweet_ids))})", tweet_ids
+            )}
+            cooling = {row[0] for row in conn.execute(
+                f"SELECT username FROM users WHERE last_replied_at > ? AND username IN ({','.join('?' * len(usernames))})",
+                [now - USER_COOLDOWN] + usernames,
+            )}
+    except sqlite3.Error as e:
+        logging.warning(f"⚠️ Seen index read failed: {e}")
+        return list(candidates)
+
+    fresh = [
+        candidate for candidate, tweet_id, username in zip(candidates, tweet_ids, usernames)
+        if tweet_id not in replied and username not in cooling
+    ]
+    if len(fresh) < len(candidates):
+        logging.info(f"👀 Skipped {len(candidates) - len(fresh)} already-seen tweet(s)/user(s).")
+    return fresh
+
+
+def topic_recently_used(topic: str, now: float = None) -> bool:
+    now = time.time() if now is None else now
+    try:
+        with _connect() as conn:
+            row = conn.execute("SELECT last_used_at FROM topics WHERE topic = ?", (topic_key(topic),)).fetchone()
+    except sqlite3.Error as e:
+        logging.warning(f"⚠️ Seen index read failed: {e}")
+        return False
+    return row is not None and now - row[0] < TOPIC_COOLDOWN
+
+
+def find_duplicate(text: str):
+    """Returns the previously posted text that `text` duplicates or nearly duplicates, else None."""
+    exact = text_hash(text)
+    fingerprint = simhash(text)
+    bands = _bands(fingerprint)
+    try:
+        with _connect() as conn:
+            row = conn.execute("SELECT text FROM posted WHERE text_hash = ?", (exact,)).fetchone()
+            if row:
+                return row[0]
+            rows = conn.execute(
+                "SELECT DISTINCT p.simhash, p.text FROM posted_bands b JOIN posted p ON p.text_hash = b.text_hash "
+                f"WHERE {' OR '.join('(b.band = ? AND b.value = ?)' for _ in bands)}",
+                [value for band in bands for value in band],
+            ).fetchall()
+    except sqlite3.Error as e:
+        logging.warning(f"⚠️ Seen index read failed: {e}")
+        return None
+    for stored, stored_text in rows:
+        if bin(fingerprint ^ _from_sql(stored)).count("1") <= NEAR_DUPLICATE_DISTANCE:
+            return stored_text
+    return None
+
+
+def is_duplicate(text: str) -> bool:
+    """True when `text` (nearly) repeats something we already posted."""
+    previous = find_duplicate(text)
+    if previous is not None:
+        logging.warning(f"♻️ Generated tweet duplicates an earlier post: {previous}")
+        return True
+    return False
+
+
+# ============================ #
+# 📝 RECORDING                 #
+# ============================ #
+
+def record_post(text: str, tweet_id: str = None, username: str = None, topic: str = None, now: float = None) -> None:
+    """Records a posted tweet: its text fingerprints, the tweet/user replied to and the topic."""
+    now = time.time() if now is None else now
+    exact = text_hash(text)
+    fingerprint = simhash(text)
+    try:
+        with _connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO posted (text_hash, simhash, posted_at, text) VALUES (?, ?, ?, ?)",
+                (exact, _to_sql(fingerprint), now, text),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO posted_bands (band, value, text_hash) VALUES (?, ?, ?)",
+                [(band, value, exact) for band, value in _bands(fingerprint)],
+            )
+            if tweet_id:
+                conn.execute(
+                    "INSERT OR REPLACE INTO replied_tweets (tweet_id, username, replied_at) VALUES (?, ?, ?)",
+                    (str(tweet_id), normalize_username(username), now),
+                )
+            if username:
+                conn.execute(
+                    "INSERT INTO users (username, last_replied_at, replies) VALUES (?, ?, 1) "
+                    "ON CONFLICT(username) DO UPDATE SET last_replied_at = excluded.last_replied_at, replies = replies + 1",
+                    (normalize_username(username), now),
+                )
+            if topic and topic_key(topic):
+                conn.execute(
+                    "INSERT INTO topics (topic, last_used_at, uses) VALUES (?, ?, 1) "
+                    "ON CONFLICT(topic) DO UPDATE SET last_used_at = excluded.last_used_at, uses = uses + 1",
+                    (topic_key(topic), now),
+                )
+    except sqlite3.Error as e:
+        logging.warning(f"⚠️ Seen index write failed: {e}")
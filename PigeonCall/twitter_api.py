@@ -1,12 +1,71 @@
 import logging
-import tweepy
+import threading
 import time
+import metrics
+import rate_ledger
+
+# tweepy and requests are imported inside the functions that post, so runs that
+# stop early (rate limited, nothing to post) never load them.
+
+TWITTER_API_BASE = "https://api.twitter.com"  # tweepy hardcodes this host; other bases are rewritten
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def configure(api_base: str = None) -> None:
+    """Points the Twitter v2 client at another base URL (e.g. a local stub for benchmarks)."""
+    global TWITTER_API_BASE
+    if api_base is not None:
+        with _clients_lock:
+            TWITTER_API_BASE = api_base.rstrip("/")
+            _clients.clear()
+
+def _rebased_session(api_base: str):
+    """A requests session that sends tweepy's api.twitter.com calls to `api_base` instead."""
+    import requests
+
+    class _RebasedSession(requests.Session):
+        def request(self, method, url, *args, **kwargs):
+            if url.startswith("https://api.twitter.com"):
+                url = api_base + url[len("https://api.twitter.com"):]
+            return super().request(method, url, *args, **kwargs)
+
+    return _RebasedSession()
+
+def get_client(api_key: str, api_key_secret: str, access_token: str, access_token_secret: str) -> "tweepy.Client":
+    """Returns a cached tweepy client per credential set so its HTTP session stays warm.
+
+    The client returns raw `requests.Response` objects so rate-limit headers are available.
+    """
+    import requests
+    import tweepy
+
+    credentials = (api_key, api_key_secret, access_token, access_token_secret)
+    with _clients_lock:
+        if credentials not in _clients:
+            _clients[credentials] = tweepy.Client(
+                consumer_key=api_key,
+                consumer_secret=api_key_secret,
+                access_token=access_token,
+                access_token_secret=access_token_secret,
+                return_type=requests.Response,
+            )
+            if TWITTER_API_BASE != "https://api.twitter.com":
+                _clients[credentials].session = _rebased_session(TWITTER_API_BASE)
+        return _clients[credentials]
 
 # ============================
 # 📲 TWITTER API INTERACTION
 # ============================
 
-def post_tweet(api_key: str, api_key_secret: str, access_token: str, access_token_secret: str, tweet_text: str, username: str = None, in_reply_to_status_id: str = None) -> bool:
+# Outcomes of `send_tweet`; the outbox reschedules or dead-letters by them
+SENT = "sent"
+RATE_LIMITED = "rate_limited"  # Retry at rate_ledger.next_slot()
+FAILED = "failed"              # Network / server error: retry with backoff
+REJECTED = "rejected"          # 400 / 403 / 404 (e.g. duplicate content, deleted tweet): retrying won't help
+
+@metrics.traced("post_tweet", outcome=lambda result: "ok" if result == SENT else result)
+def send_tweet(api_key: str, api_key_secret: str, access_token: str, access_token_secret: str, tweet_text: str, username: str = None, in_reply_to_status_id: str = None, account: str = "default") -> str:
     """Posts a tweet or a reply using Twitter API v2.
 
     Args:
@@ -17,24 +76,21 @@ def post_tweet(api_key: str, api_key_secret: str, access_token: str, access_toke
         - tweet_text (str): The text of the tweet.
         - username (str, optional): The username of the tweet being replied to.
         - in_reply_to_status_id (str, optional): The ID of the tweet being replied to.
+        - account (str, optional): Account name whose rate ledger is checked and updated.
 
     Returns:
-        - bool: True if tweet was successful, False otherwise.
+        - str: SENT, RATE_LIMITED, FAILED or REJECTED. Never sleeps or exits on a 429.
     """
-    client = tweepy.Client(
-        consumer_key=api_key,
-        consumer_secret=api_key_secret,
-        access_token=access_token,
-        access_token_secret=access_token_secret
-    )
-    
-    auth = tweepy.OAuth1UserHandler(api_key, api_key_secret, access_token, access_token_secret)
-    api = tweepy.API(auth)
+    # ✅ **Check the local rate ledger before posting (no network round trip)**
+    if not rate_ledger.can_post(account):
+        next_slot = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(rate_ledger.next_slot(account)))
+        logging.error(f"⏳ Skipping tweet due to rate limits. Next slot: {next_slot}")
+        return RATE_LIMITED
+
+    import requests
+    import tweepy
 
-    # ✅ **Check Rate Limit Before Posting**
-    if not check_rate_limit(client):
-        logging.error("⏳ Skipping tweet due to rate limits.")
-        return False
+    client = get_client(api_key, api_key_secret, access_token, access_token_secret)
 
     try:
         # ✅ Ensure username is included in replies
@@ -48,25 +104,44 @@ def post_tweet(api_key: str, api_key_secret: str, access_token: str, access_toke
             response = client.create_tweet(text=tweet_text)
             logging.info(f"✅ Tweet posted successfully: {tweet_text}")
 
-        return True
+        rate_ledger.record_post(response.headers, account)
+        metrics.annotate(requests=1, bytes=len(response.content))
+        return SENT
 
-    except tweepy.errors.TooManyRequests:
+    except tweepy.errors.TooManyRequests as e:
+        rate_ledger.record_rate_limited(e.response.headers if e.response is not None else None, account)
+        metrics.annotate(requests=1)
         logging.error("❌ 429 Too Many Requests: Rate limit reached.")
-        logging.info("⏳ Exiting and retrying at next scheduled time.")
-        exit()
-        return False
+        logging.info("⏳ Skipping and retrying at next scheduled time.")
+        return RATE_LIMITED
 
-    except tweepy.TweepyException as e:
+    except (tweepy.errors.BadRequest, tweepy.errors.Forbidden, tweepy.errors.NotFound) as e:
+        metrics.annotate(requests=1)
+        logging.error(f"❌ Twitter rejected the tweet: {e}")
+        return REJECTED
+
+    except (tweepy.TweepyException, requests.RequestException) as e:
         logging.error(f"❌ Error posting tweet: {e}")
-        return False
+        return FAILED
+
+
+def post_tweet(api_key: str, api_key_secret: str, access_token: str, access_token_secret: str, tweet_text: str, username: str = None, in_reply_to_status_id: str = None, account: str = "default") -> bool:
+    """Like `send_tweet`, but returns True if the tweet was posted, False otherwise."""
+    return send_tweet(api_key, api_key_secret, access_token, access_token_secret, tweet_text, username, in_reply_to_status_id, account) == SENT
     
 
 # ============================
 # 📲 TWITTER RATE LIMIT CHECK
 # ============================
 
-def check_rate_limit(client: tweepy.Client) -> bool:
-    """Checks Twitter API v2 rate limits and stops execution if limits are reached."""
+@metrics.traced("check_rate_limit", outcome=lambda allowed: "ok" if allowed else "blocked")
+def check_rate_limit(client: "tweepy.Client") -> bool:
+    """Checks Twitter API v2 rate limits with a live `get_me()` probe; returns False if limits are reached.
+
+    Posting no longer calls this (see `rate_ledger`); it is kept for manual diagnostics.
+    """
+    import tweepy
+
     try:
         # Make a test request to check rate limit headers
         response = client.get_me()
@@ -81,8 +156,8 @@ def check_rate_limit(client: tweepy.Client) -> bool:
             # If rate limit is reached, stop execution
             if remaining <= 0:
                 reset_timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(reset_time))
-                logging.error(f"⚠️ Rate limit exceeded. Bot will stop execution. Next reset: {reset_timestamp}")
-                exit(1)  # Stop the bot
+                logging.error(f"⚠️ Rate limit exceeded. Skipping until next reset: {reset_timestamp}")
+                return False
 
             return True  # Continue execution if rate limit is not exceeded
 
@@ -1,16 +1,29 @@
+import contextlib
+import json
 import logging
+import os
 import random
 import re
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
-import requests
+import sqlite3
+import threading
 
 # ============================ #
 # 🌍 HTTP REQUEST MANAGEMENT   #
 # ============================ #
 
-def requests_retry_session(retries=3, backoff_factor=0.3, status_forcelist=(500, 502, 504), session=None):
-    """Creates a requests session with retry logic to handle transient errors."""
+def requests_retry_session(retries=3, backoff_factor=0.3, status_forcelist=(500, 502, 504), session=None,
+                           pool_connections=10, pool_maxsize=10, adapter_class=None):
+    """Creates a requests session with retry logic to handle transient errors.
+
+    `pool_connections` is the number of per-host pools kept alive and `pool_maxsize`
+    the number of sockets kept per host.
+    """
+    # Imported here so runs that never touch the network don't pay for requests/urllib3
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    adapter_class = adapter_class or HTTPAdapter
     session = session or requests.Session()
     retry = Retry(
         total=retries,
@@ -19,12 +32,68 @@ def requests_retry_session(retries=3, backoff_factor=0.3, status_forcelist=(500,
         backoff_factor=backoff_factor,
         status_forcelist=status_forcelist,
     )
-    adapter = HTTPAdapter(max_retries=retry)
+    adapter = adapter_class(max_retries=retry, pool_connections=pool_connections, pool_maxsize=pool_maxsize)
     session.mount('http://', adapter)
     session.mount('https://', adapter)
     return session
 
 
+# ============================ #
+# 📁 PERSISTENT STATE FILES    #
+# ============================ #
+
+# Small on-disk stores (health scores, caches, ledgers) live next to the bot.
+STATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "state")
+
+def state_path(filename: str) -> str:
+    """Returns the path of a state file, creating the state directory if needed."""
+    os.makedirs(STATE_DIR, exist_ok=True)
+    return os.path.join(STATE_DIR, filename)
+
+def load_json(path: str, default=None):
+    """Loads a JSON state file, returning `default` if it is missing or corrupt."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except (OSError, json.JSONDecodeError) as e:
+        logging.warning(f"⚠️ Ignoring unreadable state file {path}: {e}")
+        return default
+
+_schemas_applied = set()  # (path, schema) pairs already created by this process
+_schemas_lock = threading.Lock()
+
+@contextlib.contextmanager
+def sqlite_connect(path: str, schema: str = None):
+    """Yields a connection to the SQLite file `path` inside a transaction and always closes it.
+
+    `schema` (CREATE ... IF NOT EXISTS statements) only runs on the first connection
+    to `path` in this process, not on every one.
+    """
+    conn = sqlite3.connect(path, timeout=10)
+    try:
+        if schema:
+            key = (os.path.abspath(path), schema)
+            with _schemas_lock:
+                applied = key in _schemas_applied
+            if not applied:
+                conn.executescript(schema)
+                with _schemas_lock:
+                    _schemas_applied.add(key)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+def write_json_atomic(path: str, data) -> None:
+    """Writes JSON via a temp file + rename so readers never see a partial file."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
 # ============================= #
 # 🛠 TWEET EXTRACTION UTILITIES #
 # ============================= #
@@ -34,6 +103,7 @@ def extract_tweet(raw_output: str) -> str:
     """Extracts the tweet content and tweet ID while ignoring AI reasoning and chain-of-thought.
 
     The AI is instructed to wrap the final tweet inside {{TWEET_START}} and {{TWEET_END}}.
+    Reasoning before a closing </think> tag is skipped so drafts in it are not picked up.
 
     Args:
         raw_output (str): The raw AI-generated response.
@@ -42,6 +112,8 @@ def extract_tweet(raw_output: str) -> str:
         str: The extracted tweet text.
     """
     start_marker, end_marker = "{{TWEET_START}}", "{{TWEET_END}}"
+    if "</think>" in raw_output and start_marker in raw_output.rsplit("</think>", 1)[1]:
+        raw_output = raw_output.rsplit("</think>", 1)[1]
     start_idx, end_idx = raw_output.find(start_marker), raw_output.find(end_marker)
 
     if start_idx != -1 and end_idx != -1:
@@ -50,6 +122,55 @@ def extract_tweet(raw_output: str) -> str:
     logging.error("❌ AI response did not follow expected format.")
     return raw_output.strip()  # Fallback if markers aren't found
 
+# Strict format check, used to decide whether a model's answer is usable at all
+def has_tweet(raw_output: str, count: int = 0) -> bool:
+    """True when `raw_output` holds a non-empty tweet inside the markers.
+
+    With `count`, the indexed batch markers ({{TWEET_START N}}) are checked instead
+    and one tweet is enough. Unlike the extractors, nothing is logged.
+    """
+    if "</think>" in raw_output:
+        raw_output = raw_output.rsplit("</think>", 1)[1]
+    if count:
+        return any(match.group(2).strip() for match in re.finditer(
+            r"\{\{TWEET_START[ _]?(\d+)\}\}(.*?)\{\{TWEET_END[ _]?\1\}\}", raw_output, re.DOTALL
+        )) or (count == 1 and has_tweet(raw_output))
+    start_idx = raw_output.find("{{TWEET_START}}")
+    end_idx = raw_output.find("{{TWEET_END}}", start_idx)
+    return start_idx != -1 and end_idx != -1 and bool(raw_output[start_idx + len("{{TWEET_START}}"):end_idx].strip())
+
+# Extracts several indexed tweets from one batch response
+def extract_tweets(raw_output: str, count: int) -> list:
+    """Extracts `count` tweets wrapped in indexed markers from a batch generation.
+
+    The AI is instructed to wrap tweet N inside {{TWEET_START N}} and {{TWEET_END N}}.
+    Reasoning before a closing </think> tag is ignored, and if an index appears more
+    than once the last occurrence wins (earlier ones are usually drafts).
+
+    Args:
+        raw_output (str): The raw AI-generated response.
+        count (int): Number of tweets requested.
+
+    Returns:
+        list[str]: Tweets in request order; "" for any index the AI skipped.
+    """
+    if "</think>" in raw_output:
+        raw_output = raw_output.rsplit("</think>", 1)[1]
+
+    tweets = [""] * count
+    for match in re.finditer(r"\{\{TWEET_START[ _]?(\d+)\}\}(.*?)\{\{TWEET_END[ _]?\1\}\}", raw_output, re.DOTALL):
+        index = int(match.group(1))
+        if 1 <= index <= count:
+            tweets[index - 1] = match.group(2).strip()
+
+    if count == 1 and not tweets[0]:
+        return [extract_tweet(raw_output)]  # Model answered with plain markers
+
+    missing = [str(index + 1) for index, tweet in enumerate(tweets) if not tweet]
+    if missing:
+        logging.error(f"❌ AI response is missing tweets: {', '.join(missing)}")
+    return tweets
+
 # extracts info from prompt for together AI
 def extract_tweet_and_id(raw_output: str) -> tuple:
     """